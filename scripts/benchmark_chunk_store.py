@@ -0,0 +1,169 @@
+# scripts/benchmark_chunk_store.py
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.processor.chunk_store import ChunkStore  # noqa: E402
+from src.processor.embedder import EmbeddingBatch  # noqa: E402
+
+# Pinecone's upsert request limit and the uploader's default batch size
+MAX_REQUEST_BYTES = 2 * 1024 * 1024
+UPSERT_BATCH_SIZE = 100
+
+
+def synthetic_batch(count, dimension, chars, with_text, seed=0):
+    """Vectors with the metadata text_to_embeddings uploads for ~`chars`-long chunks"""
+    rng = np.random.default_rng(seed)
+    words = np.array([f"w{i}" for i in range(5000)])
+    texts = [" ".join(rng.choice(words, chars // 6)) for _ in range(count)]
+    metadata = []
+    for i, text in enumerate(texts):
+        row = {
+            'category': 'post',
+            'chunk_index': i % 4,
+            'chunk_size': len(text),
+            'doc_id': str(i // 4),
+            'created_at': '2024-05-01T12:00:00+00:00',
+            'source': 'facebook group',
+            'token_count': len(text) // 4,
+            'version': '1.0',
+        }
+        if with_text:
+            row['text'] = text
+        metadata.append(row)
+    batch = EmbeddingBatch(
+        ids=[f"{i // 4}-{i % 4}" for i in range(count)],
+        vectors=rng.standard_normal((count, dimension), dtype=np.float32),
+        metadata=metadata
+    )
+    return batch, texts
+
+
+def upsert_requests(batch):
+    """JSON sizes of the upsert requests the batch is split into"""
+    sizes = []
+    start = 0
+    while start < len(batch):
+        stop = min(start + UPSERT_BATCH_SIZE, len(batch))
+        while True:
+            body = json.dumps({'vectors': batch.slice(start, stop).to_pinecone()})
+            if len(body) <= MAX_REQUEST_BYTES or stop - start == 1:
+                break
+            stop = start + (stop - start) // 2
+        sizes.append(len(body))
+        start = stop
+    return sizes
+
+
+def query_bytes(batch, top_k):
+    """JSON size of a top_k response with metadata but without values"""
+    matches = [{'id': vector_id, 'score': 0.5, 'metadata': metadata}
+               for vector_id, metadata in zip(batch.ids[:top_k], batch.metadata[:top_k])]
+    return len(json.dumps({'matches': matches}))
+
+
+def measure_offline(args):
+    inline, texts = synthetic_batch(args.vectors, args.dimension, args.chunk_chars, True)
+    external, _ = synthetic_batch(args.vectors, args.dimension, args.chunk_chars, False)
+
+    print(f"{args.vectors:,} chunks of ~{args.chunk_chars} characters, "
+          f"{args.dimension} dimensions\n")
+    print(f"{'chunk text':<14}{'requests':>10}{'upsert MB':>11}{'KB/vector':>11}"
+          f"{f'top-{args.top_k} KB':>11}")
+    for name, batch in (('in metadata', inline), ('chunk store', external)):
+        sizes = upsert_requests(batch)
+        print(f"{name:<14}{len(sizes):>10}{sum(sizes) / 1e6:>11.1f}"
+              f"{sum(sizes) / len(batch) / 1024:>11.2f}"
+              f"{query_bytes(batch, args.top_k) / 1024:>11.1f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ChunkStore(os.path.join(directory, 'chunks.sqlite'))
+        start = time.perf_counter()
+        for offset in range(0, len(texts), UPSERT_BATCH_SIZE):
+            store.put_many(external.ids[offset:offset + UPSERT_BATCH_SIZE],
+                           texts[offset:offset + UPSERT_BATCH_SIZE])
+        elapsed = time.perf_counter() - start
+        print(f"\nChunk store writes: {len(texts) / elapsed:,.0f} chunks/s")
+
+        rng = np.random.default_rng(1)
+        latencies = []
+        for _ in range(200):
+            rows = rng.choice(len(external), args.top_k, replace=False)
+            matches = [{'id': external.ids[row], 'metadata': external.metadata[row]}
+                       for row in rows]
+            start = time.perf_counter()
+            store.hydrate(matches)
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"Hydrating {args.top_k} matches: p50 {np.percentile(latencies, 50):.3f} ms, "
+              f"p99 {np.percentile(latencies, 99):.3f} ms")
+        store.close()
+
+
+async def measure_pinecone(args):
+    """Upload both variants to scratch namespaces of the configured index"""
+    # Only needed for live measurements
+    from src.processor.uploader import PineconeUploader
+
+    load_dotenv()
+    uploader = PineconeUploader(
+        api_key=os.getenv('PINECONE_API_KEY'),
+        index_name=os.getenv('PINECONE_INDEX_NAME'),
+        dimension=args.dimension
+    )
+    print(f"\n{'chunk text':<14}{'vectors/s':>11}{'query p50 ms':>14}")
+    try:
+        for name, with_text in (('in metadata', True), ('chunk store', False)):
+            batch, _ = synthetic_batch(args.vectors, args.dimension,
+                                       args.chunk_chars, with_text)
+            namespace = f"benchmark-chunk-store-{'inline' if with_text else 'external'}"
+            start = time.perf_counter()
+            await uploader.upload_vectors(batch, namespace)
+            rate = len(batch) / (time.perf_counter() - start)
+
+            latencies = []
+            for row in range(20):
+                start = time.perf_counter()
+                uploader.index.query(vector=batch.vectors[row].tolist(), top_k=args.top_k,
+                                     namespace=namespace, include_metadata=True)
+                latencies.append((time.perf_counter() - start) * 1000)
+            uploader.index.delete(delete_all=True, namespace=namespace)
+            print(f"{name:<14}{rate:>11,.0f}{np.percentile(latencies, 50):>14.1f}")
+    finally:
+        uploader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare upsert and query payloads with chunk text in '
+                    'Pinecone metadata or in the local chunk store')
+    parser.add_argument('--vectors', type=int, default=2000,
+                        help='Chunks to upload (default: 2000)')
+    parser.add_argument('--dimension', type=int, default=1536,
+                        help='Vector dimension (default: 1536)')
+    parser.add_argument('--chunk-chars', type=int, default=2000,
+                        help='Characters per chunk, ~500 tokens (default: 2000)')
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--pinecone', action='store_true',
+                        help='Also measure upsert throughput and query latency '
+                             'against PINECONE_INDEX_NAME, in scratch namespaces')
+    args = parser.parse_args()
+
+    measure_offline(args)
+    if args.pinecone:
+        asyncio.run(measure_pinecone(args))
+
+
+if __name__ == "__main__":
+    main()
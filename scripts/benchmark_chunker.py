@@ -0,0 +1,98 @@
+# scripts/benchmark_chunker.py
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.processor.chunker import DocumentChunker  # noqa: E402
+
+SYNTHETIC_THREAD_BYTES = 1_000_000
+
+
+def load_posts(file_path):
+    """Split a sample.txt-style file into individual posts"""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        text = file.read()
+    return [post.strip() for post in text.split("\n\n\n") if post.strip()]
+
+
+def build_thread(posts, target_bytes=SYNTHETIC_THREAD_BYTES):
+    """Build one long reconstructed thread out of repeated posts"""
+    parts = []
+    size = 0
+    i = 0
+    while size < target_bytes:
+        post = posts[i % len(posts)]
+        part = f"\nComment by Member {i} on 2024-11-23T23:17:00Z:\n\n{post}"
+        parts.append(part)
+        size += len(part.encode('utf-8'))
+        i += 1
+    return '\n\n'.join(parts)
+
+
+def time_split(doc_chunker, documents, repeat):
+    """Return per-run timings and chunk count for splitting all documents"""
+    timings = []
+    chunk_count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunk_count = sum(
+            len(doc_chunker.split(doc, doc_id=str(i)))
+            for i, doc in enumerate(documents)
+        )
+        timings.append(time.perf_counter() - start)
+    return timings, chunk_count
+
+
+def run_case(name, documents, repeat, engines):
+    size = sum(len(doc.encode('utf-8')) for doc in documents)
+    print(f"\n{name}: {len(documents)} document(s), {size:,} bytes")
+
+    results = {}
+    for engine in engines:
+        try:
+            doc_chunker = DocumentChunker(
+                chunk_size=500, chunk_overlap=50, engine=engine)
+        except ImportError as e:
+            print(f"  {engine:<10} skipped ({e})")
+            continue
+
+        timings, chunk_count = time_split(doc_chunker, documents, repeat)
+        results[engine] = statistics.median(timings)
+        print(f"  {engine:<10} median {results[engine] * 1000:10.2f} ms  "
+              f"chunks: {chunk_count}")
+
+    if "native" in results and "langchain" in results:
+        speedup = results["langchain"] / results["native"]
+        print(f"  native speedup: {speedup:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare the native and langchain chunking engines')
+    parser.add_argument('--input-file', default='sample.txt',
+                        help='sample.txt-style file with posts')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Runs per case (median is reported)')
+    parser.add_argument('--skip-langchain-thread', action='store_true',
+                        help='Skip the slow langchain run on the 1 MB thread')
+    args = parser.parse_args()
+
+    posts = load_posts(args.input_file)
+    thread = build_thread(posts)
+
+    run_case("sample posts", posts, args.repeat, ["native", "langchain"])
+
+    thread_engines = ["native"]
+    if not args.skip_langchain_thread:
+        thread_engines.append("langchain")
+    run_case("synthetic 1 MB thread", [thread], 1, thread_engines)
+
+
+if __name__ == "__main__":
+    main()
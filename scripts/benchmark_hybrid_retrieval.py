@@ -0,0 +1,126 @@
+# scripts/benchmark_hybrid_retrieval.py
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.processor.bm25_index import BM25Index  # noqa: E402
+from src.processor.embedder import EmbeddingBatch  # noqa: E402
+from src.processor.local_index import LocalVectorIndex  # noqa: E402
+from src.processor.retriever import reciprocal_rank_fusion  # noqa: E402
+
+
+def synthetic_corpus(chunks, topics, dimension, seed=0):
+    """Topical chunks whose vectors know the topic but not the names in them.
+
+    Every chunk mentions one name shared by about two chunks, like a
+    person or company discussed in a couple of threads.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((topics, dimension), dtype=np.float32)
+    labels = rng.integers(0, topics, chunks)
+    vectors = centers[labels] + 0.7 * rng.standard_normal((chunks, dimension), dtype=np.float32)
+    names = rng.integers(0, chunks // 2, chunks)
+    texts = [
+        " ".join([f"topic{label}word{word}" for word in rng.integers(0, 40, 30)]
+                 + [f"name{name}"])
+        for label, name in zip(labels, names)
+    ]
+    return centers, labels, vectors, names, texts
+
+
+def name_queries(count, centers, labels, names, rng):
+    """Questions about a name: the vector only carries the topic"""
+    queries = []
+    for row in rng.integers(0, len(labels), count):
+        vector = centers[labels[row]] + 0.7 * rng.standard_normal(centers.shape[1])
+        relevant = set(np.flatnonzero(names == names[row]).tolist())
+        queries.append((f"what about name{names[row]} topic{labels[row]}word1",
+                        vector, relevant))
+    return queries
+
+
+def paraphrase_queries(count, vectors, rng):
+    """Questions close to one chunk in meaning but sharing none of its words"""
+    queries = []
+    for row in rng.integers(0, len(vectors), count):
+        vector = vectors[row] + 0.2 * rng.standard_normal(vectors.shape[1])
+        queries.append(("how does this usually work", vector, {int(row)}))
+    return queries
+
+
+def run_case(queries, top_k, search):
+    latencies = []
+    hits = total = 0
+    for text, vector, relevant in queries:
+        start = time.perf_counter()
+        matches = search(text, vector)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = {int(match['id']) for match in matches[:top_k]}
+        hits += len(found & relevant)
+        total += min(len(relevant), top_k)
+    return np.array(latencies), hits / total
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare dense, BM25 and hybrid (RRF) retrieval recall and latency')
+    parser.add_argument('--chunks', type=int, default=20000,
+                        help='Chunks in the corpus (default: 20000)')
+    parser.add_argument('--dimension', type=int, default=256,
+                        help='Vector dimension (default: 256)')
+    parser.add_argument('--topics', type=int, default=50)
+    parser.add_argument('--queries', type=int, default=200,
+                        help='Queries per query set (default: 200)')
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--candidates', type=int, default=20,
+                        help='Matches per ranking fused by RRF (default: 20)')
+    args = parser.parse_args()
+
+    centers, labels, vectors, names, texts = synthetic_corpus(
+        args.chunks, args.topics, args.dimension)
+    ids = [str(i) for i in range(args.chunks)]
+
+    dense_index = LocalVectorIndex(dimension=args.dimension)
+    dense_index.upsert(EmbeddingBatch(ids=ids, vectors=vectors))
+    start = time.perf_counter()
+    keyword_index = BM25Index()
+    keyword_index.upsert(ids, texts)
+    keyword_index.merge()
+    print(f"Indexed {args.chunks} chunks for BM25 in {time.perf_counter() - start:.2f}s")
+
+    def dense(text, vector, top_k=args.top_k):
+        return dense_index.query(vector, top_k=top_k)['matches']
+
+    def keyword(text, vector, top_k=args.top_k):
+        return keyword_index.query(text, top_k=top_k)['matches']
+
+    def hybrid(text, vector):
+        candidates = max(args.top_k, args.candidates)
+        return reciprocal_rank_fusion(
+            [dense(text, vector, candidates), keyword(text, vector, candidates)],
+            top_k=args.top_k)
+
+    rng = np.random.default_rng(1)
+    query_sets = {
+        'names': name_queries(args.queries, centers, labels, names, rng),
+        'paraphrases': paraphrase_queries(args.queries, vectors, rng),
+    }
+
+    print(f"\n{'queries':<14}{'retrieval':<10}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{f'recall@{args.top_k}':>12}")
+    for set_name, queries in query_sets.items():
+        for case, search in (('dense', dense), ('bm25', keyword), ('hybrid', hybrid)):
+            latencies, recall = run_case(queries, args.top_k, search)
+            print(f"{set_name:<14}{case:<10}{np.percentile(latencies, 50):>10.3f}"
+                  f"{np.percentile(latencies, 99):>10.3f}{recall:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# scripts/benchmark_local_index.py
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.processor.embedder import EmbeddingBatch  # noqa: E402
+from src.processor.local_index import LocalVectorIndex  # noqa: E402
+
+
+def clustered_vectors(count, dimension, clusters, seed=0):
+    """Random vectors around `clusters` centers, like topical chunks"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension), dtype=np.float32)
+    labels = rng.integers(0, clusters, count)
+    noise = rng.standard_normal((count, dimension), dtype=np.float32)
+    return centers[labels] + 0.5 * noise
+
+
+def time_queries(index, queries, top_k, **options):
+    """Per-query latencies in ms and the matched IDs"""
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        response = index.query(query, top_k=top_k, **options)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([match['id'] for match in response['matches']])
+    return np.array(latencies), results
+
+
+def recall(results, truth):
+    hits = sum(len(set(found) & set(expected))
+               for found, expected in zip(results, truth))
+    return hits / sum(len(expected) for expected in truth)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure local vector index latency and IVF recall')
+    parser.add_argument('--vectors', type=int, default=20000,
+                        help='Vectors in the namespace (default: 20000)')
+    parser.add_argument('--dimension', type=int, default=1536,
+                        help='Vector dimension (default: 1536)')
+    parser.add_argument('--queries', type=int, default=200,
+                        help='Queries per case (default: 200)')
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[4, 8, 16],
+                        help='IVF lists probed per query')
+    args = parser.parse_args()
+
+    values = clustered_vectors(args.vectors, args.dimension, clusters=64)
+    index = LocalVectorIndex(dimension=args.dimension)
+    start = time.perf_counter()
+    index.upsert(EmbeddingBatch(
+        ids=[str(i) for i in range(args.vectors)],
+        vectors=values,
+        metadata=[{'doc_id': str(i // 4)} for i in range(args.vectors)]
+    ))
+    print(f"Upserted {args.vectors} x {args.dimension} vectors in "
+          f"{time.perf_counter() - start:.2f}s")
+
+    queries = clustered_vectors(args.queries, args.dimension, clusters=64, seed=1)
+    exact_ms, truth = time_queries(index, queries, args.top_k)
+    print(f"\n{'case':<16}{'p50 ms':>10}{'p99 ms':>10}{'recall':>10}")
+    print(f"{'exact':<16}{np.percentile(exact_ms, 50):>10.3f}"
+          f"{np.percentile(exact_ms, 99):>10.3f}{1.0:>10.3f}")
+
+    filtered_ms, _ = time_queries(index, queries, args.top_k,
+                                  filter={'doc_id': {'$in': ['1', '2', '3']}})
+    print(f"{'exact + filter':<16}{np.percentile(filtered_ms, 50):>10.3f}"
+          f"{np.percentile(filtered_ms, 99):>10.3f}{'':>10}")
+
+    start = time.perf_counter()
+    index.build_ivf()
+    print(f"\nBuilt IVF in {time.perf_counter() - start:.2f}s")
+    for nprobe in args.nprobe:
+        ivf_ms, results = time_queries(index, queries, args.top_k,
+                                       approximate=True, nprobe=nprobe)
+        print(f"{f'ivf nprobe={nprobe}':<16}{np.percentile(ivf_ms, 50):>10.3f}"
+              f"{np.percentile(ivf_ms, 99):>10.3f}{recall(results, truth):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
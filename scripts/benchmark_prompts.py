@@ -0,0 +1,129 @@
+# scripts/benchmark_prompts.py
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import openai
+from dotenv import load_dotenv
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.processor.prompts import TEMPLATES, build_messages  # noqa: E402
+
+DEFAULT_FIXTURES = project_root / "test" / "fixtures" / "raw_posts.json"
+
+
+def load_fixtures(path):
+    """Raw posts with their expected conversion"""
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def outline(node):
+    """Authors, messages and nesting of a converted thread, ignoring times"""
+    children = node.get("comments", {}).get("data", [])
+    return (node.get("author"), node.get("message"),
+            tuple(outline(child) for child in children))
+
+
+def matches_expected(result, expected):
+    try:
+        return [outline(n) for n in result["data"]] == \
+            [outline(n) for n in expected["data"]]
+    except (KeyError, TypeError, AttributeError):
+        return False
+
+
+def run_template(client, model, template, fixtures, repeat):
+    """Convert every fixture with one template and collect per-call stats"""
+    calls = []
+    for _ in range(repeat):
+        for fixture in fixtures:
+            start = time.perf_counter()
+            response = client.chat.completions.create(
+                model=model,
+                messages=build_messages(
+                    fixture["raw_post"], fixture["created_at"], template),
+                temperature=0.0,
+                response_format={"type": "json_object"}
+            )
+            elapsed = time.perf_counter() - start
+
+            usage = response.usage
+            details = getattr(usage, "prompt_tokens_details", None)
+            try:
+                result = json.loads(response.choices[0].message.content)
+                valid = isinstance(result.get("data"), list)
+            except (json.JSONDecodeError, TypeError, AttributeError):
+                result, valid = None, False
+
+            calls.append({
+                "latency": elapsed,
+                "prompt_tokens": usage.prompt_tokens,
+                "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+                "completion_tokens": usage.completion_tokens,
+                "valid": valid,
+                "match": valid and "expected" in fixture
+                and matches_expected(result, fixture["expected"]),
+            })
+    return calls
+
+
+def count_prompt_tokens(model):
+    """Offline system prompt sizes, without calling the API"""
+    import tiktoken
+    encoding = tiktoken.encoding_for_model(model)
+    for key, template in sorted(TEMPLATES.items()):
+        print(f"{key:<16}{len(encoding.encode(template.system)):>8} system prompt tokens")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare prompt templates for raw post conversion')
+    parser.add_argument('--fixtures', default=str(DEFAULT_FIXTURES),
+                        help='JSON file of raw posts with expected output')
+    parser.add_argument('--templates', nargs='+', default=sorted(TEMPLATES),
+                        choices=sorted(TEMPLATES),
+                        help='Template versions to compare (default: all)')
+    parser.add_argument('--model', default='gpt-4-turbo-preview',
+                        help='Chat model to benchmark (default: gpt-4-turbo-preview)')
+    parser.add_argument('--repeat', type=int, default=2,
+                        help='Passes over the fixtures; later passes show '
+                             'prompt cache hits (default: 2)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Only count system prompt tokens')
+    args = parser.parse_args()
+
+    if args.dry_run:
+        count_prompt_tokens(args.model)
+        return
+
+    load_dotenv()
+    client = openai.Client(api_key=os.getenv('OPENAI_API_KEY'))
+    fixtures = load_fixtures(args.fixtures)
+    print(f"{len(fixtures)} fixtures x {args.repeat} passes on {args.model}\n")
+    print(f"{'template':<16}{'p50 s':>8}{'max s':>8}{'prompt tok':>12}"
+          f"{'cached %':>10}{'output tok':>12}{'valid %':>9}{'match %':>9}")
+
+    for template in args.templates:
+        calls = run_template(client, args.model, template, fixtures, args.repeat)
+        latencies = [call["latency"] for call in calls]
+        prompt_tokens = sum(call["prompt_tokens"] for call in calls)
+        cached_tokens = sum(call["cached_tokens"] for call in calls)
+        print(f"{template:<16}"
+              f"{statistics.median(latencies):>8.2f}{max(latencies):>8.2f}"
+              f"{prompt_tokens / len(calls):>12.0f}"
+              f"{100 * cached_tokens / prompt_tokens:>10.1f}"
+              f"{statistics.mean(c['completion_tokens'] for c in calls):>12.0f}"
+              f"{100 * statistics.mean(c['valid'] for c in calls):>9.0f}"
+              f"{100 * statistics.mean(c['match'] for c in calls):>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
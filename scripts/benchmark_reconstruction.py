@@ -0,0 +1,87 @@
+# scripts/benchmark_reconstruction.py
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.processor.reconstruction import (  # noqa: E402
+    DEFAULT_CHUNK_SIZE, reconstruct_rows)
+from src.processor.thread_walker import convert_json_to_text  # noqa: E402
+
+FIXTURES = project_root / 'test' / 'fixtures' / 'raw_posts.json'
+
+
+def build_thread(template, comments):
+    """A processed post with `comments` top-level comments, each with replies"""
+    post = dict(template['data'][0])
+    sample = (post.get('comments') or {}).get('data') or [
+        {'author': 'Member', 'message': post['message'],
+         'created_time': post['created_time']}]
+    post['comments'] = {'data': [
+        {**sample[i % len(sample)], 'author': f"Member {i}"}
+        for i in range(comments)
+    ]}
+    return {'data': [post]}
+
+
+def build_rows(count, comments):
+    """`count` rows cycling through the fixture threads, scaled up"""
+    with open(FIXTURES, 'r', encoding='utf-8') as file:
+        threads = [build_thread(fixture['expected'], comments)
+                   for fixture in json.load(file)]
+    return [{'id': i, 'processed_post_json': threads[i % len(threads)]}
+            for i in range(count)]
+
+
+def time_run(rows, workers, chunk_size, repeat):
+    """Median posts per second of reconstructing all rows"""
+    rates = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        converted = sum(
+            1 for _, text, error in reconstruct_rows(
+                rows, convert_json_to_text, workers, chunk_size)
+            if error is None)
+        rates.append(converted / (time.perf_counter() - start))
+    return statistics.median(rates)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure JSON-to-text reconstruction throughput')
+    parser.add_argument('--posts', type=int, default=20000,
+                        help='Synthetic posts to reconstruct (default: 20000)')
+    parser.add_argument('--comments', type=int, default=50,
+                        help='Top-level comments per post (default: 50)')
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=[0, 2, os.cpu_count() or 1],
+                        help='Worker counts to compare (0 = main process)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'Posts per worker task (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per case (median is reported)')
+    args = parser.parse_args()
+
+    rows = build_rows(args.posts, args.comments)
+    size = sum(len(json.dumps(row['processed_post_json'])) for row in rows)
+    print(f"{len(rows)} posts, {args.comments} comments each, "
+          f"{size / 1e6:.1f} MB of JSON")
+
+    baseline = None
+    for workers in dict.fromkeys(args.workers):
+        rate = time_run(rows, workers, args.chunk_size, args.repeat)
+        baseline = baseline or rate
+        label = 'main process' if workers <= 0 else f"{workers} workers"
+        print(f"  {label:<14} {rate:12,.0f} posts/s  "
+              f"({rate / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# scripts/benchmark_vector_memory.py
+import argparse
+import base64
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.processor.embedder import EmbeddingBatch, _decode_embedding  # noqa: E402
+
+
+def fake_response(count, dimension):
+    """Base64 embeddings as the API returns them with encoding_format=base64"""
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((count, dimension), dtype=np.float32)
+    return [base64.b64encode(row.tobytes()).decode() for row in matrix]
+
+
+def build_lists(encoded):
+    """Previous representation: one list of Python floats per vector"""
+    return [_decode_embedding(item).tolist() for item in encoded]
+
+
+def build_batch(encoded, dimension):
+    """New representation: one contiguous float32 matrix"""
+    matrix = np.empty((len(encoded), dimension), dtype=np.float32)
+    for i, item in enumerate(encoded):
+        matrix[i] = _decode_embedding(item)
+    return EmbeddingBatch(
+        ids=[f"doc-{i}" for i in range(len(encoded))],
+        vectors=matrix
+    )
+
+
+def measure(build):
+    """Return (result, retained bytes, peak bytes, seconds) for build()"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare memory of list-of-floats and float32 matrix embeddings')
+    parser.add_argument('--count', type=int, default=10_000,
+                        help='Number of embeddings (default: 10000)')
+    parser.add_argument('--dimension', type=int, default=1536,
+                        help='Embedding dimension (default: 1536)')
+    args = parser.parse_args()
+
+    encoded = fake_response(args.count, args.dimension)
+
+    print(f"{args.count:,} embeddings x {args.dimension} dimensions\n")
+    print(f"{'representation':<22}{'retained MB':>12}{'peak MB':>10}"
+          f"{'KB/vector':>11}{'seconds':>10}")
+
+    rows = [
+        ("List[List[float]]", lambda: build_lists(encoded)),
+        ("EmbeddingBatch", lambda: build_batch(encoded, args.dimension)),
+    ]
+    for name, build in rows:
+        result, current, peak, elapsed = measure(build)
+        print(f"{name:<22}{current / 1e6:>12.1f}{peak / 1e6:>10.1f}"
+              f"{current / args.count / 1024:>11.1f}{elapsed:>10.2f}")
+        del result
+
+    # Wire format is only materialised one upsert batch at a time
+    batch = build_batch(encoded, args.dimension)
+    _, current, peak, elapsed = measure(lambda: batch.slice(0, 100).to_pinecone())
+    print(f"\nOne 100-vector upsert payload: {current / 1e6:.1f} MB "
+          f"built in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,17 @@
 import os
+import sys
+from pathlib import Path
 from supabase import create_client
 import statistics
 import tiktoken
 import openai
 
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.database.client import iter_rows  # noqa: E402
+
 # Initialize Supabase client
 url = os.getenv('SUPABASE_URL')
 key = os.getenv('SUPABASE_KEY')
@@ -27,8 +35,8 @@ def count_tokens(text, model="gpt-4-turbo-preview"):
 
 
 def process_posts():
-    # Fetch posts from Supabase
-    response = supabase.table('fb_group_posts').select('raw_post').execute()
+    # Stream posts from Supabase
+    records = iter_rows(supabase, 'fb_group_posts', 'id, raw_post')
 
     token_stats = []
     cost_stats = []
@@ -36,7 +44,7 @@ def process_posts():
     system_prompt = """Convert the following Facebook post into structured JSON format. 
     Include fields like: text_content, links, hashtags, mentions, and any other relevant metadata."""
 
-    for record in response.data:
+    for record in records:
         if not record['raw_post']:
             continue
 
@@ -1,9 +1,23 @@
+import itertools
 import os
+import sys
+from pathlib import Path
 from supabase import create_client
 import argparse
 from collections import Counter, defaultdict
 import json
 
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.database.client import iter_rows  # noqa: E402
+from src.processor.thread_walker import walk_thread  # noqa: E402
+
+# Computed column from src/database/migrations/001_post_analytics.sql,
+# with comment depths added by 003_post_engagement_depths.sql
+ENGAGEMENT_COLUMN = 'post_engagement'
+
 # Initialize Supabase client
 url = os.getenv('SUPABASE_URL')
 key = os.getenv('SUPABASE_KEY')
@@ -34,165 +48,158 @@ class SkippedRecords:
                 f"Empty 'data' array - IDs: {', '.join(map(str, sorted(self.empty_data)))}")
 
 
-def count_nested_comments(comments):
-    """Recursively count comments and their authors"""
-    engagement_counts = Counter()
-
-    for comment in comments.get('data', []):
-        if comment.get('author'):
-            engagement_counts[comment['author']] += 1
-
-        # Recursively count nested comments
-        nested_counts = count_nested_comments(
-            comment.get('comments', {'data': []}))
-        engagement_counts.update(nested_counts)
-
-    return engagement_counts
-
-
-def analyze_post_authors(single_id=None, id_range=None):
-    # Prepare query for posts
-    query = supabase.table('fb_group_posts').select('id,processed_post_json')
-
-    if single_id is not None:
-        query = query.eq('id', single_id)
-    elif id_range is not None:
-        from_id, to_id = id_range
-        query = query.gte('id', from_id).lte('id', to_id)
+def id_filters(single_id=None, id_range=None):
+    """Query constraints for a single ID or an ID range"""
+    def apply(query):
+        if single_id is not None:
+            return query.eq('id', single_id)
+        if id_range is not None:
+            from_id, to_id = id_range
+            return query.gte('id', from_id).lte('id', to_id)
+        return query
+    return apply
+
+
+def summarize_post(post_data):
+    """Client-side twin of the post_engagement computed column"""
+    if not post_data:
+        return {'status': 'null_json'}
+
+    # If it's a string, parse it
+    if isinstance(post_data, str):
+        try:
+            post_data = json.loads(post_data)
+        except json.JSONDecodeError:
+            return {'status': 'invalid_json'}
+
+    # Check for data field
+    if not isinstance(post_data, dict) or 'data' not in post_data:
+        return {'status': 'missing_data'}
+
+    # Check for empty data array
+    if not post_data['data']:
+        return {'status': 'empty_data'}
+
+    post = post_data['data'][0]  # Get the first post
+    # One walk gives the comment authors and depths at any nesting level
+    thread = walk_thread({'data': [post]}, render=False)
+    return {
+        'status': 'ok',
+        'author': post.get('author', ''),
+        'comment_authors': list(thread.comment_author_counts.elements()),
+        'comment_depths': {depth: count
+                           for depth, count in thread.depth_counts.items() if depth},
+    }
+
+
+def summarize_client_side(filters):
+    """Download processed_post_json and extract authors here"""
+    for record in iter_rows(supabase, 'fb_group_posts', 'id,processed_post_json',
+                            filters):
+        yield {'id': record['id'],
+               ENGAGEMENT_COLUMN: summarize_post(record['processed_post_json'])}
+
+
+def fetch_summaries(filters):
+    """Per-post authors, extracted by Postgres when the migration is applied.
+
+    Only author names cross the wire, so the payload no longer grows with
+    the post text. A missing computed column fails on the first page, in
+    which case the full JSON is downloaded instead.
+    """
+    rows = iter_rows(supabase, 'fb_group_posts', f'id,{ENGAGEMENT_COLUMN}', filters)
+    try:
+        first = next(rows, None)
+    except Exception as e:
+        print(f"Computed column {ENGAGEMENT_COLUMN} unavailable ({str(e)}), "
+              f"extracting authors client-side")
+        return summarize_client_side(filters)
+    return itertools.chain([first], rows) if first else iter(())
+
+
+class EngagementReport:
+    """Post author and total engagement counts, built in one pass"""
 
-    response = query.execute()
-
-    print(f"\nFetched {len(response.data)} records")
-
-    # Count posts per author
-    author_posts = Counter()
-    unknown_post_ids = []
-    total_posts = 0
-    skipped = SkippedRecords()
-
-    for record in response.data:
-        record_id = record.get('id', 'Unknown ID')
-
-        if not record['processed_post_json']:
-            skipped.null_json.append(record_id)
-            continue
-
-        post_data = record['processed_post_json']
-        # If it's a string, parse it
-        if isinstance(post_data, str):
-            try:
-                post_data = json.loads(post_data)
-            except json.JSONDecodeError:
-                skipped.invalid_json.append(record_id)
-                continue
-
-        # Check for data field
-        if not isinstance(post_data, dict) or 'data' not in post_data:
-            skipped.missing_data.append(record_id)
-            continue
-
-        # Check for empty data array
-        if not post_data['data']:
-            skipped.empty_data.append(record_id)
-            continue
-
-        total_posts += 1
-        post = post_data['data'][0]  # Get the first post
-        author = post.get('author', '')
+    def __init__(self):
+        self.fetched = 0
+        self.total_posts = 0
+        self.author_posts = Counter()
+        self.engagement_counts = Counter()
+        self.unknown_post_ids = []
+        self.depth_counts = Counter()
+        self.skipped = SkippedRecords()
+
+    def add(self, record_id, summary):
+        self.fetched += 1
+        status = summary.get('status')
+        if status != 'ok':
+            getattr(self.skipped, status).append(record_id)
+            return
+
+        self.total_posts += 1
+        author = summary.get('author', '')
         if author == "Unknown":
-            unknown_post_ids.append(record_id)
-        author_posts[author] += 1
-
-    print("\nPost Authors Statistics:")
-    print("------------------------")
-    print(f"Total Posts Analyzed: {total_posts}")
-    if not author_posts:
-        print("No authors found in the data")
-    else:
-        for author, count in sorted(author_posts.items(), key=lambda x: (-x[1], x[0])):
-            print(f"{author}: {count} posts")
-
-    if unknown_post_ids:
-        print("\nPosts with 'Unknown' Author:")
-        print(f"IDs: {', '.join(map(str, sorted(unknown_post_ids)))}")
-
-    skipped.print_report()
-
-
-def analyze_total_engagement(single_id=None, id_range=None):
-    # Prepare query for posts with comments
-    query = supabase.table('fb_group_posts').select('id,processed_post_json')
-
-    if single_id is not None:
-        query = query.eq('id', single_id)
-    elif id_range is not None:
-        from_id, to_id = id_range
-        query = query.gte('id', from_id).lte('id', to_id)
-
-    response = query.execute()
-
-    print(f"\nFetched {len(response.data)} records for engagement analysis")
-
-    # Count all engagements (posts + comments)
-    engagement_counts = Counter()
-    total_posts = 0
-    skipped = SkippedRecords()
-
-    # Process each post and its comments
-    for record in response.data:
-        record_id = record.get('id', 'Unknown ID')
-
-        if not record['processed_post_json']:
-            skipped.null_json.append(record_id)
-            continue
-
-        post_data = record['processed_post_json']
-        # If it's a string, parse it
-        if isinstance(post_data, str):
-            try:
-                post_data = json.loads(post_data)
-            except json.JSONDecodeError:
-                skipped.invalid_json.append(record_id)
-                continue
-
-        # Check for data field
-        if not isinstance(post_data, dict) or 'data' not in post_data:
-            skipped.missing_data.append(record_id)
-            continue
-
-        # Check for empty data array
-        if not post_data['data']:
-            skipped.empty_data.append(record_id)
-            continue
-
-        total_posts += 1
-        post = post_data['data'][0]  # Get the first post
-
-        # Count the post author
-        author = post.get('author', '')
-        engagement_counts[author] += 1
-
-        # Count all comments
-        if 'comments' in post:
-            comment_counts = count_nested_comments(post['comments'])
-            engagement_counts.update(comment_counts)
-
-    print("\nTotal Engagement Statistics (Posts + All Comments):")
-    print("------------------------------------------------")
-    print(f"Total Posts Analyzed: {total_posts}")
-    if not engagement_counts:
-        print("No engagement data found")
-    else:
-        for author, count in sorted(engagement_counts.items(), key=lambda x: (-x[1], x[0])):
-            if author:  # Skip empty author names if any
-                print(f"{author}: {count} engagements")
-
-    skipped.print_report()
+            self.unknown_post_ids.append(record_id)
+        self.author_posts[author] += 1
+
+        # Count the post author and all comment authors
+        self.engagement_counts[author] += 1
+        self.engagement_counts.update(
+            a for a in summary.get('comment_authors') or [] if a)
+
+        # Server-side summaries carry depths once migration 003 is applied
+        for depth, count in (summary.get('comment_depths') or {}).items():
+            self.depth_counts[int(depth)] += count
+
+    def print_post_authors(self):
+        print("\nPost Authors Statistics:")
+        print("------------------------")
+        print(f"Total Posts Analyzed: {self.total_posts}")
+        if not self.author_posts:
+            print("No authors found in the data")
+        else:
+            for author, count in sorted(self.author_posts.items(),
+                                        key=lambda x: (-x[1], x[0])):
+                print(f"{author}: {count} posts")
+
+        if self.unknown_post_ids:
+            print("\nPosts with 'Unknown' Author:")
+            print(f"IDs: {', '.join(map(str, sorted(self.unknown_post_ids)))}")
+
+    def print_total_engagement(self):
+        print("\nTotal Engagement Statistics (Posts + All Comments):")
+        print("------------------------------------------------")
+        print(f"Total Posts Analyzed: {self.total_posts}")
+        if not self.engagement_counts:
+            print("No engagement data found")
+        else:
+            for author, count in sorted(self.engagement_counts.items(),
+                                        key=lambda x: (-x[1], x[0])):
+                if author:  # Skip empty author names if any
+                    print(f"{author}: {count} engagements")
+
+    def print_depths(self):
+        if not self.depth_counts:
+            return
+        print("\nComment Depth Statistics:")
+        print("-------------------------")
+        print(f"Deepest reply level: {max(self.depth_counts)}")
+        for depth, count in sorted(self.depth_counts.items()):
+            label = "Comments" if depth == 1 else f"Replies at depth {depth}"
+            print(f"{label}: {count}")
 
 
 def analyze_engagement(single_id=None, id_range=None):
-    analyze_post_authors(single_id, id_range)
-    analyze_total_engagement(single_id, id_range)
+    # Both reports come from a single stream of per-post summaries
+    report = EngagementReport()
+    for record in fetch_summaries(id_filters(single_id, id_range)):
+        report.add(record.get('id', 'Unknown ID'), record[ENGAGEMENT_COLUMN])
+
+    print(f"\nFetched {report.fetched} records")
+    report.print_post_authors()
+    report.print_total_engagement()
+    report.print_depths()
+    report.skipped.print_report()
 
 
 if __name__ == "__main__":
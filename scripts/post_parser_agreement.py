@@ -0,0 +1,158 @@
+# scripts/post_parser_agreement.py
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+from supabase import create_client
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.database.client import iter_rows  # noqa: E402
+from src.processor.post_parser import (  # noqa: E402
+    DEFAULT_MIN_CONFIDENCE, parse_post, parse_timestamp)
+
+
+def normalize(text):
+    return " ".join((text or "").split())
+
+
+def outline(node):
+    """Authors, messages and nesting of a converted thread, ignoring times"""
+    children = (node.get("comments") or {}).get("data", [])
+    return (node.get("author"), normalize(node.get("message")),
+            tuple(outline(child) for child in children))
+
+
+def comment_times(node):
+    """created_time of every comment and reply, depth first"""
+    times = []
+    for child in (node.get("comments") or {}).get("data", []):
+        times.append(child.get("created_time"))
+        times.extend(comment_times(child))
+    return times
+
+
+def same_time(a, b, tolerance_minutes):
+    try:
+        delta = parse_timestamp(a) - parse_timestamp(b)
+    except (AttributeError, TypeError, ValueError):
+        return False
+    return abs(delta.total_seconds()) <= tolerance_minutes * 60
+
+
+def compare(parsed, reference, tolerance_minutes):
+    """Structural and time agreement between parser and LLM output"""
+    try:
+        parsed_posts = parsed["data"]
+        reference_posts = reference["data"]
+    except (KeyError, TypeError):
+        return False, 0, 0
+
+    structure = [outline(p) for p in parsed_posts] == \
+        [outline(p) for p in reference_posts]
+
+    parsed_times = [t for p in parsed_posts for t in comment_times(p)]
+    reference_times = [t for p in reference_posts for t in comment_times(p)]
+    matching = sum(
+        same_time(a, b, tolerance_minutes)
+        for a, b in zip(parsed_times, reference_times)
+    )
+    return structure, matching, max(len(parsed_times), len(reference_times))
+
+
+def load_rows(args):
+    """Posts with a stored LLM conversion, from fixtures or Supabase"""
+    if args.fixtures:
+        with open(args.fixtures, 'r', encoding='utf-8') as file:
+            return [
+                {**row, 'processed_post_json': row['expected']}
+                for row in json.load(file)
+            ]
+
+    load_dotenv()
+    supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_KEY'))
+
+    def filters(query):
+        query = query.not_.is_('processed_post_json', 'null')
+        if args.id_range:
+            query = query.gte('id', args.id_range[0]).lte('id', args.id_range[1])
+        return query
+
+    return iter_rows(supabase, 'fb_group_posts',
+                     'id, raw_post, created_at, processed_post_json', filters)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare the local post parser with stored LLM conversions')
+    parser.add_argument('--id-range', nargs=2, type=int, metavar=('FROM', 'TO'),
+                        help='Only compare posts within this ID range')
+    parser.add_argument('--fixtures',
+                        help='Use a raw-post fixture file instead of Supabase')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_MIN_CONFIDENCE,
+                        help=f'Confidence needed to skip the LLM '
+                             f'(default: {DEFAULT_MIN_CONFIDENCE})')
+    parser.add_argument('--time-tolerance', type=float, default=60,
+                        help='Minutes two resolved times may differ by (default: 60)')
+    parser.add_argument('--show', type=int, default=20,
+                        help='Disagreeing confident posts to list (default: 20)')
+    args = parser.parse_args()
+
+    rows = load_rows(args)
+
+    timings = []
+    confident = []
+    structure_matches = 0
+    time_matches = 0
+    time_total = 0
+    disagreements = []
+
+    for row in rows:
+        if not row.get('raw_post') or not row.get('processed_post_json'):
+            continue
+
+        start = time.perf_counter()
+        result = parse_post(row['raw_post'], row['created_at'])
+        timings.append(time.perf_counter() - start)
+
+        if result.confidence < args.threshold:
+            continue
+        confident.append(row['id'])
+
+        structure, matching, total = compare(
+            result.data, row['processed_post_json'], args.time_tolerance)
+        structure_matches += structure
+        time_matches += matching
+        time_total += total
+        if not structure:
+            disagreements.append(row['id'])
+
+    if not timings:
+        print("No posts with both raw text and a stored conversion")
+        return
+
+    print(f"\nCompared {len(timings)} posts")
+    print(f"\nParser speed: median {statistics.median(timings) * 1e6:.0f} µs/post, "
+          f"max {max(timings) * 1e6:.0f} µs")
+    print(f"Confident (>= {args.threshold}): {len(confident)} of {len(timings)} "
+          f"({100 * len(confident) / len(timings):.1f}%)")
+    if confident:
+        print(f"Structure agreement on confident posts: {structure_matches}/"
+              f"{len(confident)} ({100 * structure_matches / len(confident):.1f}%)")
+    if time_total:
+        print(f"Comment times within {args.time_tolerance:.0f} min: {time_matches}/"
+              f"{time_total} ({100 * time_matches / time_total:.1f}%)")
+    if disagreements:
+        shown = ', '.join(map(str, sorted(disagreements)[:args.show]))
+        print(f"\nConfident posts that disagree with the LLM - IDs: {shown}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 # scripts/process_documents.py
 from pinecone import Pinecone
 from src.processor.uploader import PineconeUploader
-from src.processor.embedder import Embedder
+from src.processor.embedder import Embedder, EmbeddingBatch
 from src.processor.chunker import DocumentChunker
 import asyncio
 import os
@@ -70,18 +70,16 @@ class DocumentProcessor:
             # Step 2: Create embeddings
             logger.info("Creating embeddings...")
             chunk_texts = [chunk.text for chunk in chunks]
-            embeddings = await self.embedder.embed_texts(chunk_texts)
+            token_counts = [chunk.metadata["token_count"] for chunk in chunks]
+            embeddings = await self.embedder.embed_texts(chunk_texts, token_counts)
             logger.info(f"Created {len(embeddings)} embeddings")
 
             # Step 3: Prepare vectors for Pinecone
-            vectors = [
-                {
-                    "id": f"{chunk.doc_id}_{chunk.chunk_index}",
-                    "values": embedding,
-                    "metadata": chunk.metadata
-                }
-                for chunk, embedding in zip(chunks, embeddings)
-            ]
+            vectors = EmbeddingBatch(
+                ids=[f"{chunk.doc_id}_{chunk.chunk_index}" for chunk in chunks],
+                vectors=embeddings,
+                metadata=[chunk.metadata for chunk in chunks]
+            )
 
             # Step 4: Upload to Pinecone
             logger.info("Uploading to Pinecone...")
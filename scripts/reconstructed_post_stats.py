@@ -1,34 +1,69 @@
+import itertools
 import os
+import sys
+from pathlib import Path
 from supabase import create_client
 import statistics
 import argparse
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.database.client import iter_rows  # noqa: E402
+
+# Computed column from src/database/migrations/001_post_analytics.sql
+LENGTH_COLUMN = 'reconstructed_length'
+
 # Initialize Supabase client
 url = os.getenv('SUPABASE_URL')
 key = os.getenv('SUPABASE_KEY')
 supabase = create_client(url, key)
 
 
-def process_posts(single_id=None, id_range=None, visualize=False):
-    # Prepare query based on input type
-    query = supabase.table('fb_group_posts').select('id,reconstructed_post')
+def measure_client_side(filters):
+    """Download post bodies and measure them here"""
+    for record in iter_rows(supabase, 'fb_group_posts',
+                            'id,reconstructed_post', filters):
+        post = record['reconstructed_post']
+        yield {'id': record['id'], LENGTH_COLUMN: len(post) if post else None}
+
 
-    if single_id is not None:
-        query = query.eq('id', single_id)
-    elif id_range is not None:
-        from_id, to_id = id_range
-        query = query.gte('id', from_id).lte('id', to_id)
+def fetch_lengths(filters):
+    """(id, length) rows, measured by Postgres when the migration is applied.
 
-    response = query.execute()
+    Only an integer per post crosses the wire, so the payload no longer
+    grows with the post text. A missing computed column fails on the first
+    page, in which case the bodies are downloaded instead.
+    """
+    rows = iter_rows(supabase, 'fb_group_posts', f'id,{LENGTH_COLUMN}', filters)
+    try:
+        first = next(rows, None)
+    except Exception as e:
+        print(f"Computed column {LENGTH_COLUMN} unavailable ({str(e)}), "
+              f"measuring posts client-side")
+        return measure_client_side(filters)
+    return itertools.chain([first], rows) if first else iter(())
+
+
+def process_posts(single_id=None, id_range=None, visualize=False):
+    # Constrain the query based on input type
+    def filters(query):
+        if single_id is not None:
+            return query.eq('id', single_id)
+        if id_range is not None:
+            from_id, to_id = id_range
+            return query.gte('id', from_id).lte('id', to_id)
+        return query
 
     # Track skipped IDs
     skipped_ids = []
     lengths = []
-    for record in response.data:
-        if record['reconstructed_post']:
-            lengths.append(len(record['reconstructed_post']))
+    for record in fetch_lengths(filters):
+        if record[LENGTH_COLUMN]:
+            lengths.append(record[LENGTH_COLUMN])
         else:
             skipped_ids.append(record['id'])
 
@@ -6,6 +6,7 @@ ESTIMATED_OUTPUT_TOKENS = 900  # Estimated output tokens for JSON format
 # GPT-4 Turbo pricing per 1M tokens
 INPUT_PRICE_PER_1M = 10.00   # $10.00 per 1M input tokens
 OUTPUT_PRICE_PER_1M = 30.00  # $30.00 per 1M output tokens
+BATCH_API_DISCOUNT = 0.50    # Batch API requests are billed at half price
 
 
 def estimate_costs(num_posts):
@@ -30,6 +31,7 @@ def estimate_costs(num_posts):
     print(f"Output Cost: ${output_cost:.2f}")
     print(f"Total Cost: ${total_cost:.2f}")
     print(f"Average Cost per Post: ${avg_cost:.4f}")
+    print(f"Total Cost via Batch API: ${total_cost * BATCH_API_DISCOUNT:.2f}")
 
 
 if __name__ == "__main__":
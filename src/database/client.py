@@ -0,0 +1,232 @@
+# src/database/client.py
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# PostgREST caps responses at 1,000 rows by default
+DEFAULT_PAGE_SIZE = 1000
+
+# Adds .eq()/.gte()/... constraints to a Supabase select query
+QueryFilter = Callable[[Any], Any]
+
+# Adds the hash columns and stale-post functions incremental runs rely on
+CONTENT_HASH_MIGRATION = 'src/database/migrations/002_content_hashes.sql'
+
+
+class MissingMigrationError(RuntimeError):
+    """Raised when the database lacks a schema change the pipeline needs"""
+
+
+def require_content_hashes(supabase, table: str = 'fb_group_posts') -> None:
+    """Raise MissingMigrationError unless migration 002 has been applied.
+
+    One select touches every column and function the migration adds, so
+    a database without it fails up front with the file to apply, instead
+    of with a raw PostgREST error partway through a run.
+    """
+    try:
+        supabase.table(table) \
+            .select('id, raw_post_hash, processed_json_hash, '
+                    'reconstructed_hash, chunk_hashes') \
+            .is_('raw_post_stale', 'true') \
+            .is_('reconstructed_stale', 'true') \
+            .limit(1) \
+            .execute()
+    except Exception as e:
+        raise MissingMigrationError(
+            f"Cannot read the content hash columns of {table} ({str(e)}). "
+            f"Apply {CONTENT_HASH_MIGRATION} before running the pipeline."
+        ) from e
+
+
+def fetch_page(
+    supabase,
+    table: str,
+    columns: str,
+    filters: Optional[QueryFilter] = None,
+    after: Optional[int] = None,
+    page_size: int = DEFAULT_PAGE_SIZE
+) -> List[Dict]:
+    """Fetch the page of rows that follows id `after`, in id order.
+
+    Keyset pagination keeps every page an index range scan on the
+    primary key, however deep into the table it is.
+    """
+    query = supabase.table(table).select(columns)
+    if filters is not None:
+        query = filters(query)
+    if after is not None:
+        query = query.gt('id', after)
+    return query.order('id', desc=False).limit(page_size).execute().data
+
+
+def _last_id(page: List[Dict]) -> int:
+    try:
+        return page[-1]['id']
+    except KeyError:
+        raise ValueError("Paginated selects must include the id column") from None
+
+
+async def stream_rows(
+    supabase,
+    table: str,
+    columns: str,
+    filters: Optional[QueryFilter] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    start_after: Optional[int] = None
+) -> AsyncIterator[Dict]:
+    """Yield every matching row, one keyset page at a time.
+
+    The next page is fetched in a worker thread while the caller works
+    through the current one, so at most two pages are held in memory.
+    Paging stops at the first empty page rather than the first short one,
+    because PostgREST's max-rows setting may silently shorten pages.
+    """
+    def fetch(after):
+        return asyncio.ensure_future(asyncio.to_thread(
+            fetch_page, supabase, table, columns, filters, after, page_size))
+
+    next_page = fetch(start_after)
+    try:
+        while True:
+            page = await next_page
+            if not page:
+                return
+            next_page = fetch(_last_id(page))
+            for row in page:
+                yield row
+    finally:
+        if not next_page.done():
+            next_page.cancel()
+
+
+def iter_rows(
+    supabase,
+    table: str,
+    columns: str,
+    filters: Optional[QueryFilter] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    start_after: Optional[int] = None
+) -> Iterator[Dict]:
+    """Synchronous stream_rows for callers without an event loop"""
+    with ThreadPoolExecutor(max_workers=1,
+                            thread_name_prefix="supabase-page") as executor:
+        def fetch(after):
+            return executor.submit(
+                fetch_page, supabase, table, columns, filters, after, page_size)
+
+        next_page = fetch(start_after)
+        try:
+            while True:
+                page = next_page.result()
+                if not page:
+                    return
+                next_page = fetch(_last_id(page))
+                yield from page
+        finally:
+            next_page.cancel()
+
+
+class BulkWriter:
+    """Buffers row updates and writes them as bulk upserts keyed by id.
+
+    Rows are flushed once `batch_size` are buffered or `flush_interval`
+    seconds have passed since the last flush, whichever comes first, and
+    on close(). Each batch is retried on its own. Rows of batches that
+    still fail are reported in `failed_ids` instead of stopping the run.
+    The writer is thread-safe, so async callers can add rows from
+    worker threads.
+    """
+
+    def __init__(
+        self,
+        supabase,
+        table: str,
+        batch_size: int = 500,
+        flush_interval: float = 5.0,
+        max_retries: int = 3,
+        on_conflict: str = 'id'
+    ):
+        self.supabase = supabase
+        self.table = table
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.on_conflict = on_conflict
+
+        self.written = 0
+        self.requests = 0
+        self.failed_ids: List = []
+        self._buffer: List[Dict] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, row: Dict) -> None:
+        """Buffer one row, flushing if a size or time threshold is reached"""
+        if 'id' not in row:
+            raise ValueError("BulkWriter rows must include an id")
+        with self._lock:
+            self._buffer.append(row)
+            due = (len(self._buffer) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+            batch = self._take() if due else None
+        if batch:
+            self._write(batch)
+
+    def flush(self) -> None:
+        """Write everything buffered so far"""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._write(batch)
+
+    def _take(self) -> List[Dict]:
+        batch = self._buffer
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        return batch
+
+    def _write(self, batch: List[Dict]) -> None:
+        """Upsert one batch, retrying it as a whole before giving up"""
+        for start in range(0, len(batch), self.batch_size):
+            page = batch[start:start + self.batch_size]
+            ids = [row['id'] for row in page]
+            for attempt in range(1, self.max_retries + 1):
+                with self._lock:
+                    self.requests += 1
+                try:
+                    result = self.supabase.table(self.table) \
+                        .upsert(page, on_conflict=self.on_conflict) \
+                        .execute()
+                except Exception as e:
+                    logger.warning(
+                        f"Bulk write of {len(page)} rows to {self.table} failed "
+                        f"(attempt {attempt}/{self.max_retries}): {str(e)}")
+                    if attempt < self.max_retries:
+                        time.sleep(min(10, 2 ** attempt))
+                    continue
+
+                confirmed = {row.get('id') for row in result.data or []}
+                missing = [row_id for row_id in ids if row_id not in confirmed]
+                with self._lock:
+                    self.written += len(ids) - len(missing)
+                    self.failed_ids.extend(missing)
+                logger.info(f"Wrote {len(ids) - len(missing)} rows to {self.table}")
+                break
+            else:
+                with self._lock:
+                    self.failed_ids.extend(ids)
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "BulkWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
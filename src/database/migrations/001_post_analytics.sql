@@ -0,0 +1,59 @@
+-- Computed columns for the stats scripts.
+--
+-- PostgREST exposes a function that takes a table row as a virtual
+-- column, so `select=id,reconstructed_length` returns one integer per post
+-- instead of the whole post body. Run this once in the Supabase SQL editor.
+-- The scripts fall back to client-side aggregation when it is missing.
+
+-- Characters in reconstructed_post, NULL when there is no post
+create or replace function reconstructed_length(fb_group_posts)
+returns integer
+language sql
+stable
+as $$
+    select char_length($1.reconstructed_post)
+$$;
+
+-- Post author and every comment/reply author of processed_post_json.
+--
+-- status is one of 'ok', 'null_json', 'invalid_json', 'missing_data' or
+-- 'empty_data', mirroring the skip reasons of post_engagement_stats.py.
+-- Older rows hold the JSON as a string, which is parsed first.
+create or replace function post_engagement(fb_group_posts)
+returns jsonb
+language plpgsql
+stable
+as $$
+declare
+    post_json jsonb := $1.processed_post_json;
+begin
+    if post_json is null or post_json = 'null'::jsonb then
+        return jsonb_build_object('status', 'null_json');
+    end if;
+
+    if jsonb_typeof(post_json) = 'string' then
+        begin
+            post_json := (post_json #>> '{}')::jsonb;
+        exception when others then
+            return jsonb_build_object('status', 'invalid_json');
+        end;
+    end if;
+
+    if jsonb_typeof(post_json) <> 'object' or not post_json ? 'data' then
+        return jsonb_build_object('status', 'missing_data');
+    end if;
+
+    if jsonb_typeof(post_json -> 'data') <> 'array'
+            or jsonb_array_length(post_json -> 'data') = 0 then
+        return jsonb_build_object('status', 'empty_data');
+    end if;
+
+    -- strict mode stops .** from visiting unwrapped arrays twice
+    return jsonb_build_object(
+        'status', 'ok',
+        'author', coalesce(post_json #>> '{data,0,author}', ''),
+        'comment_authors', jsonb_path_query_array(
+            post_json, 'strict $.data[0].comments.**.author', '{}', true)
+    );
+end;
+$$;
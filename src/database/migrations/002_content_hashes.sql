@@ -0,0 +1,46 @@
+-- Content hashes for incremental pipeline runs.
+--
+-- Each stage records a hash of the input it last processed, and skips
+-- posts whose input hash is unchanged:
+--   raw_post_hash       raw_post behind processed_post_json (raw_data_to_json.py)
+--   processed_json_hash processed_post_json behind reconstructed_post (json_to_text.py)
+--   reconstructed_hash  reconstructed_post behind the vectors (text_to_embeddings.py)
+--   chunk_hashes        {vector id: chunk text hash} of the uploaded chunks
+--
+-- Text hashes are the SHA-256 hex digest of the UTF-8 text, the same
+-- value src/processor/content_hash.py computes.
+
+alter table fb_group_posts
+    add column if not exists raw_post_hash text,
+    add column if not exists processed_json_hash text,
+    add column if not exists reconstructed_hash text,
+    add column if not exists chunk_hashes jsonb;
+
+-- Posts converted before this migration keep their conversion
+update fb_group_posts
+set raw_post_hash = encode(sha256(convert_to(raw_post, 'UTF8')), 'hex')
+where processed_post_json is not null
+  and raw_post is not null
+  and raw_post_hash is null;
+
+-- True when processed_post_json is missing or older than raw_post.
+-- PostgREST can filter on it, so only stale posts are downloaded.
+create or replace function raw_post_stale(fb_group_posts)
+returns boolean
+language sql
+stable
+as $$
+    select $1.processed_post_json is null
+        or $1.raw_post_hash is distinct from
+           encode(sha256(convert_to($1.raw_post, 'UTF8')), 'hex')
+$$;
+
+-- True when the vectors are missing or older than reconstructed_post
+create or replace function reconstructed_stale(fb_group_posts)
+returns boolean
+language sql
+stable
+as $$
+    select $1.reconstructed_hash is distinct from
+           encode(sha256(convert_to($1.reconstructed_post, 'UTF8')), 'hex')
+$$;
@@ -0,0 +1,64 @@
+-- Adds comment_depths to the post_engagement computed column from 001.
+--
+-- comment_depths maps nesting depth (1 for comments, 2+ for replies) to
+-- the number of comments at that depth, the same counts the thread
+-- walker in src/processor/thread_walker.py reports client-side.
+
+create or replace function post_engagement(fb_group_posts)
+returns jsonb
+language plpgsql
+stable
+as $$
+declare
+    post_json jsonb := $1.processed_post_json;
+    depths jsonb;
+begin
+    if post_json is null or post_json = 'null'::jsonb then
+        return jsonb_build_object('status', 'null_json');
+    end if;
+
+    if jsonb_typeof(post_json) = 'string' then
+        begin
+            post_json := (post_json #>> '{}')::jsonb;
+        exception when others then
+            return jsonb_build_object('status', 'invalid_json');
+        end;
+    end if;
+
+    if jsonb_typeof(post_json) <> 'object' or not post_json ? 'data' then
+        return jsonb_build_object('status', 'missing_data');
+    end if;
+
+    if jsonb_typeof(post_json -> 'data') <> 'array'
+            or jsonb_array_length(post_json -> 'data') = 0 then
+        return jsonb_build_object('status', 'empty_data');
+    end if;
+
+    with recursive nodes(node, depth) as (
+        select child.value, 1
+        from jsonb_array_elements(
+            case when jsonb_typeof(post_json #> '{data,0,comments,data}') = 'array'
+                 then post_json #> '{data,0,comments,data}'
+                 else '[]'::jsonb end) as child
+        union all
+        select child.value, nodes.depth + 1
+        from nodes,
+             jsonb_array_elements(
+                 case when jsonb_typeof(nodes.node #> '{comments,data}') = 'array'
+                      then nodes.node #> '{comments,data}'
+                      else '[]'::jsonb end) as child
+    )
+    select coalesce(jsonb_object_agg(depth, comments), '{}'::jsonb)
+    into depths
+    from (select depth, count(*) as comments from nodes group by depth) as levels;
+
+    -- strict mode stops .** from visiting unwrapped arrays twice
+    return jsonb_build_object(
+        'status', 'ok',
+        'author', coalesce(post_json #>> '{data,0,author}', ''),
+        'comment_authors', jsonb_path_query_array(
+            post_json, 'strict $.data[0].comments.**.author', '{}', true),
+        'comment_depths', depths
+    );
+end;
+$$;
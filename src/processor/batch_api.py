@@ -0,0 +1,133 @@
+# src/processor/batch_api.py
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, Optional
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+@dataclass
+class BatchResponse:
+    """One line of a batch output or error file"""
+    custom_id: str
+    content: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def batch_request(
+    custom_id: str,
+    body: Dict,
+    url: str = CHAT_COMPLETIONS_URL
+) -> Dict:
+    """One request line of a Batch API input file"""
+    return {"custom_id": custom_id, "method": "POST", "url": url, "body": body}
+
+
+def write_requests(path: str, requests: Iterable[Dict]) -> int:
+    """Write request lines to a JSONL file and return how many were written"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as file:
+        for request in requests:
+            file.write(json.dumps(request, ensure_ascii=False))
+            file.write("\n")
+            count += 1
+    return count
+
+
+def submit_batch(
+    client: openai.Client,
+    path: str,
+    endpoint: str = CHAT_COMPLETIONS_URL,
+    metadata: Optional[Dict[str, str]] = None
+):
+    """Upload a request file and start a batch for it"""
+    with open(path, "rb") as file:
+        input_file = client.files.create(file=file, purpose="batch")
+
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=endpoint,
+        completion_window=COMPLETION_WINDOW,
+        metadata=metadata
+    )
+    logger.info(f"Submitted batch {batch.id} from {path}")
+    return batch
+
+
+def wait_for_batch(
+    client: openai.Client,
+    batch_id: str,
+    poll_interval: float = 30.0,
+    timeout: Optional[float] = None
+):
+    """Poll a batch until it reaches a terminal status and return it"""
+    started = time.monotonic()
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+
+        counts = batch.request_counts
+        if counts is not None:
+            logger.info(
+                f"Batch {batch_id} {batch.status}: "
+                f"{counts.completed}/{counts.total} done, {counts.failed} failed"
+            )
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise TimeoutError(
+                f"Batch {batch_id} still {batch.status} after {timeout:.0f}s")
+        time.sleep(poll_interval)
+
+
+def _parse_line(line: str) -> BatchResponse:
+    """Turn one output or error file line into a BatchResponse"""
+    record = json.loads(line)
+    custom_id = record.get("custom_id")
+
+    if record.get("error"):
+        error = record["error"]
+        return BatchResponse(custom_id, error=error.get("message", str(error)))
+
+    response = record.get("response") or {}
+    body = response.get("body") or {}
+    if response.get("status_code") != 200:
+        message = (body.get("error") or {}).get("message", "request failed")
+        return BatchResponse(
+            custom_id, error=f"HTTP {response.get('status_code')}: {message}")
+
+    try:
+        content = body["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        return BatchResponse(custom_id, error="Response has no message content")
+    return BatchResponse(custom_id, content=content)
+
+
+def iter_results(client: openai.Client, file_id: str) -> Iterator[BatchResponse]:
+    """Stream a batch output or error file line by line"""
+    with client.files.with_streaming_response.content(file_id) as response:
+        for line in response.iter_lines():
+            if line.strip():
+                yield _parse_line(line)
+
+
+def iter_batch_results(client: openai.Client, batch) -> Iterator[BatchResponse]:
+    """Every response of a finished batch, successful or not.
+
+    Expired and cancelled batches still return the requests that finished
+    before they stopped.
+    """
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if file_id:
+            yield from iter_results(client, file_id)
@@ -0,0 +1,308 @@
+# src/processor/bm25_index.py
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Okapi BM25 defaults
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+
+# Postings buffered since the last merge before they are folded into the
+# compact arrays
+DEFAULT_MERGE_THRESHOLD = 100_000
+
+# Initial rows allocated for per-chunk arrays; they double when full
+INITIAL_CAPACITY = 1024
+
+
+def tokenize(text: str) -> List[str]:
+    """Casefolded word tokens, so "MSFT" and "msft" match"""
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+class BM25Index:
+    """In-memory BM25 keyword index over chunk texts.
+
+    Merged postings are kept in CSR form: `offsets[term]:offsets[term + 1]`
+    slices the int32 chunk rows and float32 term frequencies of a term,
+    sorted by row. Upserts append to a small per-term buffer that is
+    folded into the arrays once it holds `merge_threshold` postings.
+    Deleted or replaced chunks are masked out right away and dropped at
+    the next merge; until then they still count towards document
+    frequencies, which only nudges the IDF.
+
+    Chunks are keyed by vector ID, as uploaded to Pinecone, and responses
+    have Pinecone's query dict shape so they can be fused with dense
+    results. Metadata filters need a `match_filter(metadata, filter)`
+    function such as local_index's matches_filter.
+    """
+
+    def __init__(
+        self,
+        k1: float = DEFAULT_K1,
+        b: float = DEFAULT_B,
+        tokenizer: Callable[[str], List[str]] = tokenize,
+        match_filter: Optional[Callable[[Dict, Dict], bool]] = None,
+        merge_threshold: int = DEFAULT_MERGE_THRESHOLD
+    ):
+        self.k1 = k1
+        self.b = b
+        self.tokenizer = tokenizer
+        self.match_filter = match_filter
+        self.merge_threshold = merge_threshold
+        self._lock = threading.RLock()
+
+        self._vocab: Dict[str, int] = {}
+        # Per-row state; rows are never reused before a merge
+        self._ids: List[str] = []
+        self._metadata: List[Dict] = []
+        self._positions: Dict[str, int] = {}
+        self._lengths = np.zeros(INITIAL_CAPACITY, dtype=np.float32)
+        self._alive = np.zeros(INITIAL_CAPACITY, dtype=bool)
+        self._live_length = 0.0
+        # Merged postings
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._rows = np.zeros(0, dtype=np.int32)
+        self._freqs = np.zeros(0, dtype=np.float32)
+        # Postings added since the last merge, by term
+        self._pending: Dict[int, Tuple[List[int], List[int]]] = {}
+        self._pending_count = 0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _reserve(self, rows: int):
+        if rows <= len(self._lengths):
+            return
+        capacity = len(self._lengths)
+        while capacity < rows:
+            capacity *= 2
+        lengths = np.zeros(capacity, dtype=np.float32)
+        lengths[:len(self._ids)] = self._lengths[:len(self._ids)]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._ids)] = self._alive[:len(self._ids)]
+        self._lengths, self._alive = lengths, alive
+
+    def _remove(self, vector_id: str) -> bool:
+        row = self._positions.pop(vector_id, None)
+        if row is None:
+            return False
+        self._alive[row] = False
+        self._live_length -= float(self._lengths[row])
+        return True
+
+    def upsert(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadata: Optional[List[Dict]] = None
+    ) -> Dict:
+        """Index chunk texts by vector ID, replacing earlier versions"""
+        metadata = metadata or [{} for _ in ids]
+        counts = [Counter(self.tokenizer(text)) for text in texts]
+        with self._lock:
+            self._reserve(len(self._ids) + len(ids))
+            for vector_id, terms, row_metadata in zip(ids, counts, metadata):
+                self._remove(vector_id)
+                row = len(self._ids)
+                self._ids.append(vector_id)
+                self._metadata.append(row_metadata)
+                self._positions[vector_id] = row
+                length = sum(terms.values())
+                self._lengths[row] = length
+                self._alive[row] = True
+                self._live_length += length
+                for term, freq in terms.items():
+                    term_id = self._vocab.setdefault(term, len(self._vocab))
+                    rows, freqs = self._pending.setdefault(term_id, ([], []))
+                    rows.append(row)
+                    freqs.append(freq)
+                self._pending_count += len(terms)
+            if self._pending_count >= self.merge_threshold:
+                self.merge()
+        return {'upserted_count': len(ids)}
+
+    def upsert_chunks(self, chunks) -> Dict:
+        """Index DocumentChunker chunks under their vector IDs"""
+        return self.upsert(
+            [f"{chunk.doc_id}-{chunk.chunk_index}" for chunk in chunks],
+            [chunk.text for chunk in chunks],
+            [{**chunk.metadata, 'text': chunk.text} for chunk in chunks]
+        )
+
+    def delete(self, ids: List[str]) -> Dict:
+        """Remove chunks by vector ID; unknown IDs are ignored"""
+        with self._lock:
+            deleted = sum(self._remove(vector_id) for vector_id in ids)
+            dead = len(self._ids) - len(self._positions)
+            if dead > max(len(self._positions), self.merge_threshold):
+                self.merge()
+        return {'deleted_count': deleted}
+
+    def merge(self):
+        """Fold buffered postings into the arrays and drop deleted rows"""
+        with self._lock:
+            count = len(self._ids)
+            terms = np.repeat(np.arange(len(self._offsets) - 1), np.diff(self._offsets))
+            rows = [self._rows]
+            freqs = [self._freqs]
+            pending_terms = []
+            for term_id, (term_rows, term_freqs) in self._pending.items():
+                pending_terms.append(np.full(len(term_rows), term_id))
+                rows.append(np.array(term_rows, dtype=np.int32))
+                freqs.append(np.array(term_freqs, dtype=np.float32))
+            terms = np.concatenate([terms, *pending_terms]).astype(np.int64)
+            rows = np.concatenate(rows)
+            freqs = np.concatenate(freqs)
+
+            # Renumber live rows densely and drop postings of dead ones
+            alive = self._alive[:count]
+            keep = alive[rows]
+            renumbered = np.cumsum(alive) - 1
+            terms, rows, freqs = terms[keep], renumbered[rows[keep]], freqs[keep]
+            order = np.lexsort((rows, terms))
+
+            self._rows = rows[order].astype(np.int32)
+            self._freqs = freqs[order]
+            self._offsets = np.zeros(len(self._vocab) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(terms, minlength=len(self._vocab)),
+                      out=self._offsets[1:])
+
+            live = np.flatnonzero(alive)
+            self._ids = [self._ids[row] for row in live]
+            self._metadata = [self._metadata[row] for row in live]
+            self._positions = {vector_id: row for row, vector_id in enumerate(self._ids)}
+            lengths = self._lengths[live]
+            self._lengths = np.zeros(max(INITIAL_CAPACITY, len(live)), dtype=np.float32)
+            self._lengths[:len(live)] = lengths
+            self._alive = np.zeros(len(self._lengths), dtype=bool)
+            self._alive[:len(live)] = True
+            self._live_length = float(lengths.sum())
+            self._pending.clear()
+            self._pending_count = 0
+
+    def _postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and frequencies of a term, merged and buffered"""
+        rows = freqs = None
+        if term_id < len(self._offsets) - 1:
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            rows, freqs = self._rows[start:end], self._freqs[start:end]
+        pending = self._pending.get(term_id)
+        if pending is None:
+            if rows is None:
+                return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+            return rows, freqs
+        pending_rows = np.array(pending[0], dtype=np.int32)
+        pending_freqs = np.array(pending[1], dtype=np.float32)
+        if rows is None:
+            return pending_rows, pending_freqs
+        return np.concatenate([rows, pending_rows]), np.concatenate([freqs, pending_freqs])
+
+    def scores(self, text: str) -> np.ndarray:
+        """BM25 score of every row for a query; deleted rows score 0"""
+        with self._lock:
+            count = len(self._ids)
+            scores = np.zeros(count, dtype=np.float32)
+            live = len(self._positions)
+            if not live:
+                return scores
+            average_length = self._live_length / live or 1.0
+            for term in dict.fromkeys(self.tokenizer(text)):
+                term_id = self._vocab.get(term)
+                if term_id is None:
+                    continue
+                rows, freqs = self._postings(term_id)
+                if not len(rows):
+                    continue
+                frequency = len(rows)
+                idf = math.log(1 + (live - frequency + 0.5) / (frequency + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[rows] / average_length)
+                # A term has at most one posting per row
+                scores[rows] += idf * freqs * (self.k1 + 1) / (freqs + norm)
+            scores[~self._alive[:count]] = 0
+            return scores
+
+    def query(
+        self,
+        text: str,
+        top_k: int = 10,
+        filter: Optional[Dict] = None,
+        include_metadata: bool = False
+    ) -> Dict:
+        """The `top_k` best-scoring chunks for a keyword query"""
+        if filter and self.match_filter is None:
+            raise ValueError("Filtering a BM25Index needs a match_filter function")
+        with self._lock:
+            scores = self.scores(text)
+            candidates = np.flatnonzero(scores > 0)
+            if not filter and len(candidates) > top_k:
+                candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+            candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+            matches = []
+            for row in candidates:
+                if len(matches) == top_k:
+                    break
+                metadata = self._metadata[row]
+                if filter and not self.match_filter(metadata, filter):
+                    continue
+                match = {'id': self._ids[row], 'score': float(scores[row])}
+                if include_metadata:
+                    match['metadata'] = metadata
+                matches.append(match)
+        return {'matches': matches, 'namespace': ''}
+
+    def save(self, path: str):
+        """Write the merged index to an .npz file, replacing it atomically"""
+        with self._lock:
+            self.merge()
+            terms = sorted(self._vocab, key=self._vocab.get)
+            partial = f"{path}.partial"
+            with open(partial, 'wb') as file:
+                self._write(file, terms)
+            os.replace(partial, path)
+
+    def _write(self, file, terms: List[str]):
+        np.savez(
+            file,
+            offsets=self._offsets,
+            rows=self._rows,
+            freqs=self._freqs,
+            lengths=self._lengths[:len(self._ids)],
+            terms=np.array(terms, dtype=str),
+            ids=np.array(self._ids, dtype=str),
+            metadata=np.array(json.dumps(self._metadata)),
+            params=np.array([self.k1, self.b])
+        )
+
+    @classmethod
+    def load(cls, path: str, **options) -> "BM25Index":
+        """Read an index written by `save`"""
+        with np.load(path, allow_pickle=False) as data:
+            k1, b = data['params']
+            index = cls(k1=float(k1), b=float(b), **options)
+            index._offsets = data['offsets']
+            index._rows = data['rows']
+            index._freqs = data['freqs']
+            index._vocab = {str(term): i for i, term in enumerate(data['terms'])}
+            index._ids = [str(vector_id) for vector_id in data['ids']]
+            index._metadata = json.loads(str(data['metadata']))
+            lengths = data['lengths']
+        index._positions = {vector_id: row for row, vector_id in enumerate(index._ids)}
+        index._reserve(len(lengths))
+        index._lengths[:len(lengths)] = lengths
+        index._alive[:len(lengths)] = True
+        index._live_length = float(lengths.sum())
+        logger.info(f"Loaded BM25 index with {len(index)} chunks from {path}")
+        return index
@@ -0,0 +1,109 @@
+# src/processor/chunk_store.py
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_STORE_PATH = ".cache/chunks.sqlite"
+
+# Stay well below SQLite's bound-parameter limit
+_PAGE_SIZE = 500
+
+
+class ChunkStore:
+    """On-disk chunk texts keyed by vector ID.
+
+    Lets Pinecone metadata carry only the small fields: text_to_embeddings
+    writes each uploaded chunk's text here, and retrieval hydrates the
+    matches it returns with one lookup. Supabase stays the system of
+    record; a lost store is rebuilt from the reconstructed posts by
+    re-running text_to_embeddings with --force.
+    """
+
+    def __init__(self, path: str = DEFAULT_CHUNK_STORE_PATH):
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Retrieval reads from worker threads; the lock serializes access
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                vector_id TEXT PRIMARY KEY,
+                text TEXT NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        self.conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def put_many(self, ids: List[str], texts: List[str]) -> None:
+        """Store chunk texts, replacing earlier versions"""
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO chunks (vector_id, text) VALUES (?, ?)",
+                zip(ids, texts)
+            )
+            self.conn.commit()
+
+    def get_many(self, ids: List[str]) -> Dict[str, str]:
+        """Texts by vector ID; unknown IDs are left out"""
+        found = {}
+        unique = list(dict.fromkeys(ids))
+        with self._lock:
+            for i in range(0, len(unique), _PAGE_SIZE):
+                page = unique[i:i + _PAGE_SIZE]
+                placeholders = ",".join("?" * len(page))
+                found.update(self.conn.execute(
+                    f"SELECT vector_id, text FROM chunks "
+                    f"WHERE vector_id IN ({placeholders})",
+                    page
+                ))
+        return found
+
+    def delete_many(self, ids: List[str]) -> None:
+        """Remove chunk texts; unknown IDs are ignored"""
+        with self._lock:
+            self.conn.executemany(
+                "DELETE FROM chunks WHERE vector_id = ?",
+                [(vector_id,) for vector_id in ids]
+            )
+            self.conn.commit()
+
+    def hydrate(self, matches: List[Dict]) -> List[Dict]:
+        """Copies of query matches with `text` filled into their metadata.
+
+        Matches that already carry text are returned as is; the rest are
+        looked up together.
+        """
+        missing = [match['id'] for match in matches
+                   if 'text' not in (match.get('metadata') or {})]
+        if not missing:
+            return list(matches)
+
+        texts = self.get_many(missing)
+        if len(texts) < len(set(missing)):
+            logger.warning(f"No stored text for {len(set(missing)) - len(texts)} "
+                           f"chunks; re-run text_to_embeddings with --force")
+        hydrated = []
+        for match in matches:
+            text = texts.get(match['id'])
+            if text is not None:
+                match = {**match, 'metadata': {**(match.get('metadata') or {}),
+                                               'text': text}}
+            hydrated.append(match)
+        return hydrated
+
+    def close(self) -> None:
+        self.conn.close()
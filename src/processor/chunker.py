@@ -1,10 +1,24 @@
 # src/processor/chunker.py
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
 import uuid
 from datetime import datetime
 import tiktoken
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+DEFAULT_TOKENIZER_MODEL = "gpt-3.5-turbo"
+
+# Split points in order of preference, matching the langchain splitter
+SEPARATORS = ["\n\n", "\n", ". ", " "]
+
+ENGINES = ("native", "langchain")
+
+
+@lru_cache(maxsize=None)
+def get_encoder(model: str = DEFAULT_TOKENIZER_MODEL) -> tiktoken.Encoding:
+    """Return the shared tiktoken encoding for a model, loading it only once"""
+    return tiktoken.encoding_for_model(model)
 
 
 @dataclass
@@ -15,23 +29,176 @@ class Chunk:
     doc_id: str
 
 
+class TokenWindowSplitter:
+    """Token-bounded splitter that encodes each document exactly once.
+
+    Token start offsets are mapped back to the text so separator boundaries
+    can be looked up by token position. Each chunk takes the furthest
+    boundary of the most preferred separator that still fits in
+    ``chunk_size`` tokens, and the next chunk starts at the earliest
+    boundary inside the trailing ``chunk_overlap`` tokens.
+    """
+
+    def __init__(
+        self,
+        encoding: tiktoken.Encoding,
+        chunk_size: int = 500,
+        chunk_overlap: int = 50,
+        separators: Optional[List[str]] = None,
+    ):
+        if chunk_overlap >= chunk_size:
+            raise ValueError(
+                f"chunk_overlap ({chunk_overlap}) must be smaller than "
+                f"chunk_size ({chunk_size})"
+            )
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators or SEPARATORS
+
+    def _find_boundaries(
+        self,
+        text: str,
+        offsets: List[int]
+    ) -> Tuple[List[List[int]], List[int]]:
+        """Collect token positions that start or follow a separator"""
+        by_rank: List[List[int]] = [[] for _ in self.separators]
+        any_rank: List[int] = []
+
+        for position in range(1, len(offsets)):
+            char_offset = offsets[position]
+            for rank, separator in enumerate(self.separators):
+                if (text.startswith(separator, char_offset)
+                        or text.endswith(separator, 0, char_offset)):
+                    by_rank[rank].append(position)
+                    any_rank.append(position)
+                    break
+
+        return by_rank, any_rank
+
+    def split_with_counts(self, text: str) -> List[Tuple[str, int]]:
+        """Split text into (chunk, token_count) pairs in a single pass"""
+        tokens = self.encoding.encode(text)
+        if not tokens:
+            return []
+
+        text, offsets = self.encoding.decode_with_offsets(tokens)
+        total = len(tokens)
+        by_rank, any_rank = self._find_boundaries(text, offsets)
+
+        def char_offset(position: int) -> int:
+            return offsets[position] if position < total else len(text)
+
+        def is_blank(position: int) -> bool:
+            return not text[char_offset(position):char_offset(position + 1)].strip()
+
+        chunks = []
+        start = 0
+        while start < total:
+            end = min(start + self.chunk_size, total)
+            if end < total:
+                for positions in by_rank:
+                    i = bisect_right(positions, end) - 1
+                    if i >= 0 and positions[i] > start:
+                        end = positions[i]
+                        break
+
+            # Whitespace-only tokens at either edge are stripped from the
+            # chunk, so they are left out of its token count too
+            first, last = start, end
+            while first < last and is_blank(first):
+                first += 1
+            while last > first and is_blank(last - 1):
+                last -= 1
+            if first < last:
+                chunk = text[char_offset(first):char_offset(last)].strip()
+                chunks.append((chunk, last - first))
+
+            if end >= total:
+                break
+
+            next_start = end
+            if self.chunk_overlap > 0:
+                lowest = max(end - self.chunk_overlap, start + 1)
+                i = bisect_left(any_rank, lowest)
+                if i < len(any_rank) and any_rank[i] < end:
+                    next_start = any_rank[i]
+            start = next_start
+
+        return chunks
+
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunks"""
+        return [chunk for chunk, _ in self.split_with_counts(text)]
+
+
 class DocumentChunker:
     def __init__(
         self,
         chunk_size: int = 500,
         chunk_overlap: int = 50,
+        model: str = DEFAULT_TOKENIZER_MODEL,
+        engine: str = "native",
     ):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=self.token_count,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
+        if engine not in ENGINES:
+            raise ValueError(
+                f"Unknown chunking engine '{engine}'. "
+                f"Supported engines are: {list(ENGINES)}"
+            )
+        self.engine = engine
+        self.encoding = get_encoder(model)
+        # Token counts computed while splitting the current document
+        self._token_counts: Dict[str, int] = {}
+
+        if engine == "native":
+            self.text_splitter = TokenWindowSplitter(
+                self.encoding,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap
+            )
+        else:
+            # Imported lazily so workers using the native engine never
+            # load langchain
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length_function=self.token_count,
+                separators=SEPARATORS + [""]
+            )
 
     def token_count(self, text: str) -> int:
         """Count tokens using tiktoken for accurate chunking"""
-        encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
-        return len(encoding.encode(text))
+        count = self._token_counts.get(text)
+        if count is None:
+            count = len(self.encoding.encode(text))
+            self._token_counts[text] = count
+        return count
+
+    def token_counts(self, texts: List[str]) -> List[int]:
+        """Count tokens for many texts, encoding only those not seen yet"""
+        missing = list({
+            text for text in texts if text not in self._token_counts
+        })
+        if missing:
+            encoded = self.encoding.encode_batch(missing)
+            for text, tokens in zip(missing, encoded):
+                self._token_counts[text] = len(tokens)
+        return [self._token_counts[text] for text in texts]
+
+    def _split_with_counts(self, text: str) -> List[Tuple[str, int]]:
+        """Split text and return each chunk with its token count"""
+        if self.engine == "native":
+            return self.text_splitter.split_with_counts(text)
+
+        # Reuse counts computed by the langchain splitter
+        self._token_counts.clear()
+        try:
+            chunks = self.text_splitter.split_text(text)
+            return list(zip(chunks, self.token_counts(chunks)))
+        finally:
+            self._token_counts.clear()
 
     def split(
         self,
@@ -51,7 +218,7 @@ class DocumentChunker:
         }
 
         # Split text into chunks
-        chunks = self.text_splitter.split_text(text)
+        chunks = self._split_with_counts(text)
 
         # Create Chunk objects
         return [
@@ -61,11 +228,11 @@ class DocumentChunker:
                     **base_metadata,
                     "chunk_index": i,
                     "chunk_size": len(chunk),
-                    "token_count": self.token_count(chunk),
+                    "token_count": count,
                     "text": chunk  # Store text in metadata for retrieval
                 },
                 chunk_index=i,
                 doc_id=doc_id
             )
-            for i, chunk in enumerate(chunks)
+            for i, (chunk, count) in enumerate(chunks)
         ]
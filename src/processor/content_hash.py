@@ -0,0 +1,38 @@
+# src/processor/content_hash.py
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest of a text's UTF-8 bytes.
+
+    Matches encode(sha256(convert_to(text, 'UTF8')), 'hex') in Postgres,
+    so stored hashes can be backfilled and compared server-side.
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def json_hash(value: Any) -> str:
+    """Hash of a JSON value that ignores key order and whitespace"""
+    if isinstance(value, str):
+        # Older rows hold the JSON as a string
+        value = json.loads(value)
+    return content_hash(json.dumps(
+        value, sort_keys=True, separators=(',', ':'), ensure_ascii=False))
+
+
+def diff_hashes(
+    previous: Optional[Dict[str, str]],
+    current: Dict[str, str]
+) -> Tuple[List[str], List[str]]:
+    """Compare two {key: hash} sets, e.g. the vector IDs of a post's chunks.
+
+    Returns the keys that are new or whose hash changed, in `current`
+    order, and the keys of `previous` that no longer exist.
+    """
+    previous = previous or {}
+    changed = [key for key, digest in current.items()
+               if previous.get(key) != digest]
+    removed = [key for key in previous if key not in current]
+    return changed, removed
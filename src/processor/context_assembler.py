@@ -0,0 +1,235 @@
+# src/processor/context_assembler.py
+import asyncio
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.processor.embedder import estimate_tokens
+
+DEFAULT_TOKEN_BUDGET = 3000
+
+# Chunks fetched on each side of a hit
+DEFAULT_NEIGHBOURS = 1
+
+# Longest shared text looked for between consecutive chunks; the chunker
+# overlaps 50 tokens, which stays well under this
+MAX_OVERLAP_CHARS = 2000
+
+# Leading characters of a chunk searched for in its predecessor's tail
+_PROBE_CHARS = 16
+
+BLOCK_SEPARATOR = "\n\n---\n\n"
+
+
+def overlap_length(previous: str, following: str,
+                   max_chars: int = MAX_OVERLAP_CHARS) -> int:
+    """Length of the longest tail of `previous` that starts `following`.
+
+    Shorter overlaps than the probe are ignored, as a few shared
+    characters are more likely chance than chunker overlap.
+    """
+    window_start = max(0, len(previous) - min(max_chars, len(following)))
+    probe = following[:_PROBE_CHARS]
+    if not probe:
+        return 0
+    position = previous.find(probe, window_start)
+    while position != -1:
+        # The first match is the longest overlap
+        length = len(previous) - position
+        if following.startswith(previous[position:]):
+            return length
+        position = previous.find(probe, position + 1)
+    return 0
+
+
+def _vector_id(doc_id: str, chunk_index: int) -> str:
+    return f"{doc_id}-{chunk_index}"
+
+
+def _metadata(vector) -> Dict:
+    if isinstance(vector, dict):
+        return vector.get('metadata') or {}
+    return vector.metadata or {}
+
+
+@dataclass
+class _Chunk:
+    index: int
+    text: str
+    token_count: int
+    score: Optional[float] = None
+
+
+@dataclass
+class ContextBlock:
+    """A run of consecutive chunks from one post, merged into one text"""
+    doc_id: str
+    chunk_indexes: List[int]
+    text: str
+    token_count: int
+    score: float
+    metadata: Dict = field(default_factory=dict)
+
+
+class ContextAssembler:
+    """Turns chunk hits into merged, budgeted context for a prompt.
+
+    Hits (match dicts with `doc_id`, `chunk_index` and `text` metadata, as
+    uploaded by text_to_embeddings) are grouped by post. Up to
+    `neighbours` chunks on each side of every hit are fetched from
+    `index` in a single `fetch` by ID, and each run of consecutive chunks
+    becomes one block with the chunker's overlap trimmed. Blocks are
+    taken best score first until `token_budget` is spent; a block that
+    does not fit drops its outer neighbour chunks before being skipped.
+
+    With a `chunk_store`, hits and neighbours uploaded without text get
+    it from the store in one lookup.
+    """
+
+    def __init__(
+        self,
+        index,
+        namespace: Optional[str] = None,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        neighbours: int = DEFAULT_NEIGHBOURS,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+        chunk_store=None
+    ):
+        self.index = index
+        self.namespace = namespace
+        self.token_budget = token_budget
+        self.neighbours = neighbours
+        self.count_tokens = count_tokens
+        self.chunk_store = chunk_store
+
+    def _chunk(self, metadata: Dict, score: Optional[float] = None) -> _Chunk:
+        text = metadata.get('text', '')
+        token_count = metadata.get('token_count')
+        if token_count is None:
+            token_count = self.count_tokens(text)
+        return _Chunk(int(metadata['chunk_index']), text, int(token_count), score)
+
+    def _group_hits(
+        self,
+        matches: List[Dict]
+    ) -> Tuple[Dict[str, Dict[int, _Chunk]], Dict[str, Dict]]:
+        """Hit chunks by post and chunk index, and each post's metadata"""
+        chunks: Dict[str, Dict[int, _Chunk]] = {}
+        metadata: Dict[str, Dict] = {}
+        for match in matches:
+            match_metadata = _metadata(match)
+            doc_id = str(match_metadata['doc_id'])
+            chunk = self._chunk(match_metadata, match['score'])
+            existing = chunks.setdefault(doc_id, {}).get(chunk.index)
+            if existing is None or existing.score < chunk.score:
+                chunks[doc_id][chunk.index] = chunk
+            metadata.setdefault(doc_id, {
+                key: value for key, value in match_metadata.items()
+                if key not in ('text', 'chunk_index', 'chunk_size', 'token_count')
+            })
+        return chunks, metadata
+
+    def _missing_neighbours(self, matches: List[Dict]) -> List[str]:
+        hits = set()
+        for match in matches:
+            metadata = _metadata(match)
+            hits.add((str(metadata['doc_id']), int(metadata['chunk_index'])))
+        missing = {}
+        for doc_id, index in hits:
+            for offset in range(-self.neighbours, self.neighbours + 1):
+                neighbour = index + offset
+                if neighbour >= 0 and (doc_id, neighbour) not in hits:
+                    missing[_vector_id(doc_id, neighbour)] = None
+        return list(missing)
+
+    async def _fetch(self, ids: List[str]) -> List[Dict]:
+        """{'id', 'metadata'} of the given vectors, in one index round trip"""
+        if not ids:
+            return []
+        # Pinecone's client blocks on the network
+        response = await asyncio.to_thread(
+            self.index.fetch, ids=ids, namespace=self.namespace)
+        vectors = response['vectors'] if isinstance(response, dict) else response.vectors
+        return [{'id': vector_id, 'metadata': _metadata(vector)}
+                for vector_id, vector in vectors.items()]
+
+    def _merge(self, doc_id: str, run: List[_Chunk], metadata: Dict) -> ContextBlock:
+        text = run[0].text
+        token_count = run[0].token_count
+        for chunk in run[1:]:
+            overlap = overlap_length(text, chunk.text)
+            if overlap:
+                text += chunk.text[overlap:]
+                token_count += chunk.token_count - self.count_tokens(chunk.text[:overlap])
+            else:
+                text += "\n" + chunk.text
+                token_count += chunk.token_count
+        return ContextBlock(
+            doc_id=doc_id,
+            chunk_indexes=[chunk.index for chunk in run],
+            text=text,
+            token_count=max(token_count, 0),
+            score=max(chunk.score for chunk in run if chunk.score is not None),
+            metadata=metadata
+        )
+
+    def _runs(self, by_index: Dict[int, _Chunk]) -> List[List[_Chunk]]:
+        """Consecutive chunks that include at least one hit"""
+        runs = []
+        for index in sorted(by_index):
+            if runs and runs[-1][-1].index == index - 1:
+                runs[-1].append(by_index[index])
+            else:
+                runs.append([by_index[index]])
+        return [run for run in runs if any(chunk.score is not None for chunk in run)]
+
+    def _fit(self, doc_id: str, run: List[_Chunk], metadata: Dict,
+             budget: int) -> Optional[ContextBlock]:
+        """The block for `run`, trimming neighbour chunks to fit `budget`"""
+        while True:
+            block = self._merge(doc_id, run, metadata)
+            if block.token_count <= budget:
+                return block
+            if run[-1].score is None:
+                run = run[:-1]
+            elif run[0].score is None:
+                run = run[1:]
+            else:
+                return None
+
+    async def assemble(self, matches: List[Dict]) -> List[ContextBlock]:
+        """Merged context blocks for chunk hits, best first, within the budget"""
+        neighbours = []
+        if self.neighbours > 0:
+            neighbours = await self._fetch(self._missing_neighbours(matches))
+        if self.chunk_store is not None:
+            hydrated = await asyncio.to_thread(
+                self.chunk_store.hydrate, [*matches, *neighbours])
+            matches, neighbours = hydrated[:len(matches)], hydrated[len(matches):]
+
+        chunks, metadata = self._group_hits(matches)
+        for neighbour in map(_metadata, neighbours):
+            doc_chunks = chunks.get(str(neighbour.get('doc_id')))
+            if doc_chunks is not None:
+                chunk = self._chunk(neighbour)
+                doc_chunks.setdefault(chunk.index, chunk)
+
+        runs = [
+            (max(chunk.score for chunk in run if chunk.score is not None), doc_id, run)
+            for doc_id, by_index in chunks.items()
+            for run in self._runs(by_index)
+        ]
+        runs.sort(key=lambda item: item[0], reverse=True)
+
+        blocks = []
+        remaining = self.token_budget
+        for _, doc_id, run in runs:
+            block = self._fit(doc_id, run, metadata[doc_id], remaining)
+            if block is not None:
+                blocks.append(block)
+                remaining -= block.token_count
+        return blocks
+
+
+def format_context(blocks: List[ContextBlock]) -> str:
+    """Blocks joined into one prompt context"""
+    return BLOCK_SEPARATOR.join(block.text for block in blocks)
@@ -1,8 +1,10 @@
 # src/processor/embedder.py
 import os
-from typing import List, Dict, Tuple
+import base64
+import time
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Tuple
 import openai
-from tenacity import retry, stop_after_attempt, wait_exponential
 import asyncio
 import numpy as np
 import logging
@@ -10,6 +12,243 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate for texts without a precomputed count"""
+    return len(text) // 4 + 1
+
+
+class RateLimiter:
+    """Token-bucket limiter for requests-per-minute and tokens-per-minute budgets.
+
+    A 429 from the API pauses every caller for an adaptive backoff that
+    doubles on each consecutive rate limit and halves on each success.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_backoff: float = 60.0
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_backoff = max_backoff
+
+        self._request_allowance = float(requests_per_minute)
+        self._token_allowance = float(tokens_per_minute)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._backoff = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        """Top up both budgets for the time elapsed since the last refill"""
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._request_allowance = min(
+            self.requests_per_minute,
+            self._request_allowance + elapsed * self.requests_per_minute / 60
+        )
+        self._token_allowance = min(
+            self.tokens_per_minute,
+            self._token_allowance + elapsed * self.tokens_per_minute / 60
+        )
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until one request carrying `tokens` tokens fits both budgets"""
+        # A single request can never need more than a full bucket
+        tokens = min(tokens, self.tokens_per_minute)
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._refill(now)
+                if self._request_allowance >= 1 and self._token_allowance >= tokens:
+                    self._request_allowance -= 1
+                    self._token_allowance -= tokens
+                    return
+
+                wait = max(
+                    (1 - self._request_allowance) * 60 / self.requests_per_minute,
+                    (tokens - self._token_allowance) * 60 / self.tokens_per_minute
+                )
+                await asyncio.sleep(wait)
+
+    def record_rate_limit(self, retry_after: Optional[float] = None) -> float:
+        """Pause all callers after a 429 and return the chosen delay"""
+        self._backoff = min(self.max_backoff, max(1.0, self._backoff * 2))
+        delay = max(retry_after or 0.0, self._backoff)
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    def record_success(self) -> None:
+        """Relax the adaptive backoff after a successful request"""
+        self._backoff = self._backoff / 2 if self._backoff >= 2 else 0.0
+
+
+def _pack_in_order(
+    token_counts: List[int],
+    max_tokens: int,
+    max_items: int
+) -> List[List[int]]:
+    """Greedily fill batches with text indices in their original order"""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+
+    for i, tokens in enumerate(token_counts):
+        if current and (len(current) >= max_items
+                        or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(i)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _pack_by_length(
+    token_counts: List[int],
+    max_tokens: int,
+    max_items: int
+) -> List[List[int]]:
+    """First-fit decreasing: place the longest texts first, each into the
+    first batch that still has room for it"""
+    batches: List[List[int]] = []
+    batch_tokens: List[int] = []
+
+    for i in sorted(range(len(token_counts)), key=lambda i: -token_counts[i]):
+        tokens = token_counts[i]
+        for b, batch in enumerate(batches):
+            if len(batch) < max_items and batch_tokens[b] + tokens <= max_tokens:
+                batch.append(i)
+                batch_tokens[b] += tokens
+                break
+        else:
+            batches.append([i])
+            batch_tokens.append(tokens)
+
+    return batches
+
+
+def pack_batches(
+    token_counts: List[int],
+    max_tokens: int,
+    max_items: int
+) -> List[List[int]]:
+    """Group text indices into batches bounded by tokens and item count.
+
+    Batches are packed in input order, and again longest-first; the
+    length-sorted packing is used only when it needs fewer requests.
+    A text larger than `max_tokens` on its own gets a batch to itself.
+    """
+    for i, tokens in enumerate(token_counts):
+        if tokens > max_tokens:
+            logger.warning(
+                f"Text {i} has {tokens} tokens, more than the "
+                f"{max_tokens} allowed per request"
+            )
+
+    in_order = _pack_in_order(token_counts, max_tokens, max_items)
+    if sum(token_counts) <= max_tokens:
+        # Only the item limit applies, which input order already packs tightly
+        return in_order
+
+    by_length = _pack_by_length(token_counts, max_tokens, max_items)
+    return by_length if len(by_length) < len(in_order) else in_order
+
+
+def _decode_embedding(value) -> np.ndarray:
+    """Decode a base64 float32 embedding without copying it"""
+    if isinstance(value, str):
+        return np.frombuffer(base64.b64decode(value), dtype=np.float32)
+    # Some compatible servers ignore encoding_format and send floats
+    return np.asarray(value, dtype=np.float32)
+
+
+@dataclass
+class EmbeddingBatch:
+    """Embeddings with their vector IDs and metadata.
+
+    The vectors are one contiguous (n, dimension) float32 matrix instead
+    of a Python float list per vector. They are converted to Pinecone's
+    wire format only by `to_pinecone()`, at upsert time.
+    """
+    ids: List[str]
+    vectors: np.ndarray
+    metadata: List[Dict] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.vectors = np.asarray(self.vectors, dtype=np.float32)
+        if self.vectors.ndim != 2 or self.vectors.shape[0] != len(self.ids):
+            raise ValueError(
+                f"Expected a ({len(self.ids)}, dimension) matrix, "
+                f"got shape {self.vectors.shape}"
+            )
+        if not self.metadata:
+            self.metadata = [{} for _ in self.ids]
+        elif len(self.metadata) != len(self.ids):
+            raise ValueError(
+                f"Got {len(self.metadata)} metadata entries for {len(self.ids)} vectors"
+            )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1]
+
+    def slice(self, start: int, stop: int) -> "EmbeddingBatch":
+        """Rows start..stop, sharing the underlying matrix"""
+        return EmbeddingBatch(
+            self.ids[start:stop], self.vectors[start:stop], self.metadata[start:stop])
+
+    def to_pinecone(self) -> List[Dict]:
+        """Convert to the vector dicts Pinecone's upsert expects"""
+        return [
+            {'id': vector_id, 'values': values.tolist(), 'metadata': metadata}
+            for vector_id, values, metadata in zip(self.ids, self.vectors, self.metadata)
+        ]
+
+    @classmethod
+    def from_vectors(cls, vectors: List[Dict]) -> "EmbeddingBatch":
+        """Build a batch from Pinecone-style vector dicts"""
+        return cls(
+            ids=[vector['id'] for vector in vectors],
+            vectors=np.array([vector['values'] for vector in vectors], dtype=np.float32),
+            metadata=[vector.get('metadata') or {} for vector in vectors]
+        )
+
+    @classmethod
+    def concat(cls, batches: List["EmbeddingBatch"]) -> "EmbeddingBatch":
+        """Join batches into one"""
+        return cls(
+            ids=[vector_id for batch in batches for vector_id in batch.ids],
+            vectors=np.concatenate([batch.vectors for batch in batches]),
+            metadata=[item for batch in batches for item in batch.metadata]
+        )
+
+
+def retry_after(error: openai.APIStatusError) -> Optional[float]:
+    """Seconds to wait from an API error's Retry-After header.
+
+    Returns None when the error carries no response or no parseable
+    header; pass the result to RateLimiter.record_rate_limit().
+    """
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
 class Embedder:
     SUPPORTED_DIMENSIONS = {
         # OpenAI text-embedding-3-small (default for 1536)
@@ -22,15 +261,29 @@ class Embedder:
         self,
         dimension: int,
         batch_size: int = 100,
-        max_retries: int = 3
+        max_tokens_per_request: int = 300_000,
+        max_retries: int = 3,
+        max_concurrency: int = 4,
+        requests_per_minute: int = 3000,
+        tokens_per_minute: int = 1_000_000,
+        max_rate_limit_retries: int = 10,
+        cache=None
     ):
         self.client = openai.AsyncOpenAI(
             api_key=os.getenv("OPENAI_API_KEY")
         )
         self.batch_size = batch_size
+        self.max_tokens_per_request = max_tokens_per_request
         self.max_retries = max_retries
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        # Optional EmbeddingCache consulted before any API call
+        self.cache = cache
+        self.request_count = 0
 
         # Select appropriate model based on dimension
+        self.dimension = dimension
         self.model = self._select_model(dimension)
         logger.info(f"Using embedding model: {self.model}")
 
@@ -46,45 +299,251 @@ class Embedder:
             f"Supported dimensions are: {supported_dims}"
         )
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
-    async def _create_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
-        """Create embeddings for a batch of texts with retry logic"""
-        try:
-            response = await self.client.embeddings.create(
-                model=self.model,
-                input=texts
-            )
-            return [embedding.embedding for embedding in response.data]
-        except Exception as e:
-            logger.error(f"Error creating embeddings: {str(e)}")
-            raise
-
-    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
-        """Create embeddings for texts in batches"""
-        all_embeddings = []
-        total_batches = (len(texts) + self.batch_size - 1) // self.batch_size
+    async def _create_embeddings_batch(
+        self,
+        texts: List[str],
+        token_count: int
+    ) -> np.ndarray:
+        """Create embeddings for a batch of texts with rate limiting and retries.
 
-        for i in range(0, len(texts), self.batch_size):
-            batch = texts[i:i + self.batch_size]
-            batch_num = i // self.batch_size + 1
-            logger.info(f"Processing batch {batch_num}/{total_batches}")
+        Embeddings are requested base64-encoded and decoded straight into a
+        float32 matrix, skipping the per-float JSON parsing.
+        """
+        attempts = 0
+        rate_limited = 0
 
+        while True:
+            await self.rate_limiter.acquire(token_count)
             try:
-                batch_embeddings = await self._create_embeddings_batch(batch)
-                all_embeddings.extend(batch_embeddings)
+                response = await self.client.embeddings.create(
+                    model=self.model,
+                    input=texts,
+                    encoding_format="base64"
+                )
+                self.rate_limiter.record_success()
+                self.request_count += 1
 
-                if i + self.batch_size < len(texts):
-                    await asyncio.sleep(0.1)
+                embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+                for position, item in enumerate(response.data):
+                    index = getattr(item, 'index', position)
+                    embeddings[index] = _decode_embedding(item.embedding)
+                return embeddings
+            except openai.RateLimitError as e:
+                rate_limited += 1
+                if rate_limited > self.max_rate_limit_retries:
+                    logger.error(f"Giving up after {rate_limited} rate limits: {str(e)}")
+                    raise
+                delay = self.rate_limiter.record_rate_limit(retry_after(e))
+                logger.warning(f"Rate limited, backing off for {delay:.1f}s")
             except Exception as e:
-                logger.error(f"Error processing batch {batch_num}: {str(e)}")
-                raise
+                attempts += 1
+                if attempts >= self.max_retries:
+                    logger.error(f"Error creating embeddings: {str(e)}")
+                    raise
+                logger.warning(f"Error creating embeddings, retrying: {str(e)}")
+                await asyncio.sleep(min(10, 4 * 2 ** (attempts - 1)))
+
+    async def embed_texts(
+        self,
+        texts: List[str],
+        token_counts: Optional[List[int]] = None
+    ) -> np.ndarray:
+        """Create embeddings for texts in concurrent, rate-limited batches.
+
+        Returns a (len(texts), dimension) float32 matrix. `token_counts`
+        should hold the per-text counts the chunker already computed; texts
+        without one are estimated from their length. With a cache, only
+        texts it misses are sent to the API.
+        """
+        if token_counts is None:
+            token_counts = [estimate_tokens(text) for text in texts]
+
+        if self.cache is None:
+            return await self._embed_uncached(texts, token_counts)
+
+        all_embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+
+        # Embed each distinct missing text once
+        missing: Dict[str, List[int]] = {}
+        cached = self.cache.get_many(self.model, texts)
+        for i, (text, embedding) in enumerate(zip(texts, cached)):
+            if embedding is None:
+                missing.setdefault(text, []).append(i)
+            else:
+                all_embeddings[i] = embedding
+
+        hits = len(texts) - sum(len(positions) for positions in missing.values())
+        logger.info(f"Embedding cache: {hits} hits, {len(missing)} texts to embed")
+        if missing:
+            missing_texts = list(missing)
+            missing_counts = [token_counts[missing[text][0]] for text in missing_texts]
+            embeddings = await self._embed_uncached(missing_texts, missing_counts)
+            self.cache.put_many(self.model, missing_texts, embeddings)
+
+            for text, embedding in zip(missing_texts, embeddings):
+                all_embeddings[missing[text]] = embedding
+
+        return all_embeddings
+
+    async def _embed_uncached(
+        self,
+        texts: List[str],
+        token_counts: List[int]
+    ) -> np.ndarray:
+        """Embed texts through the API, packed by `batch_size` items and
+        `max_tokens_per_request` tokens, returning them in input order"""
+        batches = pack_batches(
+            token_counts, self.max_tokens_per_request, self.batch_size)
+        total_batches = len(batches)
+        all_embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_batch(batch_num: int, indices: List[int]):
+            batch = [texts[i] for i in indices]
+            tokens = sum(token_counts[i] for i in indices)
+            async with semaphore:
+                logger.info(f"Processing batch {batch_num}/{total_batches} "
+                            f"({len(batch)} texts, {tokens} tokens)")
+                try:
+                    batch_embeddings = await self._create_embeddings_batch(batch, tokens)
+                except Exception as e:
+                    logger.error(f"Error processing batch {batch_num}: {str(e)}")
+                    raise
+            all_embeddings[indices] = batch_embeddings
+
+        await asyncio.gather(*(
+            run_batch(batch_num, indices)
+            for batch_num, indices in enumerate(batches, start=1)
+        ))
 
         return all_embeddings
 
 
+class _PendingEmbedding:
+    """One caller's texts waiting in a BatchAccumulator"""
+
+    def __init__(self, size: int, dimension: int, future: asyncio.Future):
+        self.results = np.empty((size, dimension), dtype=np.float32)
+        self.remaining = size
+        self.future = future
+
+
+class BatchAccumulator:
+    """Collects texts from many callers into full embedding batches.
+
+    Each `embed()` call waits until its texts have been embedded as part of
+    shared batches. A batch is sent as soon as `max_items` texts or
+    `max_tokens` tokens are queued, and whatever is queued is sent
+    `flush_timeout` seconds after the first of it arrived. A caller's texts
+    may be spread over several batches; each caller gets back exactly its
+    own embeddings, in the order it passed them.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        max_items: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        flush_timeout: float = 0.5,
+        max_in_flight: int = 2
+    ):
+        self.embedder = embedder
+        self.max_items = max_items or embedder.batch_size
+        self.max_tokens = max_tokens or embedder.max_tokens_per_request
+        self.flush_timeout = flush_timeout
+
+        # (caller, position, text, token count) in arrival order
+        self._queue: List[Tuple[_PendingEmbedding, int, str, int]] = []
+        self._queued_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def embed(
+        self,
+        texts: List[str],
+        token_counts: Optional[List[int]] = None
+    ) -> np.ndarray:
+        """Queue texts for the next shared batches and wait for their embeddings"""
+        if not texts:
+            return np.empty((0, self.embedder.dimension), dtype=np.float32)
+        if token_counts is None:
+            token_counts = [estimate_tokens(text) for text in texts]
+
+        loop = asyncio.get_running_loop()
+        pending = _PendingEmbedding(
+            len(texts), self.embedder.dimension, loop.create_future())
+        for position, (text, tokens) in enumerate(zip(texts, token_counts)):
+            self._queue.append((pending, position, text, tokens))
+            self._queued_tokens += tokens
+
+        while self._queue and (len(self._queue) >= self.max_items
+                               or self._queued_tokens >= self.max_tokens):
+            self._send_next_batch()
+
+        if not self._queue:
+            self._cancel_timer()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_timeout, self.flush)
+
+        return await pending.future
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _send_next_batch(self) -> None:
+        """Take up to one full batch off the queue and send it"""
+        count = 0
+        tokens = 0
+        for _, _, _, text_tokens in self._queue:
+            if count and (count >= self.max_items
+                          or tokens + text_tokens > self.max_tokens):
+                break
+            count += 1
+            tokens += text_tokens
+
+        batch = self._queue[:count]
+        del self._queue[:count]
+        self._queued_tokens -= tokens
+
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def flush(self) -> None:
+        """Send everything queued so far"""
+        self._cancel_timer()
+        while self._queue:
+            self._send_next_batch()
+
+    async def _send(self, batch: List[Tuple[_PendingEmbedding, int, str, int]]):
+        texts = [text for _, _, text, _ in batch]
+        token_counts = [tokens for _, _, _, tokens in batch]
+
+        try:
+            async with self._semaphore:
+                embeddings = await self.embedder.embed_texts(texts, token_counts)
+        except Exception as e:
+            for pending, _, _, _ in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+
+        for (pending, position, _, _), embedding in zip(batch, embeddings):
+            pending.results[position] = embedding
+            pending.remaining -= 1
+            if pending.remaining == 0 and not pending.future.done():
+                pending.future.set_result(pending.results)
+
+    async def drain(self) -> None:
+        """Flush and wait for every batch still in flight"""
+        self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+
+
 # class DocumentProcessor:
 #     def __init__(self):
 #         # Load environment variables
@@ -0,0 +1,182 @@
+# src/processor/embedding_cache.py
+import hashlib
+import logging
+import os
+import sqlite3
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = ".cache/embeddings.sqlite"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+
+
+def text_hash(text: str) -> str:
+    """Content address of a text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """On-disk embedding cache keyed by (model, sha256(text)).
+
+    Vectors are stored as packed float32 blobs in SQLite. Every lookup
+    refreshes an entry's recency, and once the stored vectors exceed
+    `max_bytes` the least recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used INTEGER NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            ) WITHOUT ROWID
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used "
+            "ON embeddings (last_used)"
+        )
+        self.conn.commit()
+
+        size, clock = self.conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0), "
+            "COALESCE(MAX(last_used), 0) FROM embeddings"
+        ).fetchone()
+        self._size = size
+        self._clock = clock
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def get_many(
+        self,
+        model: str,
+        texts: List[str]
+    ) -> List[Optional[np.ndarray]]:
+        """Look up texts, returning None for every text not in the cache"""
+        hashes = [text_hash(text) for text in texts]
+        found = {}
+
+        unique = list(dict.fromkeys(hashes))
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(unique), 500):
+            page = unique[i:i + 500]
+            placeholders = ",".join("?" * len(page))
+            rows = self.conn.execute(
+                f"SELECT text_hash, vector FROM embeddings "
+                f"WHERE model = ? AND text_hash IN ({placeholders})",
+                [model, *page]
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+
+        if found:
+            now = self._tick()
+            self.conn.executemany(
+                "UPDATE embeddings SET last_used = ? "
+                "WHERE model = ? AND text_hash = ?",
+                [(now, model, key) for key in found]
+            )
+            self.conn.commit()
+
+        results = [found.get(key) for key in hashes]
+        hits = sum(1 for result in results if result is not None)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def put_many(
+        self,
+        model: str,
+        texts: List[str],
+        vectors: np.ndarray
+    ) -> None:
+        """Store vectors for texts, then evict down to the size budget"""
+        now = self._tick()
+        rows = {}
+        for text, vector in zip(texts, vectors):
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            rows[text_hash(text)] = blob
+
+        for key, blob in rows.items():
+            previous = self.conn.execute(
+                "SELECT LENGTH(vector) FROM embeddings "
+                "WHERE model = ? AND text_hash = ?",
+                (model, key)
+            ).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO embeddings "
+                "(model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                (model, key, blob, now)
+            )
+            self._size += len(blob) - (previous[0] if previous else 0)
+
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until under max_bytes"""
+        while self._size > self.max_bytes:
+            rows = self.conn.execute(
+                "SELECT model, text_hash, LENGTH(vector) FROM embeddings "
+                "ORDER BY last_used LIMIT 256"
+            ).fetchall()
+            if not rows:
+                self._size = 0
+                break
+
+            evicted = []
+            for model, key, size in rows:
+                if self._size <= self.max_bytes:
+                    break
+                evicted.append((model, key))
+                self._size -= size
+
+            self.conn.executemany(
+                "DELETE FROM embeddings WHERE model = ? AND text_hash = ?",
+                evicted
+            )
+            logger.info(f"Evicted {len(evicted)} cached embeddings")
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "size_bytes": self._size,
+        }
+
+    def close(self) -> None:
+        self.conn.close()
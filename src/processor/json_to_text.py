@@ -1,11 +1,22 @@
 import os
+import sys
 import json
 import argparse
 import logging
 from datetime import datetime, timezone, timedelta
+from pathlib import Path
 from dotenv import load_dotenv
 from supabase import create_client
 
+from content_hash import json_hash
+from reconstruction import DEFAULT_CHUNK_SIZE, reconstruct_rows
+from thread_walker import convert_json_to_text
+
+# Make the shared src.database helpers importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.database.client import (  # noqa: E402
+    DEFAULT_PAGE_SIZE, BulkWriter, iter_rows, require_content_hashes)
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -32,49 +43,15 @@ class FacebookPostConverter:
             )
 
         self.supabase = create_client(supabase_url, supabase_key)
+        require_content_hashes(self.supabase)
 
     def convert_json_to_text(self, json_data: dict) -> str:
         """Convert JSON structure to readable text format."""
-        text_parts = []
-
-        for post in json_data.get('data', []):
-            # Add post content
-            author = post.get('author', 'Unknown')
-            message = post.get('message', '')
-            created_time = post.get('created_time', '')
-
-            text_parts.append(f"Post by {author} on {created_time}:")
-            text_parts.append(message)
-
-            # Process comments
-            comments = post.get('comments', {}).get('data', [])
-            for comment in comments:
-                comment_author = comment.get('author', 'Unknown')
-                comment_message = comment.get('message', '')
-                comment_time = comment.get('created_time', '')
-
-                text_parts.append(
-                    f"\nComment by {comment_author} on {comment_time}:")
-                text_parts.append(comment_message)
-
-                # Process replies
-                replies = comment.get('comments', {}).get('data', [])
-                for reply in replies:
-                    reply_author = reply.get('author', 'Unknown')
-                    reply_message = reply.get('message', '')
-                    reply_time = reply.get('created_time', '')
-
-                    text_parts.append(
-                        f"\nReply by {reply_author} on {reply_time}:")
-                    text_parts.append(reply_message)
-
-        return '\n\n'.join(text_parts)
-
-    def build_query(self, args: argparse.Namespace):
-        """Build Supabase query based on constraints."""
-        query = self.supabase.table('fb_group_posts') \
-            .select('id, processed_post_json, created_at') \
-            .not_.is_('processed_post_json', 'null')
+        return convert_json_to_text(json_data)
+
+    def apply_constraints(self, query, args: argparse.Namespace):
+        """Add the selected constraints to a Supabase query."""
+        query = query.not_.is_('processed_post_json', 'null')
 
         # Apply ID constraints
         if args.id:
@@ -97,59 +74,86 @@ class FacebookPostConverter:
         if args.unprocessed_only:
             query = query.is_('reconstructed_post', 'null')
 
-        # Apply order
-        query = query.order('id', desc=False)
-
         return query
 
-    def process_posts(self, args: argparse.Namespace) -> tuple[int, int]:
-        """Process posts and store reconstructed text."""
-        try:
-            # Build and execute query
-            query = self.build_query(args)
-            response = query.execute()
-
-            if not response.data:
-                logger.info("No posts found matching the criteria")
-                return 0, 0
-
-            logger.info(f"Found {len(response.data)} posts to process")
-
-            success_count = 0
-            error_count = 0
+    def stream_posts(self, args: argparse.Namespace):
+        """Stream matching posts from Supabase in id order, page by page."""
+        return iter_rows(
+            self.supabase, 'fb_group_posts',
+            'id, processed_post_json, created_at, processed_json_hash',
+            lambda query: self.apply_constraints(query, args),
+            args.page_size
+        )
 
-            for post in response.data:
+    def process_posts(self, args: argparse.Namespace) -> tuple[int, int]:
+        """Process posts and store reconstructed text.
+
+        With args.workers > 0, reconstruction runs in a process pool while
+        the next pages are read and finished posts are written.
+        """
+        converted_count = 0
+        skipped_count = 0
+        error_count = 0
+        # Hashes of the JSON each pending post is reconstructed from
+        source_hashes = {}
+        writer = BulkWriter(self.supabase, 'fb_group_posts',
+                            batch_size=args.write_batch_size,
+                            flush_interval=args.write_interval)
+
+        def changed_posts():
+            nonlocal skipped_count, error_count
+            for post in self.stream_posts(args):
+                logger.info(f"Processing post {
+                            post['id']} (created at {post['created_at']})")
                 try:
-                    logger.info(f"Processing post {
-                                post['id']} (created at {post['created_at']})")
-
-                    # Convert JSON to text
-                    text = self.convert_json_to_text(
-                        post['processed_post_json'])
-
-                    # Update Supabase
-                    self.supabase.table('fb_group_posts') \
-                        .update({
-                            'reconstructed_post': text,
-                            'reconstructed_at': datetime.now(timezone.utc).isoformat()
-                        }) \
-                        .eq('id', post['id']) \
-                        .execute()
-
-                    success_count += 1
-                    logger.info(f"Successfully processed post {post['id']}")
-
+                    source_hash = json_hash(post['processed_post_json'])
                 except Exception as e:
                     error_count += 1
                     logger.error(f"Error processing post {
                                  post['id']}: {str(e)}")
                     continue
 
-            return success_count, error_count
+                # Skip posts reconstructed from the same JSON
+                if not args.force and source_hash == post.get('processed_json_hash'):
+                    logger.info(f"Skipping post {post['id']} "
+                                f"(processed_post_json unchanged)")
+                    skipped_count += 1
+                    continue
+                source_hashes[post['id']] = source_hash
+                yield post
+
+        try:
+            for post, text, error in reconstruct_rows(
+                    changed_posts(), convert_json_to_text,
+                    args.workers, args.chunk_size):
+                source_hash = source_hashes.pop(post['id'])
+                if error is not None:
+                    error_count += 1
+                    logger.error(f"Error processing post {post['id']}: {error}")
+                    continue
+
+                # Queue the Supabase update
+                writer.add({
+                    'id': post['id'],
+                    'reconstructed_post': text,
+                    'reconstructed_at': datetime.now(timezone.utc).isoformat(),
+                    'processed_json_hash': source_hash
+                })
+                converted_count += 1
+
+            if not converted_count and not skipped_count and not error_count:
+                logger.info("No posts found matching the criteria")
 
         except Exception as e:
             logger.error(f"Error in batch processing: {str(e)}")
-            return 0, 0
+
+        writer.close()
+        if writer.failed_ids:
+            logger.error(f"Failed to save posts - IDs: {
+                         ', '.join(map(str, sorted(writer.failed_ids)))}")
+        logger.info(f"Saved {writer.written} posts in {writer.requests} bulk requests, "
+                    f"skipped {skipped_count} unchanged")
+        return writer.written, error_count + len(writer.failed_ids)
 
 
 def parse_date(date_str: str) -> datetime:
@@ -203,6 +207,42 @@ def parse_arguments():
         action='store_true',
         help='Only process posts that haven\'t been reconstructed yet'
     )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Reconstruct posts even if their processed_post_json is unchanged'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=0,
+        help='Reconstruction worker processes (default: 0, reconstruct in '
+             'the main process)'
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f'Posts per worker task (default: {DEFAULT_CHUNK_SIZE})'
+    )
+    parser.add_argument(
+        '--page-size',
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        help=f'Posts fetched from Supabase per page (default: {DEFAULT_PAGE_SIZE})'
+    )
+    parser.add_argument(
+        '--write-batch-size',
+        type=int,
+        default=500,
+        help='Rows per bulk Supabase upsert (default: 500)'
+    )
+    parser.add_argument(
+        '--write-interval',
+        type=float,
+        default=5.0,
+        help='Seconds before buffered rows are written anyway (default: 5)'
+    )
 
     return parser.parse_args()
 
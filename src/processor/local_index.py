@@ -0,0 +1,424 @@
+# src/processor/local_index.py
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Initial rows allocated per namespace; the matrix doubles when full
+INITIAL_CAPACITY = 1024
+
+# Lists probed per approximate query unless the caller says otherwise
+DEFAULT_NPROBE = 8
+
+_COMPARISONS = {
+    '$gt': lambda value, operand: value > operand,
+    '$gte': lambda value, operand: value >= operand,
+    '$lt': lambda value, operand: value < operand,
+    '$lte': lambda value, operand: value <= operand,
+}
+
+
+def _as_list(value) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+def _match_operator(value: Any, operator: str, operand: Any, present: bool) -> bool:
+    """Apply one Pinecone filter operator to a metadata value.
+
+    List-valued metadata matches $eq/$in when any element does, and
+    $ne/$nin when none does. A missing field only matches $ne and $nin.
+    """
+    if operator in ('$eq', '$in'):
+        wanted = _as_list(operand) if operator == '$in' else [operand]
+        return present and any(item in wanted for item in _as_list(value))
+    if operator in ('$ne', '$nin'):
+        unwanted = _as_list(operand) if operator == '$nin' else [operand]
+        return not present or not any(item in unwanted for item in _as_list(value))
+    if operator in _COMPARISONS:
+        try:
+            return present and _COMPARISONS[operator](value, operand)
+        except TypeError:
+            return False
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+
+def matches_filter(metadata: Dict, filter: Optional[Dict]) -> bool:
+    """Whether metadata satisfies a Pinecone-style metadata filter.
+
+    Supports $eq, $ne, $in, $nin, $gt, $gte, $lt and $lte on fields,
+    `{"field": value}` as shorthand for $eq, and $and/$or over lists of
+    filters. Conditions on several fields of one filter are ANDed.
+    """
+    if not filter:
+        return True
+    for key, condition in filter.items():
+        if key == '$and':
+            if not all(matches_filter(metadata, part) for part in condition):
+                return False
+        elif key == '$or':
+            if not any(matches_filter(metadata, part) for part in condition):
+                return False
+        else:
+            present = key in metadata
+            value = metadata.get(key)
+            if not isinstance(condition, dict):
+                condition = {'$eq': condition}
+            for operator, operand in condition.items():
+                if not _match_operator(value, operator, operand, present):
+                    return False
+    return True
+
+
+class _Column:
+    """One metadata field across a namespace's rows, for filter masks"""
+
+    def __init__(self, key: str, metadata: List[Dict]):
+        self.values = [row.get(key) for row in metadata]
+        self.present = np.fromiter((key in row for row in metadata),
+                                   dtype=bool, count=len(metadata))
+        self.has_lists = any(isinstance(value, list) for value in self.values)
+        self._numbers = None
+
+    def numbers(self) -> np.ndarray:
+        """Numeric values as float64, NaN where missing or not a number"""
+        if self._numbers is None:
+            self._numbers = np.array([
+                value if isinstance(value, (int, float)) and not isinstance(value, bool)
+                else np.nan
+                for value in self.values
+            ], dtype=np.float64)
+        return self._numbers
+
+    def mask(self, operator: str, operand: Any) -> np.ndarray:
+        count = len(self.values)
+        if operator in ('$eq', '$in', '$ne', '$nin') and not self.has_lists:
+            try:
+                wanted = set(_as_list(operand) if operator in ('$in', '$nin')
+                             else [operand])
+                hits = np.fromiter((value in wanted for value in self.values),
+                                   dtype=bool, count=count) & self.present
+            except TypeError:
+                pass  # Unhashable operands are checked row by row
+            else:
+                return hits if operator in ('$eq', '$in') else ~hits
+        if (operator in _COMPARISONS and isinstance(operand, (int, float))
+                and not isinstance(operand, bool)):
+            with np.errstate(invalid='ignore'):
+                return _COMPARISONS[operator](self.numbers(), operand)
+        return np.fromiter(
+            (_match_operator(value, operator, operand, present)
+             for value, present in zip(self.values, self.present)),
+            dtype=bool, count=count)
+
+
+def _unit_rows(values: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length, so a dot product is a cosine similarity"""
+    norms = np.linalg.norm(values, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return values / norms
+
+
+def _columns(vectors) -> Tuple[List[str], np.ndarray, List[Dict]]:
+    """IDs, float32 matrix and metadata of an EmbeddingBatch or vector dicts"""
+    if hasattr(vectors, 'vectors'):
+        return list(vectors.ids), vectors.vectors, list(vectors.metadata)
+    ids = [vector['id'] for vector in vectors]
+    values = np.asarray([vector['values'] for vector in vectors], dtype=np.float32)
+    metadata = [vector.get('metadata') or {} for vector in vectors]
+    return ids, values, metadata
+
+
+class _Namespace:
+    """Rows of one namespace: a growable unit-vector matrix plus metadata.
+
+    Deleting a row moves the last row into its slot, so live rows always
+    occupy matrix[:count] and searches never skip holes.
+    """
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self.matrix = np.empty((INITIAL_CAPACITY, dimension), dtype=np.float32)
+        self.ids: List[str] = []
+        self.metadata: List[Dict] = []
+        self.positions: Dict[str, int] = {}
+        # IVF state: unit centroids and each row's list
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.empty(INITIAL_CAPACITY, dtype=np.int32)
+        # Metadata fields used in filters, dropped on every change
+        self._columns: Dict[str, _Column] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _reserve(self, rows: int):
+        if rows <= len(self.matrix):
+            return
+        capacity = len(self.matrix)
+        while capacity < rows:
+            capacity *= 2
+        matrix = np.empty((capacity, self.dimension), dtype=np.float32)
+        matrix[:len(self)] = self.matrix[:len(self)]
+        assignments = np.empty(capacity, dtype=np.int32)
+        assignments[:len(self)] = self.assignments[:len(self)]
+        self.matrix, self.assignments = matrix, assignments
+
+    def _nearest_lists(self, rows: np.ndarray) -> np.ndarray:
+        return np.argmax(rows @ self.centroids.T, axis=1).astype(np.int32)
+
+    def filter_mask(self, filter: Dict) -> np.ndarray:
+        """Boolean mask of the rows matching a metadata filter.
+
+        Same semantics as matches_filter, evaluated one field at a time
+        over cached columns instead of one row at a time.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for key, condition in filter.items():
+            if key == '$and':
+                for part in condition:
+                    mask &= self.filter_mask(part)
+            elif key == '$or':
+                either = np.zeros(len(self), dtype=bool)
+                for part in condition:
+                    either |= self.filter_mask(part)
+                mask &= either
+            else:
+                column = self._columns.get(key)
+                if column is None:
+                    column = self._columns[key] = _Column(key, self.metadata)
+                if not isinstance(condition, dict):
+                    condition = {'$eq': condition}
+                for operator, operand in condition.items():
+                    if operator not in ('$eq', '$ne', '$in', '$nin') \
+                            and operator not in _COMPARISONS:
+                        raise ValueError(f"Unsupported filter operator: {operator}")
+                    mask &= column.mask(operator, operand)
+        return mask
+
+    def upsert(self, ids: List[str], values: np.ndarray, metadata: List[Dict]):
+        self._columns.clear()
+        values = _unit_rows(np.asarray(values, dtype=np.float32))
+        self._reserve(len(self) + len(ids))
+        lists = self._nearest_lists(values) if self.centroids is not None else None
+        for i, (vector_id, row_metadata) in enumerate(zip(ids, metadata)):
+            position = self.positions.get(vector_id)
+            if position is None:
+                position = len(self)
+                self.positions[vector_id] = position
+                self.ids.append(vector_id)
+                self.metadata.append(row_metadata)
+            else:
+                self.metadata[position] = row_metadata
+            self.matrix[position] = values[i]
+            if lists is not None:
+                self.assignments[position] = lists[i]
+
+    def delete(self, ids: Iterable[str]) -> int:
+        self._columns.clear()
+        deleted = 0
+        for vector_id in ids:
+            position = self.positions.pop(vector_id, None)
+            if position is None:
+                continue
+            last = len(self) - 1
+            if position != last:
+                moved_id = self.ids[last]
+                self.ids[position] = moved_id
+                self.metadata[position] = self.metadata[last]
+                self.matrix[position] = self.matrix[last]
+                self.assignments[position] = self.assignments[last]
+                self.positions[moved_id] = position
+            self.ids.pop()
+            self.metadata.pop()
+            deleted += 1
+        return deleted
+
+    def build_ivf(self, n_lists: int, iterations: int, seed: int):
+        """Cluster the rows with spherical k-means"""
+        rows = self.matrix[:len(self)]
+        rng = np.random.default_rng(seed)
+        n_lists = max(1, min(n_lists, len(rows)))
+        centroids = rows[rng.choice(len(rows), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            lists = np.argmax(rows @ centroids.T, axis=1)
+            for k in range(n_lists):
+                members = rows[lists == k]
+                if len(members):
+                    centroids[k] = members.sum(axis=0)
+            centroids = _unit_rows(centroids)
+        self.centroids = centroids
+        self.assignments[:len(self)] = self._nearest_lists(rows)
+
+
+class LocalVectorIndex:
+    """In-memory stand-in for a Pinecone index.
+
+    Takes the same vector dicts or EmbeddingBatch that PineconeUploader
+    uploads, keeps each namespace as one float32 matrix of unit vectors
+    and answers `query` with an exact cosine matmul. After `build_ivf`,
+    queries can pass `approximate=True` to only score the rows of the
+    `nprobe` closest clusters. Responses have Pinecone's dict shape.
+    """
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.RLock()
+
+    def _namespace(self, namespace: Optional[str], create: bool = False) -> Optional[_Namespace]:
+        namespace = namespace or ''
+        if namespace not in self._namespaces and create:
+            self._namespaces[namespace] = _Namespace(self.dimension)
+        return self._namespaces.get(namespace)
+
+    def upsert(self, vectors, namespace: Optional[str] = None) -> Dict:
+        """Insert or replace vectors by ID"""
+        ids, values, metadata = _columns(vectors)
+        if not ids:
+            return {'upserted_count': 0}
+        if values.shape != (len(ids), self.dimension):
+            raise ValueError(
+                f"Vector dimension mismatch. Expected {self.dimension}, "
+                f"got array of shape {values.shape}"
+            )
+        with self._lock:
+            self._namespace(namespace, create=True).upsert(ids, values, metadata)
+        return {'upserted_count': len(ids)}
+
+    def query(
+        self,
+        vector,
+        top_k: int = 10,
+        namespace: Optional[str] = None,
+        filter: Optional[Dict] = None,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        approximate: bool = False,
+        nprobe: int = DEFAULT_NPROBE
+    ) -> Dict:
+        """Return the `top_k` most similar vectors by cosine similarity"""
+        query = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        if query.shape[1] != self.dimension:
+            raise ValueError(
+                f"Query dimension mismatch. Expected {self.dimension}, "
+                f"got {query.shape[1]}"
+            )
+        query = _unit_rows(query)[0]
+
+        with self._lock:
+            space = self._namespace(namespace)
+            if space is None or not len(space) or top_k <= 0:
+                return {'matches': [], 'namespace': namespace or ''}
+
+            candidates = None
+            if approximate:
+                if space.centroids is None:
+                    raise ValueError("Call build_ivf() before approximate queries")
+                probe = np.argsort(space.centroids @ query)[::-1][:nprobe]
+                candidates = np.flatnonzero(
+                    np.isin(space.assignments[:len(space)], probe))
+            if filter:
+                mask = space.filter_mask(filter)
+                if candidates is not None:
+                    mask = mask[candidates]
+                    candidates = candidates[mask]
+                else:
+                    candidates = np.flatnonzero(mask)
+
+            if candidates is None:
+                scores = space.matrix[:len(space)] @ query
+                positions = np.arange(len(space))
+            else:
+                scores = space.matrix[candidates] @ query
+                positions = candidates
+
+            k = min(top_k, len(scores))
+            if k == 0:
+                return {'matches': [], 'namespace': namespace or ''}
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best], kind='stable')]
+
+            matches = []
+            for i in best:
+                position = positions[i]
+                match = {'id': space.ids[position], 'score': float(scores[i])}
+                if include_metadata:
+                    match['metadata'] = space.metadata[position]
+                if include_values:
+                    match['values'] = space.matrix[position].tolist()
+                matches.append(match)
+        return {'matches': matches, 'namespace': namespace or ''}
+
+    def fetch(self, ids: List[str], namespace: Optional[str] = None) -> Dict:
+        """Vectors and metadata by ID; unknown IDs are left out.
+
+        Values are returned unit-normalized, as stored.
+        """
+        vectors = {}
+        with self._lock:
+            space = self._namespace(namespace)
+            if space is not None:
+                for vector_id in ids:
+                    position = space.positions.get(vector_id)
+                    if position is not None:
+                        vectors[vector_id] = {
+                            'id': vector_id,
+                            'values': space.matrix[position].tolist(),
+                            'metadata': space.metadata[position],
+                        }
+        return {'vectors': vectors, 'namespace': namespace or ''}
+
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        namespace: Optional[str] = None,
+        delete_all: bool = False,
+        filter: Optional[Dict] = None
+    ) -> Dict:
+        """Delete vectors by ID, by metadata filter, or all of a namespace"""
+        with self._lock:
+            space = self._namespace(namespace)
+            if space is None:
+                return {}
+            if delete_all:
+                del self._namespaces[namespace or '']
+                return {}
+            if filter:
+                mask = space.filter_mask(filter)
+                ids = [space.ids[i] for i in np.flatnonzero(mask)]
+            space.delete(ids or [])
+        return {}
+
+    def build_ivf(
+        self,
+        namespace: Optional[str] = None,
+        n_lists: Optional[int] = None,
+        iterations: int = 10,
+        seed: int = 0
+    ):
+        """Cluster a namespace for approximate queries.
+
+        `n_lists` defaults to about the square root of the row count.
+        Vectors upserted later join their nearest cluster; rebuild after
+        large changes to keep the clusters balanced.
+        """
+        with self._lock:
+            space = self._namespace(namespace)
+            if space is None or not len(space):
+                raise ValueError(f"Namespace {namespace or ''!r} is empty")
+            n_lists = n_lists or max(1, int(np.sqrt(len(space))))
+            space.build_ivf(n_lists, iterations, seed)
+            logger.info(f"Built IVF with {len(space.centroids)} lists over "
+                        f"{len(space)} vectors in namespace {namespace or ''!r}")
+
+    def describe_index_stats(self) -> Dict:
+        with self._lock:
+            namespaces = {name: {'vector_count': len(space)}
+                          for name, space in self._namespaces.items()}
+        return {
+            'dimension': self.dimension,
+            'namespaces': namespaces,
+            'total_vector_count': sum(ns['vector_count'] for ns in namespaces.values()),
+        }
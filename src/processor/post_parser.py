@@ -0,0 +1,217 @@
+# src/processor/post_parser.py
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+# Badges Facebook prints on their own line under a commenter's name
+ROLE_LINES = {
+    "admin", "moderator", "author", "top contributor", "rising contributor",
+    "group expert", "conversation starter", "visual storyteller",
+    "new member", "valued commenter", "all-star contributor", "follow",
+}
+AUTHOR_ROLE = "author"
+
+TIME_RE = re.compile(r"^(\d+)\s*(m|min|mins|h|hr|hrs|d|w|y|yr|yrs)$", re.IGNORECASE)
+TIME_UNITS = {
+    "m": timedelta(minutes=1), "min": timedelta(minutes=1),
+    "mins": timedelta(minutes=1),
+    "h": timedelta(hours=1), "hr": timedelta(hours=1), "hrs": timedelta(hours=1),
+    "d": timedelta(days=1),
+    "w": timedelta(weeks=1),
+    "y": timedelta(days=365), "yr": timedelta(days=365), "yrs": timedelta(days=365),
+}
+JUST_NOW = "just now"
+REPLY_LINE = "reply"
+COMMENTS_MARKER_RE = re.compile(r'^"?\s*comments\s*:?\s*"?$', re.IGNORECASE)
+NAME_RE = re.compile(r"^[A-Z][\w'.-]*(?: [A-Z][\w'.-]*){0,4}$")
+
+DEFAULT_MIN_CONFIDENCE = 0.9
+
+
+@dataclass
+class ParseResult:
+    """Structured post and how much the parser trusts it.
+
+    `data` has the same shape the LLM conversion produces. `issues` lists
+    what lowered the confidence, for reports and debugging.
+    """
+    data: Dict
+    confidence: float
+    issues: List[str] = field(default_factory=list)
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse an ISO timestamp, treating naive values as UTC"""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def format_timestamp(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def resolve_relative_time(label: str, scraped_at: datetime) -> Optional[datetime]:
+    """Turn a label such as "21h" into an absolute time, or None"""
+    label = label.strip()
+    if label.lower() == JUST_NOW:
+        return scraped_at
+    match = TIME_RE.match(label)
+    if not match:
+        return None
+    amount, unit = match.groups()
+    return scraped_at - int(amount) * TIME_UNITS[unit.lower()]
+
+
+def _is_time_line(line: str) -> bool:
+    line = line.strip()
+    return line.lower() == JUST_NOW or bool(TIME_RE.match(line))
+
+
+def _comment_ends(lines: List[str]) -> List[int]:
+    """Indices of time lines that close a comment, i.e. sit above "Reply" """
+    ends = []
+    for i, line in enumerate(lines):
+        if not _is_time_line(line):
+            continue
+        following = next((l.strip() for l in lines[i + 1:] if l.strip()), None)
+        if following is None or following.lower() == REPLY_LINE:
+            ends.append(i)
+    return ends
+
+
+def _first_comment_start(lines: List[str], first_end: int) -> Optional[int]:
+    """Where the post message stops and the first comment begins"""
+    for i in range(first_end - 1, -1, -1):
+        if COMMENTS_MARKER_RE.match(lines[i].strip()):
+            return i + 1
+    # Otherwise the first comment follows the post's last blank line
+    for i in range(first_end - 1, -1, -1):
+        if not lines[i].strip():
+            return i + 1
+    return None
+
+
+def _strip_addressee(message: str, names: List[str]) -> Optional[str]:
+    """Remove the name a reply starts with, or None if it has none"""
+    for name in sorted(names, key=len, reverse=True):
+        if message.startswith(name + " ") or message.startswith(name + "\n"):
+            return message[len(name):].lstrip()
+    return None
+
+
+def parse_post(raw_post: str, scraped_at: str) -> ParseResult:
+    """Convert raw scraped post text into the processed_post_json structure.
+
+    Comments are blocks of a name, optional role lines, the message, a
+    relative time and "Reply". A comment that starts with the name of an
+    earlier participant is a reply in the current thread.
+    """
+    scraped = parse_timestamp(scraped_at)
+    lines = raw_post.strip().strip('"').splitlines()
+    issues = []
+    confidence = 1.0
+
+    ends = _comment_ends(lines)
+    start = _first_comment_start(lines, ends[0]) if ends else len(lines)
+    if start is None:
+        # Without a boundary the whole text is treated as the post
+        start = len(lines)
+        ends = []
+        confidence -= 0.5
+        issues.append("no boundary between post and comments")
+
+    post_lines = lines[:start]
+    if post_lines and COMMENTS_MARKER_RE.match(post_lines[-1].strip()):
+        post_lines = post_lines[:-1]
+    post_message = "\n".join(post_lines).strip().strip('"').strip()
+    if not post_message:
+        confidence -= 0.5
+        issues.append("empty post message")
+
+    comments = []
+    names: List[str] = []
+    post_author = None
+    thread = None
+    seen = set()
+    for end in ends:
+        block = [line.strip() for line in lines[start:end]]
+        while block and not block[0]:
+            block.pop(0)
+        # The next comment starts after this one's "Reply"
+        start = end + 1
+        while start < len(lines) and lines[start].strip().lower() in ("", REPLY_LINE):
+            start += 1
+
+        if not block:
+            confidence -= 0.5
+            issues.append(f"empty comment block before line {end + 1}")
+            continue
+
+        author = block[0]
+        body = block[1:]
+        roles = []
+        while body and body[0].lower() in ROLE_LINES:
+            roles.append(body.pop(0).lower())
+        message = "\n".join(body).strip()
+
+        if not NAME_RE.match(author):
+            confidence -= 0.5
+            issues.append(f"unlikely author name {author!r}")
+        if not message:
+            confidence -= 0.3
+            issues.append(f"empty message from {author}")
+        if AUTHOR_ROLE in roles:
+            if post_author not in (None, author):
+                confidence -= 0.3
+                issues.append("more than one post author")
+            post_author = author
+
+        # The scraper sometimes captures an expanded thread twice
+        key = (author, message, lines[end].strip())
+        if key in seen:
+            continue
+        seen.add(key)
+
+        node = {
+            "created_time": format_timestamp(
+                resolve_relative_time(lines[end], scraped)),
+            "message": message,
+            "author": author,
+        }
+
+        reply = _strip_addressee(message, names) if thread is not None else None
+        if reply is not None:
+            node["message"] = reply
+            thread.setdefault("comments", {"data": []})["data"].append(node)
+        else:
+            comments.append(node)
+            thread = node
+        if author not in names:
+            names.append(author)
+
+    # Text after the last "Reply" that isn't another comment
+    leftover = [line for line in lines[start:] if line.strip()] if ends else []
+    if leftover:
+        confidence -= 0.5
+        issues.append(f"{len(leftover)} unparsed trailing lines")
+
+    if post_author is None:
+        confidence -= 0.3
+        issues.append("post author not marked with an Author role")
+
+    post = {
+        "created_time": format_timestamp(scraped),
+        "message": post_message,
+        "author": post_author or "",
+    }
+    if comments:
+        post["comments"] = {"data": comments}
+
+    return ParseResult(
+        data={"data": [post]},
+        confidence=max(0.0, round(confidence, 2)),
+        issues=issues
+    )
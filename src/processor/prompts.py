@@ -0,0 +1,179 @@
+# src/processor/prompts.py
+from dataclasses import dataclass
+from typing import Dict, List
+
+# Prompts are kept byte-for-byte stable within a version. Everything that
+# varies per post goes in the final user message, after the template, so
+# consecutive requests share the whole system prompt as a cacheable prefix.
+# OpenAI caches prefixes of 1,024 tokens or more automatically.
+
+FEW_SHOT_V1 = """Task: Convert a raw Facebook post, including its comments and replies, into a structured JSON format.
+
+Requirements:
+
+	1.	Extract the following details:
+	•	Post: Time, message, author
+	•	Comments: Time, message, author
+	•	Replies: Time, message, author
+	2.	Convert all time values into ISODate time format.
+	3.	Exclude any role information.
+
+For example:
+
+Post scraped at: 2024-11-30T13:14:00Z
+
+Raw post: "Hi Stuart,
+
+David, the Principal Customer Success Account Manager at Microsoft, replied my coffee chat request as below."
+
+Comments:"
+Stuart Bradley
+Admin
+Top contributor
+Nice work!
+Skipping the details - you mean not being interactive or acknowledging his comment?
+1d
+Reply
+Jamie Yun
+Author
+Stuart Bradley Hi Stuart, thanks for the comment. Here is the drafted response:
+Hi David, thanks for sharing your perspective.
+21h
+Reply
+Stuart Bradley
+Admin
+Top contributor
+Jamie Yun looks fine to me
+20h
+Reply
+Jamie Yun
+Author
+Stuart Bradley Thanks, Stuart!
+19h
+Reply
+Stuart Bradley
+Admin
+Top contributor
+Jamie Yun this MSFT feedback is the biggest win so far in your chat.
+16h
+Reply
+
+
+
+Stuart Bradley
+Admin
+Top contributor
+Jamie Yun looks fine to me
+20h
+Reply
+Jamie Yun
+Author
+Stuart Bradley Thanks, Stuart!
+19h
+Reply
+Stuart Bradley
+Admin
+Top contributor
+Jamie Yun this MSFT feedback is the biggest win so far in your chat.
+16h
+Reply"
+
+Result: "{
+    "data": [
+        {
+            "created_time": "2024-11-23T23:17:00Z",
+            "message": "Hi Stuart,\n\nDavid, the Principal Customer Success Account Manager at Microsoft, replied my coffee chat request as below.",
+            "author": "Jamie Yun",
+            "comments": {
+                "data": [
+                    {
+                        "created_time": "2024-11-22T23:17:00Z",
+                        "message": "Nice work!\nSkipping the details - you mean not being interactive or acknowledging his comment?",
+                        "author": "Stuart Bradley",
+                        "comments": {
+                            "data": [
+                                {
+                                    "created_time": "2024-11-23T02:17:00Z",
+                                    "message": "Hi Stuart, thanks for the comment. Here is the drafted response:\nHi David, thanks for sharing your perspective.",
+                                    "author": "Jamie Yun"
+                                },
+                                {
+                                    "created_time": "2024-11-23T03:17:00Z",
+                                    "message": "Jamie Yun looks fine to me",
+                                    "author": "Stuart Bradley"
+                                },
+                                {
+                                    "created_time": "2024-11-23T04:17:00Z",
+                                    "message": "Thanks, Stuart!",
+                                    "author": "Jamie Yun"
+                                },
+                                {
+                                    "created_time": "2024-11-23T07:17:00Z",
+                                    "message": "this MSFT feedback is the biggest win so far in your chat.",
+                                    "author": "Stuart Bradley"
+                                }
+                            ]
+                        }
+                    }
+                ]
+            }
+        }
+    ]
+}"""
+
+COMPACT_V1 = """Convert a raw Facebook post with its comments and replies into JSON.
+
+Output exactly this shape, where each node is the post, a comment or a reply:
+{"data": [NODE]}
+NODE = {"created_time": ISO 8601 UTC string, "message": string, "author": string, "comments": {"data": [NODE, ...]}}
+
+Rules:
+- The post is the only top-level node. Comments nest under the post, replies under their comment.
+- Omit "comments" on nodes without replies.
+- Resolve relative times (e.g. 1d, 21h, 5m, 2w) against the "Post scraped at" time.
+- Drop role lines (Admin, Author, Top contributor, ...), "Reply" links and the name of the person being replied to at the start of a reply.
+- Keep message text verbatim, joining its lines with \\n."""
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A versioned system prompt for raw post conversion"""
+    name: str
+    version: int
+    system: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}-v{self.version}"
+
+
+TEMPLATES: Dict[str, PromptTemplate] = {
+    template.key: template
+    for template in (
+        PromptTemplate("few-shot", 1, FEW_SHOT_V1),
+        PromptTemplate("compact", 1, COMPACT_V1),
+    )
+}
+DEFAULT_TEMPLATE = "few-shot-v1"
+
+
+def get_template(key: str = DEFAULT_TEMPLATE) -> PromptTemplate:
+    """Look up a template by its versioned key, e.g. "compact-v1" """
+    try:
+        return TEMPLATES[key]
+    except KeyError:
+        raise ValueError(
+            f"Unknown prompt template {key!r}, expected one of {sorted(TEMPLATES)}"
+        ) from None
+
+
+def build_messages(
+    content: str,
+    created_at: str,
+    template: str = DEFAULT_TEMPLATE
+) -> List[Dict[str, str]]:
+    """Chat messages asking the model to convert one raw post"""
+    return [
+        {"role": "system", "content": get_template(template).system},
+        {"role": "user", "content": f"Post scraped at: {created_at}\n\nRaw post: {content}"}
+    ]
@@ -1,11 +1,27 @@
 import os
+import sys
 import json
 import argparse
+import asyncio
+from pathlib import Path
 from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
 from supabase import create_client
 import openai
 
+from batch_api import (
+    batch_request, iter_batch_results, submit_batch, wait_for_batch,
+    write_requests)
+from content_hash import content_hash
+from post_parser import DEFAULT_MIN_CONFIDENCE, parse_post
+from prompts import DEFAULT_TEMPLATE, TEMPLATES, build_messages
+from embedder import RateLimiter, estimate_tokens, retry_after
+
+# Make the shared src.database helpers importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.database.client import (  # noqa: E402
+    DEFAULT_PAGE_SIZE, BulkWriter, iter_rows, require_content_hashes, stream_rows)
+
 
 def load_environment():
     """Load environment variables."""
@@ -34,132 +50,30 @@ def parse_date(date_str: str) -> datetime:
         )
 
 
-def get_completion(client: openai.Client, content: str, created_at: str) -> str | None:
+COMPLETION_MODEL = "gpt-4-turbo-preview"
+# Rough size of one converted thread, used to budget tokens per minute
+EXPECTED_OUTPUT_TOKENS = 1000
+POST_COLUMNS = ('id, raw_post, created_at, processed_post_json, processed_at, '
+                'raw_post_hash')
+
+
+def completion_request(content: str, created_at: str,
+                       template: str = DEFAULT_TEMPLATE) -> dict:
+    """Chat completion parameters for converting one raw post."""
+    return {
+        "model": COMPLETION_MODEL,
+        "messages": build_messages(content, created_at, template),
+        "temperature": 0.0,
+        "response_format": {"type": "json_object"}
+    }
+
+
+def get_completion(client: openai.Client, content: str, created_at: str,
+                   template: str = DEFAULT_TEMPLATE) -> str | None:
     """Get JSON conversion from OpenAI."""
     try:
-        system_prompt = """Task: Convert a raw Facebook post, including its comments and replies, into a structured JSON format.
-
-Requirements:
-
-	1.	Extract the following details:
-	•	Post: Time, message, author
-	•	Comments: Time, message, author
-	•	Replies: Time, message, author
-	2.	Convert all time values into ISODate time format.
-	3.	Exclude any role information.
-
-For example:
-
-Post scraped at: 2024-11-30T13:14:00Z
-
-Raw post: "Hi Stuart,
-
-David, the Principal Customer Success Account Manager at Microsoft, replied my coffee chat request as below."
-
-Comments:"
-Stuart Bradley
-Admin
-Top contributor
-Nice work!
-Skipping the details - you mean not being interactive or acknowledging his comment?
-1d
-Reply
-Jamie Yun
-Author
-Stuart Bradley Hi Stuart, thanks for the comment. Here is the drafted response:
-Hi David, thanks for sharing your perspective.
-21h
-Reply
-Stuart Bradley
-Admin
-Top contributor
-Jamie Yun looks fine to me
-20h
-Reply
-Jamie Yun
-Author
-Stuart Bradley Thanks, Stuart!
-19h
-Reply
-Stuart Bradley
-Admin
-Top contributor
-Jamie Yun this MSFT feedback is the biggest win so far in your chat.
-16h
-Reply
-
-
-
-Stuart Bradley
-Admin
-Top contributor
-Jamie Yun looks fine to me
-20h
-Reply
-Jamie Yun
-Author
-Stuart Bradley Thanks, Stuart!
-19h
-Reply
-Stuart Bradley
-Admin
-Top contributor
-Jamie Yun this MSFT feedback is the biggest win so far in your chat.
-16h
-Reply"
-
-Result: "{
-    "data": [
-        {
-            "created_time": "2024-11-23T23:17:00Z",
-            "message": "Hi Stuart,\n\nDavid, the Principal Customer Success Account Manager at Microsoft, replied my coffee chat request as below.",
-            "author": "Jamie Yun",
-            "comments": {
-                "data": [
-                    {
-                        "created_time": "2024-11-22T23:17:00Z",
-                        "message": "Nice work!\nSkipping the details - you mean not being interactive or acknowledging his comment?",
-                        "author": "Stuart Bradley",
-                        "comments": {
-                            "data": [
-                                {
-                                    "created_time": "2024-11-23T02:17:00Z",
-                                    "message": "Hi Stuart, thanks for the comment. Here is the drafted response:\nHi David, thanks for sharing your perspective.",
-                                    "author": "Jamie Yun"
-                                },
-                                {
-                                    "created_time": "2024-11-23T03:17:00Z",
-                                    "message": "Jamie Yun looks fine to me",
-                                    "author": "Stuart Bradley"
-                                },
-                                {
-                                    "created_time": "2024-11-23T04:17:00Z",
-                                    "message": "Thanks, Stuart!",
-                                    "author": "Jamie Yun"
-                                },
-                                {
-                                    "created_time": "2024-11-23T07:17:00Z",
-                                    "message": "this MSFT feedback is the biggest win so far in your chat.",
-                                    "author": "Stuart Bradley"
-                                }
-                            ]
-                        }
-                    }
-                ]
-            }
-        }
-    ]
-}"""
         response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Post scraped at: {
-                    created_at}\n\nRaw post: {content}"}
-            ],
-            temperature=0.0,
-            response_format={"type": "json_object"}
-        )
+            **completion_request(content, created_at, template))
 
         return response.choices[0].message.content
     except Exception as e:
@@ -176,12 +90,9 @@ def validate_json(json_str: str) -> dict | None:
         return None
 
 
-def get_posts(supabase, args):
-    """Retrieve posts based on specified constraints."""
-    try:
-        query = supabase.table('fb_group_posts').select(
-            'id, raw_post, created_at, processed_post_json, processed_at')
-
+def post_filters(args):
+    """Query constraints for the selected posts."""
+    def apply(query):
         # Apply ID constraints
         if args.id:
             query = query.eq('id', args.id)
@@ -203,79 +114,350 @@ def get_posts(supabase, args):
         # Filter based on processing status
         if args.unprocessed_only:
             query = query.is_('processed_post_json', 'null')
-        elif not args.reprocess:
-            # By default, only get unprocessed posts unless --reprocess is specified
-            query = query.is_('processed_post_json', 'null')
+        elif not args.force:
+            # By default, only get posts whose raw_post changed since their
+            # conversion (a computed column, see migrations/002)
+            query = query.is_('raw_post_stale', 'true')
 
-        response = query.execute()
-        return response.data
+        return query
+    return apply
+
+
+def get_posts(supabase, args):
+    """Stream posts matching the specified constraints, page by page."""
+    return iter_rows(supabase, 'fb_group_posts', POST_COLUMNS,
+                     post_filters(args), args.page_size)
+
+
+def processed_row(post_id: int, processed_json: dict, raw_post_hash: str) -> dict:
+    """Row update recording a post's converted JSON, processing time and the
+    hash of the raw_post it was converted from."""
+    return {
+        'id': post_id,
+        'processed_post_json': processed_json,
+        'processed_at': datetime.now(timezone.utc).isoformat(),
+        'raw_post_hash': raw_post_hash
+    }
+
+
+def has_raw_post(post) -> bool:
+    """Whether a post has raw text to convert; empty posts are skipped."""
+    if post.get('raw_post'):
+        return True
+    print(f"\nSkipping post {post['id']} (no raw_post)")
+    return False
+
+
+def should_skip(post, args) -> bool:
+    """Whether a post's stored conversion is still current.
+
+    A conversion is current when it was made from a raw_post with the same
+    content hash; --force converts every selected post again.
+    """
+    if post.get('processed_post_json') is None:
+        return False
+    if args.force or post.get('raw_post_hash') != content_hash(post['raw_post']):
+        print(f"\nReprocessing post {
+              post['id']} (previously processed at {post.get('processed_at')})")
+        return False
+    print(f"\nSkipping post {
+          post['id']} (raw_post unchanged since {post.get('processed_at')})")
+    return True
+
+
+def post_writer(supabase, args) -> BulkWriter:
+    """Bulk writer for processed_post_json updates."""
+    return BulkWriter(supabase, 'fb_group_posts',
+                      batch_size=args.write_batch_size,
+                      flush_interval=args.write_interval)
+
+
+def report_writes(writer: BulkWriter) -> tuple[int, int]:
+    """Print rows that failed to save, and return (written, failed) counts."""
+    if writer.failed_ids:
+        print(f"\nFailed to save posts - IDs: {
+              ', '.join(map(str, sorted(writer.failed_ids)))}")
+    print(f"Saved {writer.written} posts in {writer.requests} bulk requests")
+    return writer.written, len(writer.failed_ids)
+
+
+def parse_locally(post, args) -> dict | None:
+    """Convert a post with the rule-based parser if it is confident enough."""
+    if args.no_local_parser:
+        return None
+    try:
+        result = parse_post(post['raw_post'], post['created_at'])
     except Exception as e:
-        print(f"Error retrieving posts: {str(e)}")
-        return []
+        print(f"Local parser failed on post {post['id']}: {str(e)}")
+        return None
+
+    if result.confidence < args.parser_threshold:
+        print(f"Local parser not confident about post {post['id']} "
+              f"({result.confidence:.2f}: {'; '.join(result.issues)})")
+        return None
+    print(f"Parsed post {post['id']} locally")
+    return result.data
 
 
 def process_posts(supabase, openai_client, posts, args):
     """Process posts through OpenAI and update Supabase."""
-    processed_count = 0
     skipped_count = 0
+    empty_count = 0
     error_count = 0
+    writer = post_writer(supabase, args)
 
-    for post in posts:
-        # Check if post is already processed
-        if post.get('processed_post_json') is not None:
-            if args.reprocess:
-                print(f"\nReprocessing post {
-                      post['id']} (previously processed at {post.get('processed_at')})")
-            else:
-                print(f"\nSkipping post {
-                      post['id']} (already processed at {post.get('processed_at')})")
+    try:
+        for post in posts:
+            if not has_raw_post(post):
+                empty_count += 1
+                continue
+
+            # Check if post is already processed from the same raw_post
+            if should_skip(post, args):
                 skipped_count += 1
                 continue
 
-        print(f"\nProcessing post {post['id']}...")
+            print(f"\nProcessing post {post['id']}...")
 
-        # Get JSON from OpenAI
-        json_str = get_completion(
-            openai_client, post['raw_post'], post['created_at'])
+            # Posts the local parser is sure about skip OpenAI entirely
+            processed_json = parse_locally(post, args)
+            if processed_json is None:
+                # Get JSON from OpenAI
+                json_str = get_completion(
+                    openai_client, post['raw_post'], post['created_at'], args.prompt)
+                if not json_str:
+                    error_count += 1
+                    print(f"Failed to get completion for post {post['id']}")
+                    continue
+
+                # Validate JSON
+                processed_json = validate_json(json_str)
+                if not processed_json:
+                    error_count += 1
+                    print(f"Failed to validate JSON for post {post['id']}")
+                    continue
+
+            # Queue the database update
+            writer.add(processed_row(
+                post['id'], processed_json, content_hash(post['raw_post'])))
+            print(f"Queued processed post {post['id']} for saving")
+    finally:
+        writer.close()
+    processed_count, failed_count = report_writes(writer)
+    return processed_count, skipped_count, empty_count, error_count + failed_count
+
+
+async def get_completion_async(
+        client: openai.AsyncOpenAI,
+        limiter: RateLimiter,
+        post: dict,
+        max_retries: int = 3,
+        template: str = DEFAULT_TEMPLATE,
+        max_rate_limit_retries: int = 10) -> str | None:
+    """Get JSON conversion from OpenAI, throttled and retried per post.
+
+    Rate limits don't use up one of `max_retries`, but a post gives up
+    after `max_rate_limit_retries` of them, e.g. on insufficient_quota.
+    """
+    request = completion_request(
+        post['raw_post'], post['created_at'], template)
+    # Budget for the prompt plus a typical converted thread
+    tokens = sum(estimate_tokens(m['content']) for m in request['messages']) + \
+        EXPECTED_OUTPUT_TOKENS
+
+    attempt = 0
+    rate_limited = 0
+    while attempt < max_retries:
+        await limiter.acquire(tokens)
+        try:
+            response = await client.chat.completions.create(**request)
+            limiter.record_success()
+            return response.choices[0].message.content
+        except openai.RateLimitError as e:
+            rate_limited += 1
+            if rate_limited > max_rate_limit_retries:
+                print(f"Giving up on post {post['id']} after {rate_limited} "
+                      f"rate limits: {str(e)}")
+                return None
+            # Rate limits pause every worker and don't use up a retry
+            delay = limiter.record_rate_limit(retry_after(e))
+            print(f"Rate limited on post {post['id']}, pausing {delay:.1f}s")
+        except Exception as e:
+            attempt += 1
+            print(f"Error in OpenAI completion for post {post['id']} "
+                  f"(attempt {attempt}/{max_retries}): {str(e)}")
+            if attempt < max_retries:
+                await asyncio.sleep(min(10, 2 ** attempt))
+
+    return None
+
+
+async def process_posts_async(supabase, openai_client, posts, args):
+    """Process posts concurrently through OpenAI and update Supabase.
+
+    Up to args.concurrency completions are in flight at once, throttled to
+    args.tokens_per_minute. Each post is handed to the bulk writer as soon
+    as its completion lands.
+    """
+    counts = {'skipped': 0, 'empty': 0, 'errors': 0}
+    writer = post_writer(supabase, args)
+    limiter = RateLimiter(
+        requests_per_minute=args.requests_per_minute,
+        tokens_per_minute=args.tokens_per_minute
+    )
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def process_post(post):
+        print(f"\nProcessing post {post['id']}...")
+        processed_json = parse_locally(post, args)
+        if processed_json is None:
+            async with semaphore:
+                json_str = await get_completion_async(
+                    openai_client, limiter, post, args.max_retries, args.prompt,
+                    args.max_rate_limit_retries)
+
+            if not json_str:
+                counts['errors'] += 1
+                print(f"Failed to get completion for post {post['id']}")
+                return
 
-        if json_str:
-            # Validate JSON
             processed_json = validate_json(json_str)
+            if not processed_json:
+                counts['errors'] += 1
+                print(f"Failed to validate JSON for post {post['id']}")
+                return
+
+        # A flush is a synchronous Supabase call, keep it off the event loop
+        await asyncio.to_thread(writer.add, processed_row(
+            post['id'], processed_json, content_hash(post['raw_post'])))
+        print(f"Queued processed post {post['id']} for saving")
+
+    def collect(done):
+        # Count unexpected failures instead of leaving them unretrieved
+        for task in done:
+            if task.exception() is not None:
+                counts['errors'] += 1
+                print(f"Error processing post {task.get_name()}: "
+                      f"{str(task.exception())}")
+
+    pending = set()
+    try:
+        async for post in posts:
+            if not has_raw_post(post):
+                counts['empty'] += 1
+                continue
+
+            # Check if post is already processed from the same raw_post
+            if should_skip(post, args):
+                counts['skipped'] += 1
+                continue
+
+            # Only read ahead a bounded window of posts
+            if len(pending) >= 2 * args.concurrency:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                collect(done)
+            pending.add(asyncio.create_task(process_post(post), name=str(post['id'])))
+    finally:
+        # Posts already in flight still reach the writer before it closes
+        if pending:
+            done, _ = await asyncio.wait(pending)
+            collect(done)
+        await asyncio.to_thread(writer.close)
+    processed_count, failed_count = report_writes(writer)
+    return (processed_count, counts['skipped'], counts['empty'],
+            counts['errors'] + failed_count)
+
+
+def process_posts_batch(supabase, openai_client, posts, args):
+    """Convert posts through the OpenAI Batch API and bulk-update Supabase.
+
+    Selected posts are written to args.batch_file as one JSONL request per
+    post and submitted as a single batch, unless args.batch_id resumes an
+    already submitted one. Results are streamed back once the batch
+    finishes. Posts the local parser is confident about are not submitted.
+    """
+    counts = {'skipped': 0, 'empty': 0, 'requests': 0}
+    writer = post_writer(supabase, args)
+    # raw_post hashes of submitted posts, recorded once their results land
+    raw_hashes = {}
+
+    def pending_requests():
+        for post in posts:
+            if not has_raw_post(post):
+                counts['empty'] += 1
+                continue
+
+            # Check if post is already processed from the same raw_post
+            if should_skip(post, args):
+                counts['skipped'] += 1
+                continue
+
+            raw_hash = content_hash(post['raw_post'])
+            processed_json = parse_locally(post, args)
+            if processed_json is not None:
+                writer.add(processed_row(post['id'], processed_json, raw_hash))
+                continue
+            raw_hashes[post['id']] = raw_hash
+            counts['requests'] += 1
+            yield batch_request(
+                f"post-{post['id']}",
+                completion_request(
+                    post['raw_post'], post['created_at'], args.prompt)
+            )
+
+    try:
+        if args.batch_id:
+            # The submitted batch already covers the posts that need OpenAI
+            for _ in pending_requests():
+                pass
+            batch_id = args.batch_id
+            print(f"\nResuming batch {batch_id}")
+        else:
+            # Requests are written as posts stream in
+            write_requests(args.batch_file, pending_requests())
+            if not counts['requests']:
+                writer.close()
+                processed_count, failed_count = report_writes(writer)
+                return processed_count, counts['skipped'], counts['empty'], failed_count
+            batch_id = submit_batch(
+                openai_client, args.batch_file,
+                metadata={'source': 'raw_data_to_json'}).id
+            print(f"\nSubmitted {counts['requests']} posts as batch {batch_id} "
+                  f"(resume with --batch-id {batch_id})")
+
+        batch = wait_for_batch(
+            openai_client, batch_id, poll_interval=args.poll_interval)
+        print(f"Batch {batch_id} finished with status {batch.status}")
+
+        answered = 0
+        error_count = 0
+        for response in iter_batch_results(openai_client, batch):
+            answered += 1
+            post_id = response.custom_id.removeprefix('post-')
+            if not response.ok:
+                error_count += 1
+                print(f"Failed to get completion for post {post_id}: {response.error}")
+                continue
 
+            processed_json = validate_json(response.content)
             if processed_json:
-                try:
-                    # Prepare update data
-                    update_data = {
-                        'processed_post_json': processed_json,
-                        'processed_at': datetime.now(timezone.utc).isoformat()
-                    }
-
-                    # Update database
-                    result = supabase.table('fb_group_posts') \
-                        .update(update_data) \
-                        .eq('id', post['id']) \
-                        .execute()
-
-                    if result.data:
-                        processed_count += 1
-                        print(f"Successfully {
-                              'reprocessed' if args.reprocess else 'processed'} post {post['id']}")
-                    else:
-                        error_count += 1
-                        print(f"No update confirmation received for post {
-                              post['id']}")
-
-                except Exception as e:
-                    error_count += 1
-                    print(f"Error updating post {post['id']}: {str(e)}")
+                # A resumed batch may answer posts this run didn't select; they
+                # are saved without a hash, so the next run checks them again
+                writer.add(processed_row(
+                    int(post_id), processed_json, raw_hashes.get(int(post_id))))
             else:
                 error_count += 1
-                print(f"Failed to validate JSON for post {post['id']}")
-        else:
-            error_count += 1
-            print(f"Failed to get completion for post {post['id']}")
+                print(f"Failed to validate JSON for post {post_id}")
 
-    return processed_count, skipped_count, error_count
+        # Requests the batch never answered, e.g. after it expired
+        if not args.batch_id and answered < counts['requests']:
+            error_count += counts['requests'] - answered
+    finally:
+        writer.close()
+    processed_count, failed_count = report_writes(writer)
+    return (processed_count, counts['skipped'], counts['empty'],
+            error_count + failed_count)
 
 
 def parse_arguments():
@@ -317,12 +499,121 @@ def parse_arguments():
     processing_group.add_argument(
         '--unprocessed-only',
         action='store_true',
-        help='Only process posts that have not been processed yet (default behavior)'
+        help='Only process posts that have not been processed yet'
     )
     processing_group.add_argument(
-        '--reprocess',
+        '--force', '--reprocess',
+        dest='force',
+        action='store_true',
+        help='Reprocess posts even if their raw_post is unchanged since they '
+             'were processed (default: only new and changed posts)'
+    )
+
+    # Prompt options
+    parser.add_argument(
+        '--prompt',
+        choices=sorted(TEMPLATES),
+        default=DEFAULT_TEMPLATE,
+        help=f'Prompt template version (default: {DEFAULT_TEMPLATE})'
+    )
+
+    # Conversion modes
+    mode_group = parser.add_mutually_exclusive_group()
+    mode_group.add_argument(
+        '--async-mode',
+        action='store_true',
+        help='Convert posts concurrently with the async OpenAI client'
+    )
+    mode_group.add_argument(
+        '--batch-mode',
+        action='store_true',
+        help='Convert posts offline through the OpenAI Batch API'
+    )
+
+    # Concurrency options
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=8,
+        help='Completions in flight at once in async mode (default: 8)'
+    )
+    parser.add_argument(
+        '--tokens-per-minute',
+        type=int,
+        default=300_000,
+        help='Token budget per minute in async mode (default: 300000)'
+    )
+    parser.add_argument(
+        '--requests-per-minute',
+        type=int,
+        default=500,
+        help='Request budget per minute in async mode (default: 500)'
+    )
+    parser.add_argument(
+        '--max-retries',
+        type=int,
+        default=3,
+        help='Attempts per post in async mode (default: 3)'
+    )
+    parser.add_argument(
+        '--max-rate-limit-retries',
+        type=int,
+        default=10,
+        help='Rate limits tolerated per post in async mode before it counts '
+             'as an error (default: 10)'
+    )
+
+    # Reading options
+    parser.add_argument(
+        '--page-size',
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        help=f'Posts fetched from Supabase per page (default: {DEFAULT_PAGE_SIZE})'
+    )
+
+    # Local parser options
+    parser.add_argument(
+        '--no-local-parser',
         action='store_true',
-        help='Reprocess posts even if they have been processed before'
+        help='Send every post to OpenAI instead of parsing regular posts locally'
+    )
+    parser.add_argument(
+        '--parser-threshold',
+        type=float,
+        default=DEFAULT_MIN_CONFIDENCE,
+        help=f'Minimum local parser confidence to skip OpenAI '
+             f'(default: {DEFAULT_MIN_CONFIDENCE})'
+    )
+
+    # Writing options
+    parser.add_argument(
+        '--write-batch-size',
+        type=int,
+        default=500,
+        help='Rows per bulk Supabase upsert (default: 500)'
+    )
+    parser.add_argument(
+        '--write-interval',
+        type=float,
+        default=5.0,
+        help='Seconds before buffered rows are written anyway (default: 5)'
+    )
+
+    # Batch API options
+    parser.add_argument(
+        '--batch-file',
+        default='post_batch.jsonl',
+        help='Where to write the batch request file (default: post_batch.jsonl)'
+    )
+    parser.add_argument(
+        '--batch-id',
+        help='Resume waiting for a previously submitted batch'
+    )
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=30.0,
+        help='Seconds between batch status checks (default: 30)'
     )
 
     return parser.parse_args()
@@ -352,21 +643,33 @@ def main():
 
         # Initialize clients
         supabase = create_client(supabase_url, supabase_key)
-        openai_client = openai.Client(api_key=openai_key)
-
-        # Get posts
-        posts = get_posts(supabase, args)
-        print(f"\nFound {len(posts)} posts")
+        require_content_hashes(supabase)
+
+        # Process posts as they stream in from Supabase
+        if args.async_mode:
+            openai_client = openai.AsyncOpenAI(api_key=openai_key)
+            posts = stream_rows(supabase, 'fb_group_posts', POST_COLUMNS,
+                                post_filters(args), args.page_size)
+            counts = asyncio.run(
+                process_posts_async(supabase, openai_client, posts, args))
+        elif args.batch_mode:
+            openai_client = openai.Client(api_key=openai_key)
+            counts = process_posts_batch(
+                supabase, openai_client, get_posts(supabase, args), args)
+        else:
+            openai_client = openai.Client(api_key=openai_key)
+            counts = process_posts(
+                supabase, openai_client, get_posts(supabase, args), args)
+        processed_count, skipped_count, empty_count, error_count = counts
 
-        # Process posts
-        if posts:
-            processed_count, skipped_count, error_count = process_posts(
-                supabase, openai_client, posts, args)
+        total_count = processed_count + skipped_count + empty_count + error_count
+        if total_count:
             print(f"\nProcessing summary:")
             print(f"Successfully processed: {processed_count}")
-            print(f"Skipped (already processed): {skipped_count}")
+            print(f"Skipped (unchanged): {skipped_count}")
+            print(f"Skipped (no raw_post): {empty_count}")
             print(f"Errors: {error_count}")
-            print(f"Total posts considered: {len(posts)}")
+            print(f"Total posts considered: {total_count}")
         else:
             print("No posts to process")
 
@@ -0,0 +1,77 @@
+# src/processor/reconstruction.py
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Rows sent to a worker process per task
+DEFAULT_CHUNK_SIZE = 64
+
+
+def _convert_many(
+    convert: Callable[[dict], str],
+    documents: List[dict]
+) -> List[Tuple[Optional[str], Optional[str]]]:
+    """(text, error) for each document; one failing post doesn't fail the rest"""
+    results = []
+    for document in documents:
+        try:
+            results.append((convert(document), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+
+def reconstruct_rows(
+    rows: Iterable[Dict],
+    convert: Callable[[dict], str],
+    workers: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    column: str = 'processed_post_json'
+) -> Iterator[Tuple[Dict, Optional[str], Optional[str]]]:
+    """Yield (row, text, error) for each row's JSON in `column`, in order.
+
+    `convert` turns one JSON document into text, e.g. thread_walker's
+    convert_json_to_text; it must be a module-level function so worker
+    processes can unpickle it.
+
+    With `workers` > 0, rows are converted in a process pool, `chunk_size`
+    rows per task. Up to two tasks per worker are in flight while the
+    caller reads further rows and handles finished ones, so paging reads
+    and writes overlap with the conversion. Only the JSON is sent to the
+    workers; rows stay in this process. `error` is set instead of `text`
+    for rows that fail to convert.
+    """
+    rows = iter(rows)
+    if workers <= 0:
+        for row in rows:
+            (text, error), = _convert_many(convert, [row[column]])
+            yield row, text, error
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        def submit() -> bool:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return False
+            pending.append((chunk, executor.submit(
+                _convert_many, convert, [row[column] for row in chunk])))
+            return True
+
+        try:
+            more = True
+            while more and len(pending) < 2 * workers:
+                more = submit()
+
+            while pending:
+                chunk, future = pending.popleft()
+                # Keep the pool busy while this chunk is handed out
+                if more:
+                    more = submit()
+                for row, (text, error) in zip(chunk, future.result()):
+                    yield row, text, error
+        finally:
+            for _, future in pending:
+                future.cancel()
@@ -0,0 +1,305 @@
+# src/processor/retriever.py
+import asyncio
+import hashlib
+import json
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_TOP_K = 5
+
+# Query embeddings only change with the model, so they can live long
+DEFAULT_EMBEDDING_TTL = 24 * 3600
+# Results go stale as posts are upserted, so keep them briefly
+DEFAULT_RESULT_TTL = 60
+
+# Recent queries kept for latency percentiles
+DEFAULT_LATENCY_WINDOW = 1000
+
+# Reciprocal-rank fusion constant; 60 is the value from the original paper
+RRF_K = 60
+
+# Matches taken from each ranking before fusing hybrid results
+DEFAULT_FUSION_CANDIDATES = 20
+
+
+def normalize_query(text: str) -> str:
+    """Canonical form of a query: NFKC, with whitespace collapsed"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def vector_key(vector: np.ndarray) -> str:
+    """Short hash of a query vector's float32 bytes"""
+    data = np.ascontiguousarray(vector, dtype=np.float32).tobytes()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class TTLCache:
+    """Least-recently-used cache whose entries also expire after `ttl` seconds"""
+
+    def __init__(
+        self,
+        max_items: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > self.clock():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, value: Any):
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_items:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self._entries),
+        }
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[Dict]],
+    k: int = RRF_K,
+    top_k: Optional[int] = None
+) -> List[Dict]:
+    """Fuse ranked match lists by summing 1 / (k + rank) per match ID.
+
+    Each fused match is the first one seen for its ID, with `score`
+    replaced by the fused score.
+    """
+    scores: Dict[str, float] = {}
+    first: Dict[str, Dict] = {}
+    for matches in rankings:
+        for rank, match in enumerate(matches, start=1):
+            scores[match['id']] = scores.get(match['id'], 0.0) + 1 / (k + rank)
+            first.setdefault(match['id'], match)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [{**first[match_id], 'score': scores[match_id]} for match_id in ranked]
+
+
+def _matches(response) -> List[Dict]:
+    """Matches of a Pinecone or LocalVectorIndex query response as dicts"""
+    matches = response['matches'] if isinstance(response, dict) else response.matches
+    return [match if isinstance(match, dict) else match.to_dict()
+            for match in matches]
+
+
+def _copy_match(match: Dict) -> Dict:
+    """Copy of a match whose fields and metadata can be edited freely"""
+    copied = dict(match)
+    if isinstance(copied.get('metadata'), dict):
+        copied['metadata'] = dict(copied['metadata'])
+    return copied
+
+
+class Retriever:
+    """Turns questions into ranked chunks from a vector index.
+
+    `embedder` is an Embedder (anything with `embed_texts`) and `index` a
+    Pinecone index or LocalVectorIndex. Query embeddings are cached by
+    normalized query text, and query results by (namespace, vector hash,
+    top_k, filter), so repeated questions skip both the embedding API
+    and the index. Batches of questions are embedded in one request.
+
+    With a `keyword_index` (a BM25Index), the question is also run as a
+    keyword query and both rankings are fused with reciprocal-rank
+    fusion, so exact names that embeddings blur still surface.
+
+    With a `chunk_store`, matches whose metadata was uploaded without
+    text get it from the store, in one lookup per query.
+    """
+
+    def __init__(
+        self,
+        embedder,
+        index,
+        namespace: Optional[str] = None,
+        top_k: int = DEFAULT_TOP_K,
+        include_metadata: bool = True,
+        embedding_cache_size: int = 10_000,
+        embedding_ttl: float = DEFAULT_EMBEDDING_TTL,
+        result_cache_size: int = 1_000,
+        result_ttl: float = DEFAULT_RESULT_TTL,
+        latency_window: int = DEFAULT_LATENCY_WINDOW,
+        keyword_index=None,
+        fusion_candidates: int = DEFAULT_FUSION_CANDIDATES,
+        chunk_store=None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.embedder = embedder
+        self.index = index
+        self.namespace = namespace
+        self.top_k = top_k
+        self.include_metadata = include_metadata
+        self.embedding_cache = TTLCache(embedding_cache_size, embedding_ttl, clock)
+        self.result_cache = TTLCache(result_cache_size, result_ttl, clock)
+        self.keyword_index = keyword_index
+        self.fusion_candidates = fusion_candidates
+        self.chunk_store = chunk_store
+        self.query_count = 0
+        self._latencies = deque(maxlen=latency_window)
+
+    async def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed queries, sending only uncached distinct ones in one batch"""
+        keys = [normalize_query(query) for query in queries]
+        vectors = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            vector = self.embedding_cache.get(key)
+            if vector is None:
+                missing.append(key)
+            else:
+                vectors[key] = vector
+
+        if missing:
+            embeddings = await self.embedder.embed_texts(missing)
+            for key, vector in zip(missing, embeddings):
+                self.embedding_cache.put(key, vector)
+                vectors[key] = vector
+
+        return np.stack([vectors[key] for key in keys])
+
+    async def _dense_query(
+        self,
+        vector: np.ndarray,
+        top_k: int,
+        namespace: Optional[str],
+        filter: Optional[Dict]
+    ) -> List[Dict]:
+        # Pinecone's client blocks on the network
+        response = await asyncio.to_thread(
+            self.index.query,
+            vector=vector.tolist(),
+            top_k=top_k,
+            namespace=namespace,
+            filter=filter,
+            include_metadata=self.include_metadata
+        )
+        return _matches(response)
+
+    async def _hybrid_query(
+        self,
+        query: str,
+        vector: np.ndarray,
+        top_k: int,
+        namespace: Optional[str],
+        filter: Optional[Dict]
+    ) -> List[Dict]:
+        candidates = max(top_k, self.fusion_candidates)
+        dense, keyword = await asyncio.gather(
+            self._dense_query(vector, candidates, namespace, filter),
+            asyncio.to_thread(
+                self.keyword_index.query, query, top_k=candidates,
+                filter=filter, include_metadata=self.include_metadata)
+        )
+        return reciprocal_rank_fusion([dense, _matches(keyword)], top_k=top_k)
+
+    async def _query(
+        self,
+        query: str,
+        vector: np.ndarray,
+        top_k: int,
+        namespace: Optional[str],
+        filter: Optional[Dict]
+    ) -> Tuple[Dict, ...]:
+        """Matches for one query, shared with the result cache"""
+        key = (namespace or '', vector_key(vector), top_k,
+               json.dumps(filter, sort_keys=True) if filter else None)
+        if self.keyword_index is not None:
+            # Keyword scores depend on the text, not just its embedding
+            key += (query,)
+        matches = self.result_cache.get(key)
+        if matches is None:
+            if self.keyword_index is None:
+                matches = await self._dense_query(vector, top_k, namespace, filter)
+            else:
+                matches = await self._hybrid_query(query, vector, top_k, namespace, filter)
+            if self.chunk_store is not None and self.include_metadata:
+                matches = await asyncio.to_thread(self.chunk_store.hydrate, matches)
+            matches = tuple(matches)
+            self.result_cache.put(key, matches)
+        return matches
+
+    async def retrieve_many(
+        self,
+        queries: List[str],
+        top_k: Optional[int] = None,
+        filter: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> List[List[Dict]]:
+        """Ranked matches for each query, in query order"""
+        if not queries:
+            return []
+        start = time.perf_counter()
+        top_k = top_k or self.top_k
+        namespace = namespace if namespace is not None else self.namespace
+
+        # Repeated queries in a batch share one embedding and one index query
+        keys = [normalize_query(query) for query in queries]
+        distinct = list(dict.fromkeys(keys))
+        vectors = await self.embed_queries(distinct)
+        matches = await asyncio.gather(*(
+            self._query(key, vector, top_k, namespace, filter)
+            for key, vector in zip(distinct, vectors)
+        ))
+        by_key = dict(zip(distinct, matches))
+        # Callers get their own copies, so editing a match can't change
+        # the cached results or another query's
+        results = [[_copy_match(match) for match in by_key[key]] for key in keys]
+
+        # Every query in a batch waits for the whole batch
+        elapsed = time.perf_counter() - start
+        self._latencies.extend([elapsed] * len(queries))
+        self.query_count += len(queries)
+        return results
+
+    async def retrieve(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        filter: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> List[Dict]:
+        """Ranked matches for one query"""
+        results = await self.retrieve_many([query], top_k, filter, namespace)
+        return results[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Query count, cache hit rates and p50/p99 latency in milliseconds"""
+        latencies = np.array(self._latencies) * 1000
+        return {
+            'queries': self.query_count,
+            'embedding_cache': self.embedding_cache.stats(),
+            'result_cache': self.result_cache.stats(),
+            'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+            'p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else 0.0,
+        }
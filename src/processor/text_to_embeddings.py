@@ -1,15 +1,29 @@
 import os
+import sys
 import argparse
+import asyncio
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Optional
+from pathlib import Path
+from typing import AsyncIterable, Iterable, List, Dict, Optional
 from dotenv import load_dotenv
 from supabase import create_client
+import numpy as np
 
+from bm25_index import BM25Index
+from chunk_store import ChunkStore, DEFAULT_CHUNK_STORE_PATH
 from chunker import DocumentChunker, Chunk
-from embedder import Embedder
+from content_hash import content_hash, diff_hashes
+from embedder import Embedder, BatchAccumulator, EmbeddingBatch
+from embedding_cache import EmbeddingCache, DEFAULT_CACHE_PATH
 from uploader import PineconeUploader
 
+# Make the shared src.database helpers importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.database.client import (  # noqa: E402
+    DEFAULT_PAGE_SIZE, BulkWriter, require_content_hashes, stream_rows)
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -26,9 +40,44 @@ DEFAULT_ENV = "dev"
 DEFAULT_PREFIX = "fb"
 DEFAULT_VERSION = "v1"
 
+CHUNK_SIZE = 500  # tokens
+CHUNK_OVERLAP = 50  # tokens
+
+# Marks the end of a pipeline queue
+_DONE = object()
+
+# Chunker owned by each chunking worker process
+_worker_chunker: Optional[DocumentChunker] = None
+
+
+def _init_chunk_worker(chunk_size: int, chunk_overlap: int):
+    """Create the chunker once per worker process."""
+    global _worker_chunker
+    _worker_chunker = DocumentChunker(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap
+    )
+
+
+def _chunk_in_worker(text: str, metadata: Dict, doc_id: str) -> List[Chunk]:
+    """Split a document inside a chunking worker process."""
+    return _worker_chunker.split(text=text, metadata=metadata, doc_id=doc_id)
+
 
 class TextProcessor:
-    def __init__(self, namespace: str = None):
+    def __init__(
+        self,
+        namespace: str = None,
+        use_embedding_cache: bool = True,
+        chunk_workers: int = 0,
+        embed_concurrency: int = 2,
+        upsert_concurrency: int = 2,
+        queue_size: int = 32,
+        embed_flush_timeout: float = 0.5,
+        embed_pending_docs: int = 256,
+        keyword_index_path: Optional[str] = None,
+        chunk_store_path: Optional[str] = None
+    ):
         # Load environment variables
         load_dotenv()
         self._init_clients()
@@ -37,9 +86,18 @@ class TextProcessor:
         self.namespace = namespace or self._get_default_namespace()
         logger.info(f"Using namespace: {self.namespace}")
 
+        # Pipeline settings; chunk_workers=0 chunks in the event loop
+        self.chunk_workers = chunk_workers
+        self.embed_concurrency = embed_concurrency
+        self.upsert_concurrency = upsert_concurrency
+        self.queue_size = queue_size
+        # Chunks from many documents are pooled into full embedding batches
+        self.embed_flush_timeout = embed_flush_timeout
+        self.embed_pending_docs = embed_pending_docs
+
         # Initialize processors
-        chunk_size = 500  # tokens
-        chunk_overlap = 50  # tokens
+        chunk_size = CHUNK_SIZE
+        chunk_overlap = CHUNK_OVERLAP
 
         logger.info(f"Initializing chunker with size: {
                     chunk_size} tokens, overlap: {chunk_overlap} tokens")
@@ -48,11 +106,35 @@ class TextProcessor:
             chunk_overlap=chunk_overlap
         )
 
+        # Reuse embeddings of unchanged chunk text across runs
+        self.embedding_cache = None
+        if use_embedding_cache:
+            cache_path = os.getenv('EMBEDDING_CACHE_PATH', DEFAULT_CACHE_PATH)
+            logger.info(f"Using embedding cache: {cache_path}")
+            self.embedding_cache = EmbeddingCache(cache_path)
+
         self.embedder = Embedder(
             dimension=1536,  # for text-embedding-3-small
-            batch_size=100
+            batch_size=100,
+            cache=self.embedding_cache
         )
 
+        # Optional BM25 index kept in step with the uploaded chunks
+        self.keyword_index_path = keyword_index_path
+        self.keyword_index = None
+        if keyword_index_path:
+            if os.path.exists(keyword_index_path):
+                self.keyword_index = BM25Index.load(keyword_index_path)
+            else:
+                logger.info(f"Creating keyword index: {keyword_index_path}")
+                self.keyword_index = BM25Index()
+
+        # Chunk text kept locally instead of in Pinecone metadata
+        self.chunk_store = None
+        if chunk_store_path:
+            logger.info(f"Storing chunk text in: {chunk_store_path}")
+            self.chunk_store = ChunkStore(chunk_store_path)
+
         self.uploader = PineconeUploader(
             api_key=os.getenv('PINECONE_API_KEY'),
             index_name=os.getenv('PINECONE_INDEX_NAME'),
@@ -87,12 +169,16 @@ class TextProcessor:
             required_vars['SUPABASE_URL'],
             required_vars['SUPABASE_KEY']
         )
+        require_content_hashes(self.supabase)
+
+    def apply_constraints(self, query, args: argparse.Namespace):
+        """Add the selected constraints to a Supabase query."""
+        query = query.not_.is_('reconstructed_post', 'null')
 
-    def build_query(self, args: argparse.Namespace):
-        """Build Supabase query based on constraints."""
-        query = self.supabase.table('fb_group_posts') \
-            .select('id, reconstructed_post, created_at') \
-            .not_.is_('reconstructed_post', 'null')
+        # Only posts whose text changed since their vectors were uploaded
+        # (a computed column, see migrations/002)
+        if not args.force:
+            query = query.is_('reconstructed_stale', 'true')
 
         # Apply ID constraints
         if args.id:
@@ -113,83 +199,300 @@ class TextProcessor:
 
         return query
 
-    async def process_document(self, doc: Dict) -> tuple[int, int]:
-        """Process a single document through the pipeline."""
-        try:
-            doc_id = str(doc['id'])
-            logger.info(f"Processing document {doc_id}")
+    def stream_documents(self, args: argparse.Namespace):
+        """Stream matching documents from Supabase in id order, page by page."""
+        return stream_rows(
+            self.supabase, 'fb_group_posts',
+            'id, reconstructed_post, created_at, reconstructed_hash, chunk_hashes',
+            lambda query: self.apply_constraints(query, args),
+            args.page_size
+        )
 
-            # Create chunks
-            chunks = self.chunker.split(
-                text=doc['reconstructed_post'],
-                metadata={
+    def _chunk_args(self, doc: Dict) -> tuple[str, Dict, str]:
+        """Arguments for chunking a document."""
+        doc_id = str(doc['id'])
+        metadata = {
+            'doc_id': doc_id,
+            'created_at': doc['created_at'],
+            'category': CATEGORY,
+            'source': SOURCE,
+            'version': VERSION
+        }
+        return doc['reconstructed_post'], metadata, doc_id
+
+    def _diff_chunks(
+        self,
+        doc: Dict,
+        chunks: List[Chunk],
+        force: bool = False
+    ) -> tuple[List[Chunk], Dict[str, str], List[str]]:
+        """Compare a document's chunks with the chunk set uploaded last time.
+
+        Returns the chunks that are new or changed (all of them with
+        `force`), the {vector id: text hash} of the whole new set, and the
+        vector IDs of chunks that no longer exist.
+        """
+        doc_id = str(doc['id'])
+        hashes = {
+            self._vector_id(doc_id, chunk): content_hash(chunk.text)
+            for chunk in chunks
+        }
+        changed, removed = diff_hashes(doc.get('chunk_hashes'), hashes)
+        if not force:
+            changed = set(changed)
+            chunks = [chunk for chunk in chunks
+                      if self._vector_id(doc_id, chunk) in changed]
+        return chunks, hashes, removed
+
+    @staticmethod
+    def _vector_id(doc_id: str, chunk: Chunk) -> str:
+        return f"{doc_id}-{chunk.chunk_index}"
+
+    def _build_vectors(
+        self,
+        doc: Dict,
+        chunks: List[Chunk],
+        embeddings: np.ndarray
+    ) -> EmbeddingBatch:
+        """Prepare Pinecone vectors for a document's chunks."""
+        doc_id = str(doc['id'])
+        return EmbeddingBatch(
+            ids=[self._vector_id(doc_id, chunk) for chunk in chunks],
+            vectors=embeddings,
+            metadata=[
+                {
+                    'category': CATEGORY,
+                    'chunk_index': chunk.chunk_index,
+                    'chunk_size': chunk.metadata['chunk_size'],
                     'doc_id': doc_id,
                     'created_at': doc['created_at'],
-                    'category': CATEGORY,
                     'source': SOURCE,
+                    'text': chunk.text,
+                    'token_count': chunk.metadata['token_count'],
                     'version': VERSION
-                },
-                doc_id=doc_id
-            )
-
-            # Get embeddings
-            texts = [chunk.text for chunk in chunks]
-            embeddings = await self.embedder.embed_texts(texts)
-
-            # Prepare vectors for Pinecone
-            vectors = []
-            for chunk, embedding in zip(chunks, embeddings):
-                vector = {
-                    'id': f"{doc_id}-{chunk.chunk_index}",
-                    'values': embedding,
-                    'metadata': {
-                        'category': CATEGORY,
-                        'chunk_index': chunk.chunk_index,
-                        'chunk_size': chunk.metadata['chunk_size'],
-                        'doc_id': doc_id,
-                        'created_at': doc['created_at'],
-                        'source': SOURCE,
-                        'text': chunk.text,
-                        'token_count': chunk.metadata['token_count'],
-                        'version': VERSION
-                    }
                 }
-                vectors.append(vector)
+                for chunk in chunks
+            ]
+        )
 
-            # Upload to Pinecone
-            await self.uploader.upload_vectors(vectors, self.namespace)
+    def _externalize_text(self, vectors: EmbeddingBatch) -> EmbeddingBatch:
+        """Move chunk text into the chunk store, leaving the small fields."""
+        self.chunk_store.put_many(
+            vectors.ids, [metadata['text'] for metadata in vectors.metadata])
+        return EmbeddingBatch(
+            ids=vectors.ids,
+            vectors=vectors.vectors,
+            metadata=[
+                {key: value for key, value in metadata.items() if key != 'text'}
+                for metadata in vectors.metadata
+            ]
+        )
 
-            logger.info(f"Successfully processed document {
-                        doc_id} into {len(chunks)} chunks")
-            return len(chunks), 0  # chunks processed, errors
+    async def _run_stage(
+        self,
+        name: str,
+        handle,
+        inbox: asyncio.Queue,
+        outbox: Optional[asyncio.Queue],
+        concurrency: int,
+        totals: Dict[str, int],
+        on_exhausted=None
+    ):
+        """Run `concurrency` workers applying `handle` to (doc, ...) items.
+
+        A failing document is counted as one error and dropped; everything
+        else is passed on to `outbox`, which is closed once all workers stop.
+        `on_exhausted` is called whenever a worker reaches the end of `inbox`.
+        """
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    # Let the sibling workers see the end of the queue too
+                    await inbox.put(_DONE)
+                    if on_exhausted is not None:
+                        on_exhausted()
+                    return
+
+                doc = item[0]
+                try:
+                    result = await handle(*item)
+                except Exception as e:
+                    logger.error(f"Error processing document {doc['id']} "
+                                 f"in {name} stage: {str(e)}")
+                    totals['errors'] += 1
+                    continue
+
+                if outbox is not None:
+                    await outbox.put(result)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        if outbox is not None:
+            await outbox.put(_DONE)
+
+    async def _embed_stage(
+        self,
+        inbox: asyncio.Queue,
+        outbox: asyncio.Queue,
+        totals: Dict[str, int]
+    ):
+        """Embed chunks of many documents together in shared batches.
+
+        Up to `embed_pending_docs` documents wait on the accumulator at once,
+        so batches fill up even when each post has only one or two chunks.
+        """
+        accumulator = BatchAccumulator(
+            self.embedder,
+            flush_timeout=self.embed_flush_timeout,
+            max_in_flight=self.embed_concurrency
+        )
 
-        except Exception as e:
-            logger.error(f"Error processing document {doc_id}: {str(e)}")
-            return 0, 1  # chunks processed, errors
+        async def embed(doc: Dict, chunks: List[Chunk], *diff):
+            texts = [chunk.text for chunk in chunks]
+            token_counts = [chunk.metadata['token_count'] for chunk in chunks]
+            embeddings = await accumulator.embed(texts, token_counts)
+            return doc, self._build_vectors(doc, chunks, embeddings), *diff
 
-    async def process_documents(self, args: argparse.Namespace) -> tuple[int, int]:
-        """Process documents based on provided constraints."""
         try:
-            # Build and execute query
-            query = self.build_query(args)
-            response = query.execute()
-
-            if not response.data:
-                logger.info("No documents found matching the criteria")
-                return 0, 0
-
-            logger.info(f"Found {len(response.data)} documents to process")
-
-            total_chunks = 0
-            total_errors = 0
+            # Once the input is exhausted, don't wait out the flush timeout
+            await self._run_stage('embed', embed, inbox, outbox,
+                                  self.embed_pending_docs, totals,
+                                  on_exhausted=accumulator.flush)
+        finally:
+            await accumulator.drain()
+
+    async def run_pipeline(
+        self,
+        docs: Iterable[Dict] | AsyncIterable[Dict],
+        force: bool = False
+    ) -> tuple[int, int]:
+        """Chunk, embed and upsert documents in overlapping stages.
+
+        Each stage reads from a bounded queue, so a slow stage applies
+        backpressure to the ones before it, all the way back to the
+        Supabase reader when `docs` is a stream.
+
+        Only chunks that differ from a document's stored `chunk_hashes`
+        are embedded and upserted, and chunks that disappeared are
+        deleted; `force` re-uploads every chunk. The new chunk set and
+        the hash of the text it came from are then saved to Supabase.
+
+        The uploader and chunk store are closed when the pipeline ends,
+        so a processor runs it once.
+        """
+        totals = {'docs': 0, 'chunks': 0, 'unchanged': 0, 'deleted': 0,
+                  'errors': 0}
+        writer = BulkWriter(self.supabase, 'fb_group_posts')
+        doc_queue = asyncio.Queue(maxsize=self.queue_size)
+        chunk_queue = asyncio.Queue(maxsize=self.queue_size)
+        vector_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        loop = asyncio.get_running_loop()
+        executor = None
+        if self.chunk_workers > 0:
+            executor = ProcessPoolExecutor(
+                max_workers=self.chunk_workers,
+                initializer=_init_chunk_worker,
+                initargs=(CHUNK_SIZE, CHUNK_OVERLAP)
+            )
 
-            # Process each document
-            for doc in response.data:
-                chunks, errors = await self.process_document(doc)
-                total_chunks += chunks
-                total_errors += errors
+        async def chunk(doc: Dict):
+            logger.info(f"Processing document {doc['id']}")
+            args = self._chunk_args(doc)
+            if executor is not None:
+                chunks = await loop.run_in_executor(executor, _chunk_in_worker, *args)
+            else:
+                chunks = self.chunker.split(*args)
+            return (doc, *self._diff_chunks(doc, chunks, force))
+
+        async def upsert(doc: Dict, vectors: EmbeddingBatch,
+                         hashes: Dict[str, str], removed: List[str]):
+            texts = [metadata['text'] for metadata in vectors.metadata]
+            if self.chunk_store is not None:
+                # Stored before the upsert, so no query finds a vector
+                # whose text is missing
+                vectors = await asyncio.to_thread(self._externalize_text, vectors)
+            if len(vectors):
+                await self.uploader.upload_vectors(vectors, self.namespace)
+            if removed:
+                await self.uploader.delete_vectors(removed, self.namespace)
+                if self.chunk_store is not None:
+                    await asyncio.to_thread(self.chunk_store.delete_many, removed)
+            if self.keyword_index is not None:
+                # Tokenizing and merging postings is CPU work, keep it off
+                # the event loop
+                await asyncio.to_thread(
+                    self.keyword_index.upsert, vectors.ids, texts, vectors.metadata)
+                await asyncio.to_thread(self.keyword_index.delete, removed)
+            # A flush is a synchronous Supabase call, keep it off the event loop
+            await asyncio.to_thread(writer.add, {
+                'id': doc['id'],
+                'reconstructed_hash': content_hash(doc['reconstructed_post']),
+                'chunk_hashes': hashes
+            })
+            totals['chunks'] += len(vectors)
+            totals['unchanged'] += len(hashes) - len(vectors)
+            totals['deleted'] += len(removed)
+            logger.info(f"Successfully processed document {doc['id']}: "
+                        f"{len(vectors)} of {len(hashes)} chunks upserted, "
+                        f"{len(removed)} deleted")
+
+        async def feed():
+            if hasattr(docs, '__aiter__'):
+                async for doc in docs:
+                    totals['docs'] += 1
+                    await doc_queue.put((doc,))
+            else:
+                for doc in docs:
+                    totals['docs'] += 1
+                    await doc_queue.put((doc,))
+            await doc_queue.put(_DONE)
+
+        stages = [
+            asyncio.create_task(feed()),
+            asyncio.create_task(self._run_stage(
+                'chunk', chunk, doc_queue, chunk_queue,
+                max(1, self.chunk_workers), totals)),
+            asyncio.create_task(self._embed_stage(chunk_queue, vector_queue, totals)),
+            asyncio.create_task(self._run_stage(
+                'upsert', upsert, vector_queue, None,
+                self.upsert_concurrency, totals))
+        ]
+        try:
+            done, _ = await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+            for stage in done:
+                stage.result()
+        finally:
+            # A failed stage would leave the others waiting on its queue
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            if executor is not None:
+                executor.shutdown()
+            await asyncio.to_thread(writer.close)
+            # Waits for upserts still running in the uploader's thread pool
+            await asyncio.to_thread(self.uploader.close)
+            if self.chunk_store is not None:
+                self.chunk_store.close()
+            if self.keyword_index is not None:
+                await asyncio.to_thread(self.keyword_index.save,
+                                        self.keyword_index_path)
+
+        if writer.failed_ids:
+            # Their vectors are current, but the next run will diff them again
+            logger.error(f"Failed to save chunk hashes - IDs: {
+                         ', '.join(map(str, sorted(writer.failed_ids)))}")
+        if not totals['docs']:
+            logger.info("No documents found matching the criteria")
+        else:
+            logger.info(f"Chunks upserted: {totals['chunks']}, unchanged: "
+                        f"{totals['unchanged']}, deleted: {totals['deleted']}")
+        return totals['chunks'], totals['errors'] + len(writer.failed_ids)
 
-            return total_chunks, total_errors
+    async def process_documents(self, args: argparse.Namespace) -> tuple[int, int]:
+        """Process documents based on provided constraints."""
+        try:
+            return await self.run_pipeline(self.stream_documents(args), args.force)
 
         except Exception as e:
             logger.error(f"Error in document processing: {str(e)}")
@@ -248,6 +551,78 @@ def parse_arguments():
         help='Override default namespace (default: dev-fb-v1)'
     )
 
+    # Pipeline tuning
+    parser.add_argument(
+        '--chunk-workers',
+        type=int,
+        default=0,
+        help='Chunking worker processes (default: 0, chunk in the main process)'
+    )
+    parser.add_argument(
+        '--embed-concurrency',
+        type=int,
+        default=2,
+        help='Cross-document embedding batches in flight at once (default: 2)'
+    )
+    parser.add_argument(
+        '--upsert-concurrency',
+        type=int,
+        default=2,
+        help='Concurrent upsert stage workers (default: 2)'
+    )
+    parser.add_argument(
+        '--page-size',
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        help=f'Documents fetched from Supabase per page (default: {DEFAULT_PAGE_SIZE})'
+    )
+    parser.add_argument(
+        '--queue-size',
+        type=int,
+        default=32,
+        help='Documents buffered between pipeline stages (default: 32)'
+    )
+    parser.add_argument(
+        '--embed-flush-timeout',
+        type=float,
+        default=0.5,
+        help='Seconds to wait for a full cross-document embedding batch '
+             '(default: 0.5, 0 sends each document\'s chunks right away)'
+    )
+
+    # Incremental processing
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Re-embed and upsert every chunk of the selected posts, '
+             'even if the post text is unchanged'
+    )
+
+    # Keyword index
+    parser.add_argument(
+        '--keyword-index',
+        type=str,
+        help='BM25 index file (.npz) to update with the upserted chunks; '
+             'build it once with --force so it covers unchanged posts too'
+    )
+
+    # Chunk text store
+    parser.add_argument(
+        '--chunk-store',
+        nargs='?',
+        const=DEFAULT_CHUNK_STORE_PATH,
+        help='Keep chunk text in a local SQLite store instead of Pinecone '
+             f'metadata (default path: {DEFAULT_CHUNK_STORE_PATH}); '
+             'build it once with --force so it covers unchanged posts too'
+    )
+
+    # Embedding cache
+    parser.add_argument(
+        '--no-embedding-cache',
+        action='store_true',
+        help='Embed every chunk without consulting the local embedding cache'
+    )
+
     return parser.parse_args()
 
 
@@ -265,7 +640,17 @@ async def main():
             )
 
         # Initialize processor
-        processor = TextProcessor()
+        processor = TextProcessor(
+            namespace=args.namespace,
+            use_embedding_cache=not args.no_embedding_cache,
+            chunk_workers=args.chunk_workers,
+            embed_concurrency=args.embed_concurrency,
+            upsert_concurrency=args.upsert_concurrency,
+            queue_size=args.queue_size,
+            embed_flush_timeout=args.embed_flush_timeout,
+            keyword_index_path=args.keyword_index,
+            chunk_store_path=args.chunk_store
+        )
 
         # Process documents
         logger.info("Starting document processing...")
@@ -288,6 +673,12 @@ async def main():
         logger.info("\nProcessing complete:")
         logger.info(f"Chunks processed: {chunks_processed}")
         logger.info(f"Errors: {errors}")
+        logger.info(f"Embedding requests: {processor.embedder.request_count}")
+        if processor.embedding_cache:
+            stats = processor.embedding_cache.stats()
+            logger.info(
+                f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_rate']:.1%} hit rate, {stats['size_bytes']:,} bytes)")
 
     except Exception as e:
         logger.error(f"Fatal error: {str(e)}")
@@ -0,0 +1,79 @@
+# src/processor/thread_walker.py
+import io
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+# Heading of a node's text by depth; anything deeper than a comment is a reply
+HEADINGS = ("Post", "Comment", "Reply")
+
+PART_SEPARATOR = "\n\n"
+
+
+@dataclass
+class ThreadSummary:
+    """Everything a single walk over a processed post produces.
+
+    `author_counts` counts every post, comment and reply by author, and
+    `comment_author_counts` only the comments and replies. `depth_counts`
+    maps depth (0 for posts, 1 for comments, 2+ for replies) to nodes.
+    """
+    text: str = ""
+    author_counts: Counter = field(default_factory=Counter)
+    comment_author_counts: Counter = field(default_factory=Counter)
+    depth_counts: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def max_depth(self) -> int:
+        return max(self.depth_counts, default=0)
+
+
+def _children(node: Dict) -> List[Dict]:
+    return (node.get('comments') or {}).get('data') or []
+
+
+def walk_thread(json_data: Dict, render: bool = True) -> ThreadSummary:
+    """Walk a processed post of any depth once, depth first.
+
+    An explicit stack replaces recursion, so deep threads cannot hit the
+    recursion limit. The text is written into a single buffer in the
+    format json_to_text has always produced; pass `render=False` when only
+    the counts are needed.
+    """
+    summary = ThreadSummary()
+    buffer = io.StringIO() if render else None
+    depth_counts = Counter()
+
+    # Reversed so nodes come off the stack in document order
+    stack = [(post, 0) for post in reversed(json_data.get('data') or [])]
+    while stack:
+        node, depth = stack.pop()
+        author = node.get('author')
+        if author:
+            summary.author_counts[author] += 1
+            if depth:
+                summary.comment_author_counts[author] += 1
+        depth_counts[depth] += 1
+
+        if buffer is not None:
+            if buffer.tell():
+                buffer.write(PART_SEPARATOR)
+            if depth:
+                buffer.write("\n")
+            heading = HEADINGS[min(depth, len(HEADINGS) - 1)]
+            buffer.write(f"{heading} by {node.get('author', 'Unknown')} "
+                         f"on {node.get('created_time', '')}:")
+            buffer.write(PART_SEPARATOR)
+            buffer.write(node.get('message') or '')
+
+        stack.extend((child, depth + 1) for child in reversed(_children(node)))
+
+    summary.depth_counts = dict(sorted(depth_counts.items()))
+    if buffer is not None:
+        summary.text = buffer.getvalue()
+    return summary
+
+
+def convert_json_to_text(json_data: Dict) -> str:
+    """Convert JSON structure to readable text format."""
+    return walk_thread(json_data).text
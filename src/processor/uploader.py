@@ -1,12 +1,82 @@
 # src/processor/uploader.py
-from pinecone import Pinecone
-from typing import List, Dict, Optional
+from pinecone import Pinecone, ServerlessSpec
+from typing import List, Dict, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 import asyncio
+import json
+import threading
+import time
+import numpy as np
 from tenacity import retry, stop_after_attempt, wait_exponential
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Pinecone rejects upsert requests larger than 2 MB; leave some headroom
+MAX_BATCH_BYTES = 2 * 1024 * 1024 - 64 * 1024
+
+# Approximate JSON size of one float in the request body
+BYTES_PER_VALUE = 20
+
+# Pinecone deletes at most 1,000 IDs per request
+MAX_DELETE_IDS = 1000
+
+# (index name, dimension) pairs already checked by this process
+_validated_indexes: Set[Tuple[str, int]] = set()
+_validated_lock = threading.Lock()
+
+
+@dataclass
+class BatchResult:
+    batch_num: int
+    vector_ids: List[str]
+    payload_bytes: int
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class UploadError(Exception):
+    """Raised after an upload in which one or more batches failed"""
+
+    def __init__(self, results: List[BatchResult]):
+        self.results = results
+        self.failed = [result for result in results if not result.ok]
+        super().__init__(
+            f"{len(self.failed)} of {len(results)} batches failed: "
+            + "; ".join(f"batch {r.batch_num}: {r.error}" for r in self.failed)
+        )
+
+
+def estimate_vector_bytes(vector_id: str, metadata: Dict, dimension: int) -> int:
+    """Estimate a vector's share of the upsert request body"""
+    metadata_json = json.dumps(metadata or {}, ensure_ascii=False)
+    return (len(vector_id) + len(metadata_json.encode('utf-8'))
+            + dimension * BYTES_PER_VALUE)
+
+
+def as_columns(vectors) -> Tuple[List[str], np.ndarray, List[Dict]]:
+    """Return the IDs, float32 value matrix and metadata of vectors.
+
+    Accepts an EmbeddingBatch, whose matrix is used as is, or a list of
+    Pinecone-style vector dicts.
+    """
+    if hasattr(vectors, 'vectors'):
+        return vectors.ids, vectors.vectors, vectors.metadata
+
+    ids = [vector['id'] for vector in vectors]
+    metadata = [vector.get('metadata') or {} for vector in vectors]
+    try:
+        values = np.asarray(
+            [vector['values'] for vector in vectors], dtype=np.float32)
+    except ValueError:
+        # Ragged input: vectors of different lengths
+        values = None
+    return ids, values, metadata
+
 
 class PineconeUploader:
     def __init__(
@@ -14,25 +84,60 @@ class PineconeUploader:
         api_key: str,
         index_name: str,
         dimension: int,
-        batch_size: int = 100
+        batch_size: int = 100,
+        max_batch_bytes: int = MAX_BATCH_BYTES,
+        max_concurrency: int = 4
     ):
         self.pc = Pinecone(api_key=api_key)
         self.index_name = index_name
         self.dimension = dimension
         self.batch_size = batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self.max_concurrency = max_concurrency
         self.index = self.pc.Index(self.index_name)
+        # Dedicated pool so upserts don't compete with other executor work
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="pinecone-upsert"
+        )
 
-    def _validate_vectors(self, vectors: List[Dict]) -> None:
-        """Validate vector dimensions before upload"""
-        for vector in vectors:
-            if len(vector['values']) != self.dimension:
-                raise ValueError(
-                    f"Vector dimension mismatch. Expected {self.dimension}, "
-                    f"got {len(vector['values'])}. Vector ID: {vector['id']}"
-                )
+    def _validate_vectors(self, vectors) -> Tuple[List[str], np.ndarray, List[Dict]]:
+        """Validate vector dimensions before upload, returning the vectors
+        as (ids, values, metadata) columns"""
+        ids, values, metadata = as_columns(vectors)
+        if not ids:
+            return ids, np.empty((0, self.dimension), dtype=np.float32), metadata
+
+        shape = values.shape if values is not None else None
+        if shape != (len(ids), self.dimension):
+            if isinstance(vectors, list):
+                for vector in vectors:
+                    if len(vector['values']) != self.dimension:
+                        raise ValueError(
+                            f"Vector dimension mismatch. Expected {self.dimension}, "
+                            f"got {len(vector['values'])}. Vector ID: {vector['id']}"
+                        )
+            raise ValueError(
+                f"Vector dimension mismatch. Expected {self.dimension}, "
+                f"got array of shape {shape}"
+            )
+        return ids, values, metadata
+
+    def invalidate_index_cache(self):
+        """Forget that the index was validated, so the next upload re-checks it"""
+        with _validated_lock:
+            _validated_indexes.discard((self.index_name, self.dimension))
 
     def ensure_index_exists(self):
-        """Create index if it doesn't exist"""
+        """Create index if it doesn't exist.
+
+        The check runs once per process for each index and dimension; call
+        invalidate_index_cache() after changing the index out of band.
+        """
+        key = (self.index_name, self.dimension)
+        if key in _validated_indexes:
+            return
+
         try:
             if self.index_name not in self.pc.list_indexes().names():
                 logger.info(f"Creating index: {self.index_name}")
@@ -65,9 +170,13 @@ class PineconeUploader:
             logger.error(f"Error ensuring index exists: {str(e)}")
             raise
 
+        with _validated_lock:
+            _validated_indexes.add(key)
+
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        reraise=True
     )
     def upload_batch(
         self,
@@ -76,9 +185,6 @@ class PineconeUploader:
     ):
         """Upload a batch of vectors to Pinecone with retry logic"""
         try:
-            # Validate vectors before upload
-            self._validate_vectors(vectors)
-
             # Pinecone's upsert is synchronous
             self.index.upsert(
                 vectors=vectors,
@@ -88,32 +194,136 @@ class PineconeUploader:
             logger.error(f"Error uploading batch: {str(e)}")
             raise
 
-    async def upload_vectors(
+    def _make_batches(
         self,
-        vectors: List[Dict],
+        ids: List[str],
+        metadata: List[Dict]
+    ) -> List[Tuple[int, int, int]]:
+        """Split rows into (start, stop, payload bytes) batches bounded by
+        vector count and payload bytes"""
+        batches = []
+        start = 0
+        current_bytes = 0
+
+        for i, (vector_id, vector_metadata) in enumerate(zip(ids, metadata)):
+            size = estimate_vector_bytes(vector_id, vector_metadata, self.dimension)
+            if i > start and (i - start >= self.batch_size
+                              or current_bytes + size > self.max_batch_bytes):
+                batches.append((start, i, current_bytes))
+                start = i
+                current_bytes = 0
+            current_bytes += size
+
+        if start < len(ids):
+            batches.append((start, len(ids), current_bytes))
+        return batches
+
+    def _upload_rows(
+        self,
+        ids: List[str],
+        values: np.ndarray,
+        metadata: List[Dict],
         namespace: Optional[str] = None
     ):
-        """Upload vectors in batches"""
-        self.ensure_index_exists()
-
-        total_batches = (len(vectors) + self.batch_size - 1) // self.batch_size
-        logger.info(f"Uploading {len(vectors)} vectors in {
-                    total_batches} batches")
-
-        for i in range(0, len(vectors), self.batch_size):
-            batch = vectors[i:i + self.batch_size]
-            batch_num = i // self.batch_size + 1
-            logger.info(f"Uploading batch {batch_num}/{total_batches}")
-
-            # Run the synchronous upload in a thread pool
-            await asyncio.get_event_loop().run_in_executor(
-                None,
-                self.upload_batch,
-                batch,
-                namespace
+        """Convert rows to Pinecone's wire format and upload them"""
+        self.upload_batch(
+            [
+                {'id': vector_id, 'values': row.tolist(), 'metadata': row_metadata}
+                for vector_id, row, row_metadata in zip(ids, values, metadata)
+            ],
+            namespace
+        )
+
+    async def upload_vectors(
+        self,
+        vectors,
+        namespace: Optional[str] = None,
+        raise_on_error: bool = True
+    ) -> List[BatchResult]:
+        """Upload vectors in concurrent batches.
+
+        `vectors` is an EmbeddingBatch or a list of vector dicts; values are
+        converted to Python floats only per batch, right before its upsert.
+        Every batch is attempted even if others fail. The per-batch results
+        are returned; with `raise_on_error`, an UploadError listing the
+        failed batches is raised once all batches have finished.
+        """
+        # Validate all vectors before any network call
+        ids, values, metadata = self._validate_vectors(vectors)
+        # The check blocks on the network, and on index creation
+        await asyncio.to_thread(self.ensure_index_exists)
+
+        batches = self._make_batches(ids, metadata)
+        total_batches = len(batches)
+        logger.info(f"Uploading {len(ids)} vectors in {total_batches} batches")
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def upload(batch_num: int, start: int, stop: int, payload_bytes: int):
+            result = BatchResult(
+                batch_num=batch_num,
+                vector_ids=ids[start:stop],
+                payload_bytes=payload_bytes
             )
+            async with semaphore:
+                logger.info(f"Uploading batch {batch_num}/{total_batches} "
+                            f"({stop - start} vectors, ~{payload_bytes:,} bytes)")
+                try:
+                    # Run the synchronous upload in the upsert thread pool
+                    await loop.run_in_executor(
+                        self._executor,
+                        self._upload_rows,
+                        ids[start:stop],
+                        values[start:stop],
+                        metadata[start:stop],
+                        namespace
+                    )
+                except Exception as e:
+                    logger.error(f"Batch {batch_num}/{total_batches} failed: {str(e)}")
+                    result.error = str(e)
+            return result
 
-            if i + self.batch_size < len(vectors):
-                await asyncio.sleep(0.1)
+        results = await asyncio.gather(*(
+            upload(batch_num, start, stop, payload_bytes)
+            for batch_num, (start, stop, payload_bytes) in enumerate(batches, start=1)
+        ))
+
+        failed = [result for result in results if not result.ok]
+        if failed:
+            logger.error(f"Upload finished with {len(failed)} failed batches")
+            if raise_on_error:
+                raise UploadError(results)
+        else:
+            logger.info("Upload complete")
+
+        return results
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        reraise=True
+    )
+    def delete_batch(self, ids: List[str], namespace: Optional[str] = None):
+        """Delete a batch of vectors by ID with retry logic"""
+        try:
+            self.index.delete(ids=ids, namespace=namespace)
+        except Exception as e:
+            logger.error(f"Error deleting batch: {str(e)}")
+            raise
+
+    async def delete_vectors(self, ids: List[str], namespace: Optional[str] = None):
+        """Delete vectors by ID, in batches of at most MAX_DELETE_IDS"""
+        loop = asyncio.get_running_loop()
+        for start in range(0, len(ids), MAX_DELETE_IDS):
+            await loop.run_in_executor(
+                self._executor,
+                self.delete_batch,
+                ids[start:start + MAX_DELETE_IDS],
+                namespace
+            )
+        logger.info(f"Deleted {len(ids)} vectors")
 
-        logger.info("Upload complete")
+    def close(self):
+        """Release the upsert thread pool"""
+        self._executor.shutdown(wait=True)
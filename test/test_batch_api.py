@@ -0,0 +1,102 @@
+import contextlib
+import json
+import types
+
+from src.processor.batch_api import (
+    batch_request, iter_batch_results, submit_batch, wait_for_batch,
+    write_requests)
+
+
+class FakeBatchServer:
+    """In-memory stand-in for the files and batches endpoints.
+
+    A batch answers every request by echoing its user message as JSON,
+    except custom IDs listed in `failing`, which land in the error file.
+    """
+
+    def __init__(self, failing=(), polls_until_done=2):
+        self.failing = set(failing)
+        self.polls_until_done = polls_until_done
+        self.uploads = {}
+        self.batch = None
+        self.files = types.SimpleNamespace(
+            create=self.create_file,
+            with_streaming_response=types.SimpleNamespace(content=self.content)
+        )
+        self.batches = types.SimpleNamespace(
+            create=self.create_batch, retrieve=self.retrieve_batch)
+
+    def create_file(self, file, purpose):
+        assert purpose == "batch"
+        file_id = f"file-{len(self.uploads)}"
+        self.uploads[file_id] = file.read().decode()
+        return types.SimpleNamespace(id=file_id)
+
+    def create_batch(self, input_file_id, endpoint, completion_window, metadata):
+        output, errors = [], []
+        for line in self.uploads[input_file_id].splitlines():
+            request = json.loads(line)
+            custom_id = request["custom_id"]
+            if custom_id in self.failing:
+                errors.append({"custom_id": custom_id, "response": {
+                    "status_code": 400,
+                    "body": {"error": {"message": "bad request"}}}})
+                continue
+            message = request["body"]["messages"][-1]["content"]
+            output.append({"custom_id": custom_id, "response": {
+                "status_code": 200,
+                "body": {"choices": [{"message": {
+                    "content": json.dumps({"echo": message})}}]}}})
+
+        self.uploads["file-out"] = "\n".join(map(json.dumps, output))
+        self.uploads["file-err"] = "\n".join(map(json.dumps, errors))
+        self.batch = types.SimpleNamespace(
+            id="batch-1", status="in_progress", request_counts=None,
+            output_file_id="file-out",
+            error_file_id="file-err" if errors else None)
+        return self.batch
+
+    def retrieve_batch(self, batch_id):
+        self.polls_until_done -= 1
+        if self.polls_until_done <= 0:
+            self.batch.status = "completed"
+        return self.batch
+
+    @contextlib.contextmanager
+    def content(self, file_id):
+        lines = self.uploads[file_id].splitlines()
+        yield types.SimpleNamespace(iter_lines=lambda: iter(lines))
+
+
+def make_requests(ids):
+    return [
+        batch_request(f"post-{i}", {"messages": [{"role": "user", "content": f"raw {i}"}]})
+        for i in ids
+    ]
+
+
+def test_round_trip_through_batch(tmp_path):
+    server = FakeBatchServer()
+    path = tmp_path / "requests.jsonl"
+
+    assert write_requests(path, make_requests([1, 2, 3])) == 3
+    batch = submit_batch(server, path)
+    batch = wait_for_batch(server, batch.id, poll_interval=0)
+    results = list(iter_batch_results(server, batch))
+
+    assert batch.status == "completed"
+    assert [r.custom_id for r in results] == ["post-1", "post-2", "post-3"]
+    assert json.loads(results[1].content) == {"echo": "raw 2"}
+
+
+def test_failed_requests_come_from_error_file(tmp_path):
+    server = FakeBatchServer(failing={"post-2"}, polls_until_done=1)
+    path = tmp_path / "requests.jsonl"
+    write_requests(path, make_requests([1, 2]))
+
+    batch = wait_for_batch(server, submit_batch(server, path).id, poll_interval=0)
+    results = {r.custom_id: r for r in iter_batch_results(server, batch)}
+
+    assert results["post-1"].ok
+    assert not results["post-2"].ok
+    assert "bad request" in results["post-2"].error
@@ -0,0 +1,112 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from src.processor.bm25_index import BM25Index, tokenize
+from src.processor.chunker import Chunk
+from src.processor.local_index import matches_filter
+
+TEXTS = {
+    "1-0": "Stuart Bradley helped with my work visa paperwork",
+    "1-1": "The visa office in Berlin was slow",
+    "2-0": "MSFT is hiring engineers in Dublin",
+    "3-0": "Looking for housing near the office",
+}
+
+
+@pytest.fixture
+def index():
+    index = BM25Index(match_filter=matches_filter)
+    index.upsert(list(TEXTS), list(TEXTS.values()),
+                 [{"doc_id": vector_id.split("-")[0]} for vector_id in TEXTS])
+    return index
+
+
+def ids(response):
+    return [match["id"] for match in response["matches"]]
+
+
+def reference_scores(texts, query, k1=1.2, b=0.75):
+    """Textbook BM25 over a list of texts"""
+    docs = [tokenize(text) for text in texts]
+    average = sum(map(len, docs)) / len(docs)
+    scores = []
+    for doc in docs:
+        score = 0.0
+        for term in set(tokenize(query)):
+            frequency = sum(term in other for other in docs)
+            if not frequency:
+                continue
+            idf = math.log(1 + (len(docs) - frequency + 0.5) / (frequency + 0.5))
+            tf = doc.count(term)
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / average))
+        scores.append(score)
+    return scores
+
+
+def test_exact_names_rank_first_regardless_of_case(index):
+    assert ids(index.query("stuart bradley", top_k=2)) == ["1-0"]
+    assert ids(index.query("msft jobs")) == ["2-0"]
+    assert ids(index.query("visa", top_k=5)) == ["1-1", "1-0"]
+
+
+def test_scores_match_reference_across_merges():
+    rng = random.Random(0)
+    words = [f"w{i}" for i in range(30)]
+    texts = [" ".join(rng.choices(words, k=rng.randint(3, 20))) for _ in range(60)]
+    index = BM25Index(merge_threshold=200)
+    for start in range(0, len(texts), 7):
+        index.upsert([str(i) for i in range(start, start + 7)], texts[start:start + 7])
+
+    for query in ("w1 w2", "w5", "w7 w7 w29"):
+        assert index.scores(query) == pytest.approx(
+            reference_scores(texts, query), rel=1e-5)
+
+
+def test_replace_and_delete_take_effect_before_merge(index):
+    index.upsert(["3-0"], ["Stuart Bradley sublets a room"])
+    index.delete(["1-0", "unknown"])
+
+    assert ids(index.query("stuart")) == ["3-0"]
+    assert ids(index.query("housing")) == []
+    assert len(index) == 3
+
+    index.merge()
+    assert ids(index.query("stuart")) == ["3-0"]
+    assert ids(index.query("visa")) == ["1-1"]
+
+
+def test_filter_uses_match_filter(index):
+    response = index.query("visa", filter={"doc_id": "1"}, include_metadata=True)
+    assert ids(response) == ["1-1", "1-0"]
+    assert response["matches"][0]["metadata"] == {"doc_id": "1"}
+    assert ids(index.query("visa", filter={"doc_id": {"$ne": "1"}})) == []
+
+    with pytest.raises(ValueError):
+        BM25Index().query("visa", filter={"doc_id": "1"})
+
+
+def test_upsert_chunks_uses_vector_ids():
+    index = BM25Index()
+    index.upsert_chunks([
+        Chunk(text="Dublin rent prices", metadata={"doc_id": "9"},
+              chunk_index=2, doc_id="9"),
+    ])
+
+    response = index.query("dublin", include_metadata=True)
+    assert ids(response) == ["9-2"]
+    assert response["matches"][0]["metadata"]["text"] == "Dublin rent prices"
+
+
+def test_save_and_load_round_trip(index, tmp_path):
+    index.delete(["3-0"])
+    path = tmp_path / "bm25.npz"
+    index.save(str(path))
+
+    loaded = BM25Index.load(str(path), match_filter=matches_filter)
+    np.testing.assert_allclose(loaded.scores("visa berlin"), index.scores("visa berlin"))
+    loaded.upsert(["4-0"], ["Berlin visa appointment tips"])
+    assert ids(loaded.query("berlin", filter={"doc_id": "1"})) == ["1-1"]
+    assert "4-0" in ids(loaded.query("berlin"))
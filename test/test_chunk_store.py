@@ -0,0 +1,34 @@
+from src.processor.chunk_store import ChunkStore
+
+
+def test_round_trip_replace_and_delete(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks.sqlite"))
+    store.put_many(["1-0", "1-1"], ["first", "second"])
+    store.put_many(["1-1"], ["second, edited"])
+    store.delete_many(["1-0", "unknown"])
+
+    assert store.get_many(["1-0", "1-1", "1-1"]) == {"1-1": "second, edited"}
+    assert len(store) == 1
+
+
+def test_persists_across_instances(tmp_path):
+    path = str(tmp_path / "chunks.sqlite")
+    ChunkStore(path).put_many(["1-0"], ["kept"])
+
+    assert ChunkStore(path).get_many(["1-0"]) == {"1-0": "kept"}
+
+
+def test_hydrate_fills_only_missing_text(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks.sqlite"))
+    store.put_many(["1-0", "2-0"], ["stored one", "stored two"])
+    matches = [
+        {"id": "1-0", "score": 0.9, "metadata": {"doc_id": "1"}},
+        {"id": "2-0", "score": 0.8, "metadata": {"doc_id": "2", "text": "inline"}},
+        {"id": "3-0", "score": 0.7, "metadata": {"doc_id": "3"}},
+    ]
+
+    hydrated = store.hydrate(matches)
+
+    assert [match["metadata"].get("text") for match in hydrated] == [
+        "stored one", "inline", None]
+    assert "text" not in matches[0]["metadata"]
@@ -0,0 +1,136 @@
+import re
+
+import pytest
+
+from src.processor import chunker
+from src.processor.chunker import DocumentChunker, TokenWindowSplitter
+
+
+class WordEncoding:
+    """Minimal stand-in for a tiktoken encoding that splits on words"""
+
+    PATTERN = re.compile(r"\n+|[^\S\n]*[^\s.]+|\.|[^\S\n]+")
+
+    def __init__(self):
+        self.vocab = {}
+        self.pieces = []
+
+    def encode(self, text):
+        tokens = []
+        for piece in self.PATTERN.findall(text):
+            if piece not in self.vocab:
+                self.vocab[piece] = len(self.pieces)
+                self.pieces.append(piece)
+            tokens.append(self.vocab[piece])
+        return tokens
+
+    def encode_batch(self, texts):
+        return [self.encode(text) for text in texts]
+
+    def decode_with_offsets(self, tokens):
+        offsets = []
+        parts = []
+        position = 0
+        for token in tokens:
+            offsets.append(position)
+            parts.append(self.pieces[token])
+            position += len(self.pieces[token])
+        return "".join(parts), offsets
+
+
+@pytest.fixture
+def encoding(monkeypatch):
+    fake = WordEncoding()
+    monkeypatch.setattr(chunker, "get_encoder", lambda model=None: fake)
+    return fake
+
+
+def make_paragraphs(count, words_per_paragraph):
+    return "\n\n".join(
+        " ".join(f"p{p}w{w}" for w in range(words_per_paragraph))
+        for p in range(count)
+    )
+
+
+def test_chunks_respect_token_limit(encoding):
+    splitter = TokenWindowSplitter(encoding, chunk_size=40, chunk_overlap=5)
+    text = make_paragraphs(12, 15)
+
+    chunks = splitter.split_with_counts(text)
+
+    assert len(chunks) > 1
+    for chunk, count in chunks:
+        assert count <= 40
+        assert len(encoding.encode(chunk)) <= 40
+
+
+def test_prefers_paragraph_boundaries(encoding):
+    splitter = TokenWindowSplitter(encoding, chunk_size=40, chunk_overlap=0)
+    text = make_paragraphs(6, 15)
+
+    chunks = splitter.split_text(text)
+
+    # Two 15-word paragraphs plus the separator fit in one 40-token window
+    assert chunks[0] == "\n\n".join(text.split("\n\n")[:2])
+    for chunk in chunks:
+        assert not chunk.startswith("\n") and not chunk.endswith("\n")
+
+
+def test_overlap_repeats_tail_of_previous_chunk(encoding):
+    splitter = TokenWindowSplitter(encoding, chunk_size=30, chunk_overlap=6)
+    text = " ".join(f"w{i}" for i in range(100))
+
+    chunks = splitter.split_text(text)
+
+    for previous, current in zip(chunks, chunks[1:]):
+        first_word = current.split()[0]
+        assert first_word in previous.split()
+        assert previous.split()[-1] in current.split()
+
+
+def test_covers_every_word(encoding):
+    splitter = TokenWindowSplitter(encoding, chunk_size=25, chunk_overlap=5)
+    text = make_paragraphs(5, 30)
+
+    words = set()
+    for chunk in splitter.split_text(text):
+        words.update(chunk.split())
+
+    assert words == set(text.split())
+
+
+def test_rejects_overlap_not_smaller_than_size(encoding):
+    with pytest.raises(ValueError):
+        TokenWindowSplitter(encoding, chunk_size=10, chunk_overlap=10)
+
+
+def test_split_reports_window_token_counts(encoding):
+    doc_chunker = DocumentChunker(chunk_size=40, chunk_overlap=5)
+
+    chunks = doc_chunker.split(make_paragraphs(8, 15), doc_id="42")
+
+    assert [chunk.chunk_index for chunk in chunks] == list(range(len(chunks)))
+    for chunk in chunks:
+        assert chunk.doc_id == "42"
+        assert chunk.metadata["text"] == chunk.text
+        assert 0 < chunk.metadata["token_count"] <= 40
+
+
+def test_empty_document_has_no_chunks(encoding):
+    assert DocumentChunker().split("", doc_id="1") == []
+
+
+def test_unknown_engine_is_rejected(encoding):
+    with pytest.raises(ValueError):
+        DocumentChunker(engine="regex")
+
+
+def test_token_counts_match_the_stripped_chunks(encoding):
+    splitter = TokenWindowSplitter(encoding, chunk_size=20, chunk_overlap=0)
+    text = "\n\n" + make_paragraphs(6, 8) + "\n\n"
+
+    chunks = splitter.split_with_counts(text)
+
+    assert len(chunks) > 1
+    for chunk, count in chunks:
+        assert count == len(encoding.encode(chunk))
@@ -0,0 +1,34 @@
+import hashlib
+
+from src.processor.content_hash import content_hash, diff_hashes, json_hash
+
+
+def test_text_hash_is_sha256_of_utf8():
+    # Must match encode(sha256(convert_to(text, 'UTF8')), 'hex') in Postgres
+    assert content_hash("Café") == hashlib.sha256("Café".encode("utf-8")).hexdigest()
+
+
+def test_json_hash_ignores_key_order_and_string_storage():
+    a = {"data": [{"author": "Ana", "message": "Hi"}]}
+    b = {"data": [{"message": "Hi", "author": "Ana"}]}
+
+    assert json_hash(a) == json_hash(b)
+    assert json_hash(a) == json_hash('{"data": [{"author": "Ana", "message": "Hi"}]}')
+    assert json_hash(a) != json_hash({"data": [{"author": "Ana", "message": "Hi!"}]})
+
+
+def test_diff_hashes_finds_changed_and_removed_keys():
+    previous = {"7-0": "a", "7-1": "b", "7-2": "c"}
+    current = {"7-0": "a", "7-1": "B", "7-3": "d"}
+
+    changed, removed = diff_hashes(previous, current)
+
+    assert changed == ["7-1", "7-3"]
+    assert removed == ["7-2"]
+
+
+def test_diff_hashes_without_history_changes_everything():
+    changed, removed = diff_hashes(None, {"7-0": "a", "7-1": "b"})
+
+    assert changed == ["7-0", "7-1"]
+    assert removed == []
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from src.processor.chunk_store import ChunkStore
+from src.processor.context_assembler import (
+    ContextAssembler, format_context, overlap_length)
+from src.processor.local_index import LocalVectorIndex
+
+WORDS = [f"word{i}" for i in range(60)]
+
+
+def overlapping_chunks(words, size=10, overlap=3):
+    """Chunk texts that repeat `overlap` words, like the chunker's overlap"""
+    step = size - overlap
+    return [" ".join(words[start:start + size])
+            for start in range(0, len(words) - overlap, step)]
+
+
+class CountingIndex(LocalVectorIndex):
+    def __init__(self, dimension):
+        super().__init__(dimension)
+        self.fetches = []
+
+    def fetch(self, ids, namespace=None):
+        self.fetches.append(list(ids))
+        return super().fetch(ids, namespace)
+
+
+def vector_dict(doc_id, chunk_index, text):
+    return {
+        "id": f"{doc_id}-{chunk_index}",
+        "values": [1.0, float(chunk_index)],
+        "metadata": {"doc_id": doc_id, "chunk_index": chunk_index,
+                     "text": text, "token_count": len(text.split()),
+                     "source": "facebook_group"},
+    }
+
+
+@pytest.fixture
+def index():
+    index = CountingIndex(dimension=2)
+    for doc_id in ("1", "2"):
+        index.upsert([vector_dict(doc_id, i, text) for i, text in
+                      enumerate(overlapping_chunks(WORDS))])
+    return index
+
+
+def hit(index, vector_id, score):
+    match = index.fetch([vector_id])["vectors"][vector_id]
+    index.fetches.clear()
+    return {"id": vector_id, "score": score, "metadata": match["metadata"]}
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def test_overlap_length_finds_shared_text():
+    chunks = overlapping_chunks(WORDS)
+    assert chunks[0][-overlap_length(chunks[0], chunks[1]):] == "word7 word8 word9"
+    assert overlap_length("no shared text here", "entirely different") == 0
+
+
+def test_assemble_merges_neighbours_in_one_fetch(index):
+    assembler = ContextAssembler(index, neighbours=1, count_tokens=word_count)
+    matches = [hit(index, "1-3", 0.9), hit(index, "1-4", 0.8), hit(index, "2-0", 0.5)]
+
+    blocks = asyncio.run(assembler.assemble(matches))
+
+    assert len(index.fetches) == 1
+    assert sorted(index.fetches[0]) == ["1-2", "1-5", "2-1"]
+    assert [(block.doc_id, block.chunk_indexes) for block in blocks] == [
+        ("1", [2, 3, 4, 5]), ("2", [0, 1])]
+    assert blocks[0].text == " ".join(WORDS[14:45])
+    assert blocks[0].token_count == 31
+    assert blocks[0].score == 0.9
+    assert blocks[0].metadata == {"doc_id": "1", "source": "facebook_group"}
+    assert format_context(blocks).count("---") == 1
+
+
+def test_assemble_trims_neighbours_to_fit_budget(index):
+    assembler = ContextAssembler(index, token_budget=20, neighbours=1,
+                                 count_tokens=word_count)
+    matches = [hit(index, "1-3", 0.9), hit(index, "2-5", 0.7)]
+
+    blocks = asyncio.run(assembler.assemble(matches))
+
+    # 1-3 keeps one neighbour; 2-5 no longer fits at all
+    assert [(block.doc_id, block.chunk_indexes) for block in blocks] == [
+        ("1", [2, 3])]
+    assert sum(block.token_count for block in blocks) <= 20
+
+
+def test_assemble_without_neighbours_skips_fetch(index):
+    assembler = ContextAssembler(index, neighbours=0, count_tokens=word_count)
+
+    blocks = asyncio.run(assembler.assemble([hit(index, "1-1", 0.4)]))
+
+    assert index.fetches == []
+    assert [block.text for block in blocks] == [" ".join(WORDS[7:17])]
+
+
+def test_assemble_hydrates_text_from_chunk_store(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks.sqlite"))
+    index = CountingIndex(dimension=2)
+    texts = overlapping_chunks(WORDS)
+    vectors = [vector_dict("1", i, text) for i, text in enumerate(texts)]
+    for vector in vectors:
+        del vector["metadata"]["text"]
+    index.upsert(vectors)
+    store.put_many([vector["id"] for vector in vectors], texts)
+    assembler = ContextAssembler(index, neighbours=1, count_tokens=word_count,
+                                 chunk_store=store)
+
+    blocks = asyncio.run(assembler.assemble([hit(index, "1-1", 0.6)]))
+
+    assert [block.chunk_indexes for block in blocks] == [[0, 1, 2]]
+    assert blocks[0].text == " ".join(WORDS[0:24])
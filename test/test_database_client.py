@@ -0,0 +1,172 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.database import client
+from src.database.client import (
+    BulkWriter, MissingMigrationError, iter_rows, require_content_hashes,
+    stream_rows)
+
+
+class FakeQuery:
+    """Chainable stand-in for a PostgREST select over an in-memory table"""
+
+    def __init__(self, table):
+        self.table = table
+        self.conditions = []
+        self.functions = []
+        self.page_limit = None
+
+    def select(self, columns):
+        return self
+
+    def gte(self, column, value):
+        self.conditions.append(lambda row: row[column] >= value)
+        return self
+
+    def gt(self, column, value):
+        self.conditions.append(lambda row: row[column] > value)
+        return self
+
+    def is_(self, column, value):
+        self.functions.append(column)
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def limit(self, count):
+        self.page_limit = count
+        return self
+
+    def upsert(self, rows, on_conflict):
+        self.upserted = rows
+        return self
+
+    def execute(self):
+        if hasattr(self, "upserted"):
+            return self.table.write(self.upserted)
+        for function in self.functions:
+            if function not in self.table.functions:
+                raise RuntimeError(f"column posts.{function} does not exist")
+        rows = [row for row in self.table.rows
+                if all(condition(row) for condition in self.conditions)]
+        limit = min(self.page_limit, self.table.max_rows)
+        self.table.requests.append(threading.current_thread().name)
+        return type("Response", (), {"data": rows[:limit]})
+
+
+class FakeSupabase:
+    def __init__(self, count, max_rows=1000):
+        self.rows = [{"id": i, "value": i * i} for i in range(1, count + 1)]
+        self.max_rows = max_rows
+        self.requests = []
+        self.failing = set()
+        self.functions = {"raw_post_stale", "reconstructed_stale"}
+
+    def table(self, name):
+        return FakeQuery(self)
+
+    def write(self, rows):
+        self.requests.append([row["id"] for row in rows])
+        if any(row["id"] in self.failing for row in rows):
+            raise ConnectionError("upsert failed")
+        return type("Response", (), {"data": rows})
+
+
+def test_iter_rows_pages_through_every_row():
+    supabase = FakeSupabase(25)
+
+    rows = list(iter_rows(supabase, "posts", "id, value", page_size=10))
+
+    assert [row["id"] for row in rows] == list(range(1, 26))
+    # Three full or partial pages, then one empty page to stop
+    assert len(supabase.requests) == 4
+    assert all(name.startswith("supabase-page") for name in supabase.requests)
+
+
+def test_short_pages_from_server_cap_do_not_end_the_stream():
+    supabase = FakeSupabase(25, max_rows=4)
+
+    rows = list(iter_rows(supabase, "posts", "id", page_size=10))
+
+    assert len(rows) == 25
+
+
+def test_stream_rows_applies_filters_and_prefetches():
+    supabase = FakeSupabase(30)
+
+    async def run():
+        seen = []
+        async for row in stream_rows(
+                supabase, "posts", "id, value",
+                filters=lambda query: query.gte("id", 11), page_size=5):
+            if not seen:
+                # The next page is already on its way
+                await asyncio.sleep(0.05)
+                assert len(supabase.requests) == 2
+            seen.append(row["id"])
+        return seen
+
+    assert asyncio.run(run()) == list(range(11, 31))
+
+
+def test_requires_id_column():
+    supabase = FakeSupabase(3)
+    supabase.rows = [{"value": 1}]
+
+    with pytest.raises(ValueError):
+        list(iter_rows(supabase, "posts", "value"))
+
+
+def test_bulk_writer_flushes_full_batches_and_remainder():
+    supabase = FakeSupabase(0)
+
+    with BulkWriter(supabase, "posts", batch_size=3, flush_interval=60) as writer:
+        for i in range(7):
+            writer.add({"id": i, "text": str(i)})
+
+    assert supabase.requests == [[0, 1, 2], [3, 4, 5], [6]]
+    assert writer.written == 7
+
+
+def test_bulk_writer_flushes_after_interval(monkeypatch):
+    supabase = FakeSupabase(0)
+    clock = [0.0]
+    monkeypatch.setattr(client.time, "monotonic", lambda: clock[0])
+    writer = BulkWriter(supabase, "posts", batch_size=100, flush_interval=5)
+
+    writer.add({"id": 1})
+    clock[0] = 6.0
+    writer.add({"id": 2})
+
+    assert supabase.requests == [[1, 2]]
+
+
+def test_bulk_writer_retries_then_reports_failed_rows(monkeypatch):
+    monkeypatch.setattr(client.time, "sleep", lambda seconds: None)
+    supabase = FakeSupabase(0)
+    supabase.failing = {4}
+    writer = BulkWriter(supabase, "posts", batch_size=3, max_retries=2)
+
+    for i in range(6):
+        writer.add({"id": i})
+    writer.close()
+
+    # The failing batch is tried twice, the others still land
+    assert supabase.requests == [[0, 1, 2], [3, 4, 5], [3, 4, 5]]
+    assert writer.written == 3
+    assert writer.failed_ids == [3, 4, 5]
+
+
+def test_require_content_hashes_passes_on_a_migrated_table():
+    require_content_hashes(FakeSupabase(1))
+
+
+def test_require_content_hashes_names_the_migration():
+    supabase = FakeSupabase(1)
+    supabase.functions = set()
+
+    with pytest.raises(MissingMigrationError, match="002_content_hashes.sql"):
+        require_content_hashes(supabase)
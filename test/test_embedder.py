@@ -0,0 +1,208 @@
+import asyncio
+import base64
+import types
+
+import numpy as np
+import pytest
+
+from src.processor import embedder as embedder_module
+from src.processor.embedder import (
+    BatchAccumulator, Embedder, EmbeddingBatch, RateLimiter, pack_batches)
+
+_sleep = asyncio.sleep
+
+
+class FakeEmbeddings:
+    """Stand-in for client.embeddings that echoes each input's length"""
+
+    def __init__(self):
+        self.requests = []
+
+    async def create(self, model, input, **kwargs):
+        self.requests.append(list(input))
+        await asyncio.sleep(0)
+        return types.SimpleNamespace(data=[
+            types.SimpleNamespace(embedding=[float(len(text))])
+            for text in input
+        ])
+
+
+class SlowFirstEmbeddings(FakeEmbeddings):
+    """Fake whose earlier requests take longer, so batches finish in reverse"""
+
+    def __init__(self):
+        super().__init__()
+        self.finished = []
+
+    async def create(self, model, input, **kwargs):
+        self.requests.append(list(input))
+        for _ in range(10 - len(self.requests)):
+            await _sleep(0)
+        self.finished.append(list(input))
+        return types.SimpleNamespace(data=[
+            types.SimpleNamespace(embedding=[float(len(text))])
+            for text in input
+        ])
+
+
+class FakeClock:
+    """Monotonic clock that asyncio.sleep advances instead of waiting"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.now += delay
+        await _sleep(0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    instance = FakeClock()
+    monkeypatch.setattr(embedder_module, "time",
+                        types.SimpleNamespace(monotonic=instance.monotonic))
+    monkeypatch.setattr(embedder_module.asyncio, "sleep", instance.sleep)
+    return instance
+
+
+@pytest.fixture
+def embedder(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    instance = Embedder(dimension=1536, batch_size=3,
+                        max_tokens_per_request=10)
+    # The fake client returns one-dimensional embeddings
+    instance.dimension = 1
+    instance.client = types.SimpleNamespace(embeddings=FakeEmbeddings())
+    return instance
+
+
+def test_pack_batches_respects_limits():
+    counts = [4, 4, 4, 1, 1, 9, 2]
+
+    batches = pack_batches(counts, max_tokens=10, max_items=3)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(7))
+    for batch in batches:
+        assert len(batch) <= 3
+        assert sum(counts[i] for i in batch) <= 10
+
+
+def test_pack_batches_sorts_when_it_saves_requests():
+    counts = [9, 9, 1, 1]
+
+    # In order this needs [9], [9, 1], [1]; longest-first pairs each 9 with a 1
+    batches = pack_batches(counts, max_tokens=10, max_items=2)
+
+    assert len(batches) == 2
+
+
+def test_pack_batches_keeps_oversized_text_alone():
+    batches = pack_batches([3, 50, 3], max_tokens=10, max_items=5)
+
+    assert [1] in batches
+
+
+def test_pack_batches_keeps_input_order_without_token_pressure():
+    assert pack_batches([1] * 5, max_tokens=100, max_items=2) == [
+        [0, 1], [2, 3], [4]]
+
+
+def test_embed_texts_returns_caller_order(embedder):
+    texts = ["a" * n for n in [8, 1, 7, 2, 6, 3, 5]]
+
+    embeddings = asyncio.run(
+        embedder.embed_texts(texts, token_counts=[len(t) for t in texts]))
+
+    assert [e[0] for e in embeddings] == [8, 1, 7, 2, 6, 3, 5]
+    for request in embedder.client.embeddings.requests:
+        assert len(request) <= 3
+        assert sum(len(text) for text in request) <= 10
+
+
+def test_concurrent_batches_keep_input_order(clock, embedder):
+    embedder.client.embeddings = SlowFirstEmbeddings()
+    texts = ["a" * n for n in range(1, 9)]
+
+    embeddings = asyncio.run(embedder.embed_texts(texts, token_counts=[1] * 8))
+
+    assert [e[0] for e in embeddings] == list(range(1, 9))
+    requests = embedder.client.embeddings.requests
+    assert len(requests) == 3
+    assert embedder.client.embeddings.finished == requests[::-1]
+
+
+def test_rate_limiter_throttles_requests_per_minute(clock):
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=1000)
+
+    async def run():
+        for _ in range(4):
+            await limiter.acquire(1)
+
+    asyncio.run(run())
+
+    # Two requests fit the full bucket; each later one waits half a minute
+    assert clock.now == pytest.approx(60)
+
+
+def test_rate_limiter_throttles_tokens_per_minute(clock):
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=600)
+
+    asyncio.run(limiter.acquire(500))
+    assert clock.now == 0
+    asyncio.run(limiter.acquire(500))
+    # 400 more tokens refill in 40 seconds
+    assert clock.now == pytest.approx(40)
+    # An oversized request waits for a full bucket, not forever
+    asyncio.run(limiter.acquire(5000))
+    assert clock.now == pytest.approx(100)
+
+
+def test_accumulator_pools_callers_into_full_batches(embedder):
+    embedder.max_tokens_per_request = 1000
+
+    async def run():
+        accumulator = BatchAccumulator(embedder, flush_timeout=0.05)
+        docs = [["a" * n, "b" * n] for n in range(1, 5)] + [["c"]]
+        return await asyncio.gather(*(accumulator.embed(doc) for doc in docs))
+
+    results = asyncio.run(run())
+
+    assert [r.tolist() for r in results] == [
+        [[1.0], [1.0]], [[2.0], [2.0]], [[3.0], [3.0]], [[4.0], [4.0]], [[1.0]]]
+    # Nine texts in batches of at most three, with no half-empty requests
+    assert [len(r) for r in embedder.client.embeddings.requests] == [3, 3, 3]
+
+
+def test_decodes_base64_embeddings(embedder):
+    vectors = np.array([[0.25], [-1.5]], dtype=np.float32)
+
+    async def create(model, input, encoding_format=None):
+        assert encoding_format == "base64"
+        return types.SimpleNamespace(data=[
+            types.SimpleNamespace(
+                index=i, embedding=base64.b64encode(vectors[i].tobytes()).decode())
+            for i in range(len(input))
+        ])
+
+    embedder.client.embeddings.create = create
+    embeddings = asyncio.run(embedder.embed_texts(["a", "b"]))
+
+    assert embeddings.dtype == np.float32
+    assert embeddings.tolist() == vectors.tolist()
+
+
+def test_embedding_batch_converts_to_wire_format():
+    batch = EmbeddingBatch(
+        ids=["1-0", "1-1"],
+        vectors=np.array([[1, 2], [3, 4]]),
+        metadata=[{"chunk_index": 0}, {"chunk_index": 1}]
+    )
+
+    assert batch.vectors.dtype == np.float32
+    assert batch.slice(1, 2).to_pinecone() == [
+        {"id": "1-1", "values": [3.0, 4.0], "metadata": {"chunk_index": 1}}]
+    with pytest.raises(ValueError):
+        EmbeddingBatch(ids=["a"], vectors=np.zeros((2, 3)))
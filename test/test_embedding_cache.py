@@ -0,0 +1,61 @@
+import asyncio
+import types
+
+from src.processor.embedding_cache import EmbeddingCache
+from src.processor.embedder import Embedder
+
+
+def test_round_trip_and_counters(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+
+    assert cache.get_many("model", ["a", "b"]) == [None, None]
+    cache.put_many("model", ["a"], [[0.5, 1.5]])
+
+    hit, miss = cache.get_many("model", ["a", "b"])
+    assert hit.tolist() == [0.5, 1.5] and miss is None
+    assert cache.get_many("other-model", ["a"]) == [None]
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    EmbeddingCache(path).put_many("model", ["a"], [[1.0, 2.0]])
+
+    assert EmbeddingCache(path).get_many("model", ["a"])[0].tolist() == [1.0, 2.0]
+
+
+def test_evicts_least_recently_used(tmp_path):
+    # Room for two 2-float (8 byte) vectors
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_bytes=16)
+    cache.put_many("model", ["a"], [[1.0, 1.0]])
+    cache.put_many("model", ["b"], [[2.0, 2.0]])
+    cache.get_many("model", ["a"])
+
+    cache.put_many("model", ["c"], [[3.0, 3.0]])
+
+    a, b, c = cache.get_many("model", ["a", "b", "c"])
+    assert (a.tolist(), b, c.tolist()) == ([1.0, 1.0], None, [3.0, 3.0])
+    assert cache.size_bytes == 16
+
+
+def test_embedder_sends_only_misses(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    requests = []
+
+    async def create(model, input, **kwargs):
+        requests.append(list(input))
+        return types.SimpleNamespace(data=[
+            types.SimpleNamespace(embedding=[float(len(text))]) for text in input
+        ])
+
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+    embedder = Embedder(dimension=1536, cache=cache)
+    embedder.dimension = 1
+    embedder.client = types.SimpleNamespace(
+        embeddings=types.SimpleNamespace(create=create))
+
+    asyncio.run(embedder.embed_texts(["aa", "bbb"]))
+    embeddings = asyncio.run(embedder.embed_texts(["bbb", "c", "c", "aa"]))
+
+    assert embeddings.tolist() == [[3.0], [1.0], [1.0], [2.0]]
+    assert requests == [["aa", "bbb"], ["c"]]
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from src.processor.embedder import EmbeddingBatch
+from src.processor.local_index import LocalVectorIndex, matches_filter
+
+
+def vector(*values):
+    return list(values) + [0.0] * (4 - len(values))
+
+
+@pytest.fixture
+def index():
+    index = LocalVectorIndex(dimension=4)
+    index.upsert([
+        {"id": "1-0", "values": vector(1, 0), "metadata": {"doc_id": "1", "chunk_index": 0}},
+        {"id": "1-1", "values": vector(1, 1), "metadata": {"doc_id": "1", "chunk_index": 1}},
+        {"id": "2-0", "values": vector(0, 1), "metadata": {"doc_id": "2", "chunk_index": 0,
+                                                          "tags": ["jobs", "visa"]}},
+    ], namespace="posts")
+    return index
+
+
+def test_query_ranks_by_cosine_similarity(index):
+    response = index.query(vector(3, 0), top_k=2, namespace="posts",
+                           include_metadata=True)
+
+    assert [match["id"] for match in response["matches"]] == ["1-0", "1-1"]
+    assert response["matches"][0]["score"] == pytest.approx(1.0)
+    assert response["matches"][1]["score"] == pytest.approx(np.sqrt(0.5))
+    assert response["matches"][0]["metadata"]["doc_id"] == "1"
+
+
+def test_namespaces_are_separate(index):
+    assert index.query(vector(1, 0), namespace="other")["matches"] == []
+    assert index.describe_index_stats()["namespaces"] == {"posts": {"vector_count": 3}}
+
+
+@pytest.mark.parametrize("filter, expected", [
+    ({"doc_id": "1"}, ["1-0", "1-1"]),
+    ({"doc_id": {"$ne": "1"}}, ["2-0"]),
+    ({"chunk_index": {"$gte": 1}}, ["1-1"]),
+    ({"tags": {"$in": ["visa"]}}, ["2-0"]),
+    ({"tags": {"$nin": ["visa"]}}, ["1-0", "1-1"]),
+    ({"$or": [{"chunk_index": {"$gt": 0}}, {"doc_id": "2"}]}, ["1-1", "2-0"]),
+    ({"$and": [{"doc_id": "1"}, {"chunk_index": {"$lt": 1}}]}, ["1-0"]),
+])
+def test_metadata_filters(index, filter, expected):
+    response = index.query(vector(1, 1), top_k=10, namespace="posts", filter=filter)
+
+    assert sorted(match["id"] for match in response["matches"]) == expected
+
+
+def test_upsert_replaces_and_delete_removes(index):
+    index.upsert([{"id": "1-0", "values": vector(0, 0, 1), "metadata": {}}],
+                 namespace="posts")
+    index.delete(ids=["1-1"], namespace="posts")
+
+    top = index.query(vector(0, 0, 1), top_k=1, namespace="posts")["matches"][0]
+    assert top["id"] == "1-0"
+    assert set(index.fetch(["1-0", "1-1", "2-0"], namespace="posts")["vectors"]) == {"1-0", "2-0"}
+
+    index.delete(filter={"doc_id": "2"}, namespace="posts")
+    assert index.describe_index_stats()["total_vector_count"] == 1
+
+
+def test_accepts_embedding_batches():
+    index = LocalVectorIndex(dimension=4)
+    index.upsert(EmbeddingBatch(ids=["a", "b"], vectors=np.eye(4, dtype=np.float32)[:2]))
+
+    assert index.query(vector(0, 2), top_k=1)["matches"][0]["id"] == "b"
+
+
+def test_approximate_search_finds_clustered_neighbours():
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((8, 32)).astype(np.float32)
+    values = np.repeat(centers, 50, axis=0) + 0.05 * rng.standard_normal((400, 32))
+    index = LocalVectorIndex(dimension=32)
+    index.upsert([{"id": str(i), "values": row} for i, row in enumerate(values)])
+    index.build_ivf(n_lists=8)
+
+    for query in centers:
+        exact = index.query(query, top_k=10)["matches"]
+        approximate = index.query(query, top_k=10, approximate=True, nprobe=2)["matches"]
+        assert [m["id"] for m in approximate] == [m["id"] for m in exact]
+
+
+def test_missing_fields_only_match_negations():
+    assert matches_filter({}, {"doc_id": {"$ne": "1"}})
+    assert not matches_filter({}, {"doc_id": {"$in": ["1"]}})
+    assert not matches_filter({"doc_id": "1"}, {"doc_id": {"$gt": 0}})
@@ -0,0 +1,52 @@
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from src.processor.post_parser import (
+    DEFAULT_MIN_CONFIDENCE, parse_post, resolve_relative_time)
+
+FIXTURES = json.loads(
+    (Path(__file__).parent / "fixtures" / "raw_posts.json").read_text())
+
+
+@pytest.mark.parametrize("fixture", FIXTURES, ids=lambda f: f"post-{f['id']}")
+def test_matches_expected_conversion(fixture):
+    result = parse_post(fixture["raw_post"], fixture["created_at"])
+
+    assert result.confidence >= DEFAULT_MIN_CONFIDENCE, result.issues
+    assert result.data == fixture["expected"]
+
+
+@pytest.mark.parametrize("label, expected", [
+    ("21h", "2024-11-29T16:14:00"),
+    ("5m", "2024-11-30T13:09:00"),
+    ("2w", "2024-11-16T13:14:00"),
+    ("Just now", "2024-11-30T13:14:00"),
+])
+def test_resolves_relative_times(label, expected):
+    scraped_at = datetime(2024, 11, 30, 13, 14, tzinfo=timezone.utc)
+
+    resolved = resolve_relative_time(label, scraped_at)
+
+    assert resolved.replace(tzinfo=None).isoformat() == expected
+
+
+def test_drops_duplicated_thread_tail():
+    raw = ("Any advice?\n\nAna Lee\nAuthor\nBump.\n2h\nReply\n"
+           "Sam Ortiz\nAna Lee Try the alumni network.\n1h\nReply\n"
+           "Sam Ortiz\nAna Lee Try the alumni network.\n1h\nReply")
+
+    result = parse_post(raw, "2024-12-01T00:00:00Z")
+
+    replies = result.data["data"][0]["comments"]["data"][0]["comments"]["data"]
+    assert [reply["message"] for reply in replies] == ["Try the alumni network."]
+
+
+def test_irregular_text_has_low_confidence():
+    result = parse_post("Shared a link\nwww.example.com\n3d\nReply\nsee above",
+                        "2024-12-01T00:00:00Z")
+
+    assert result.confidence < DEFAULT_MIN_CONFIDENCE
+    assert result.issues
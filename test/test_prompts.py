@@ -0,0 +1,19 @@
+import pytest
+
+from src.processor.prompts import TEMPLATES, build_messages
+
+
+@pytest.mark.parametrize("template", sorted(TEMPLATES))
+def test_post_content_only_follows_the_shared_prefix(template):
+    first = build_messages("first post", "2024-12-01T00:00:00Z", template)
+    second = build_messages("second post", "2024-12-02T00:00:00Z", template)
+
+    # Only the final user message may differ between posts
+    assert first[:-1] == second[:-1]
+    assert first[-1]["content"] == (
+        "Post scraped at: 2024-12-01T00:00:00Z\n\nRaw post: first post")
+
+
+def test_unknown_template_is_rejected():
+    with pytest.raises(ValueError):
+        build_messages("post", "2024-12-01T00:00:00Z", "few-shot-v0")
@@ -0,0 +1,27 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from src.processor.reconstruction import reconstruct_rows
+from src.processor.thread_walker import convert_json_to_text
+
+FIXTURES = json.loads(
+    (Path(__file__).parent / "fixtures" / "raw_posts.json").read_text())
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_reconstruct_rows_keeps_order_and_reports_bad_rows(workers):
+    rows = [{"id": i, "processed_post_json": fixture["expected"]}
+            for i, fixture in enumerate(FIXTURES * 5)]
+    rows.insert(3, {"id": "bad", "processed_post_json": ["not", "a", "thread"]})
+
+    results = list(reconstruct_rows(
+        rows, convert_json_to_text, workers=workers, chunk_size=2))
+
+    assert [row["id"] for row, _, _ in results] == [row["id"] for row in rows]
+    errors = {row["id"]: error for row, _, error in results if error}
+    assert list(errors) == ["bad"]
+    for row, text, error in results:
+        if not error:
+            assert text == convert_json_to_text(row["processed_post_json"])
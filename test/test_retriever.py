@@ -0,0 +1,164 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.processor.bm25_index import BM25Index
+from src.processor.chunk_store import ChunkStore
+from src.processor.local_index import LocalVectorIndex
+from src.processor.retriever import (
+    Retriever, TTLCache, normalize_query, reciprocal_rank_fusion)
+
+VECTORS = {
+    "visa": [1.0, 0.0, 0.0],
+    "jobs": [0.0, 1.0, 0.0],
+    "housing": [0.0, 0.0, 1.0],
+}
+
+
+class FakeEmbedder:
+    """Embeds each known word as its one-hot vector and records requests"""
+
+    def __init__(self):
+        self.requests = []
+
+    async def embed_texts(self, texts, token_counts=None):
+        self.requests.append(list(texts))
+        await asyncio.sleep(0)
+        return np.array([VECTORS[text.split()[-1].lower()] for text in texts],
+                        dtype=np.float32)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def index():
+    index = LocalVectorIndex(dimension=3)
+    index.upsert([
+        {"id": "1-0", "values": [1.0, 0.1, 0.0], "metadata": {"doc_id": "1"}},
+        {"id": "2-0", "values": [0.1, 1.0, 0.0], "metadata": {"doc_id": "2"}},
+        {"id": "3-0", "values": [0.0, 0.1, 1.0], "metadata": {"doc_id": "3"}},
+    ], namespace="posts")
+    return index
+
+
+def test_normalize_query_collapses_whitespace():
+    assert normalize_query("  work\t\nvisa  ") == "work visa"
+
+
+def test_ttl_cache_evicts_least_recent_and_expired():
+    clock = Clock()
+    cache = TTLCache(max_items=2, ttl=10, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_retrieve_caches_embeddings_and_results(index):
+    embedder = FakeEmbedder()
+    retriever = Retriever(embedder, index, namespace="posts", top_k=1)
+
+    first = asyncio.run(retriever.retrieve("work visa"))
+    again = asyncio.run(retriever.retrieve(" work   visa "))
+
+    assert [match["id"] for match in first] == ["1-0"]
+    assert again == first
+    assert embedder.requests == [["work visa"]]
+    stats = retriever.stats()
+    assert stats["queries"] == 2
+    assert stats["embedding_cache"]["hit_rate"] == 0.5
+    assert stats["result_cache"]["hit_rate"] == 0.5
+    assert stats["p99_ms"] >= stats["p50_ms"] > 0
+
+
+def test_editing_results_leaves_the_cache_intact(index):
+    retriever = Retriever(FakeEmbedder(), index, namespace="posts", top_k=1)
+
+    first = asyncio.run(retriever.retrieve("visa"))
+    first[0]["score"] = -1.0
+    first[0]["metadata"]["doc_id"] = "edited"
+    again = asyncio.run(retriever.retrieve("visa"))
+
+    assert again[0]["score"] > 0
+    assert again[0]["metadata"] == {"doc_id": "1"}
+
+
+def test_result_cache_keys_on_filter_and_expires(index):
+    clock = Clock()
+    retriever = Retriever(FakeEmbedder(), index, namespace="posts", top_k=1,
+                          result_ttl=5, clock=clock)
+
+    unfiltered = asyncio.run(retriever.retrieve("visa"))
+    filtered = asyncio.run(retriever.retrieve("visa", filter={"doc_id": "3"}))
+    assert [match["id"] for match in unfiltered] == ["1-0"]
+    assert [match["id"] for match in filtered] == ["3-0"]
+
+    index.delete(ids=["1-0"], namespace="posts")
+    assert asyncio.run(retriever.retrieve("visa")) == unfiltered
+    clock.now = 5
+    assert [match["id"] for match in asyncio.run(retriever.retrieve("visa"))] == ["2-0"]
+
+
+def test_retrieve_many_embeds_missing_queries_in_one_request(index):
+    embedder = FakeEmbedder()
+    retriever = Retriever(embedder, index, namespace="posts", top_k=1)
+    asyncio.run(retriever.retrieve("jobs"))
+
+    results = asyncio.run(retriever.retrieve_many(
+        ["visa", "jobs", "housing", "visa"]))
+
+    assert [[match["id"] for match in matches] for matches in results] == [
+        ["1-0"], ["2-0"], ["3-0"], ["1-0"]]
+    assert embedder.requests == [["jobs"], ["visa", "housing"]]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    dense = [{"id": "a", "score": 0.9}, {"id": "b", "score": 0.8}]
+    keyword = [{"id": "c", "score": 7.0}, {"id": "b", "score": 5.0}]
+
+    fused = reciprocal_rank_fusion([dense, keyword], k=60)
+
+    assert [match["id"] for match in fused] == ["b", "a", "c"]
+    assert fused[0]["score"] == pytest.approx(2 / 62)
+    assert len(reciprocal_rank_fusion([dense, keyword], top_k=1)) == 1
+
+
+def test_hybrid_retrieval_surfaces_keyword_matches(index):
+    keyword_index = BM25Index()
+    keyword_index.upsert(["1-0", "2-0", "3-0"], [
+        "visa appointment in Berlin",
+        "jobs board for engineers",
+        "Stuart Bradley has a room near the office",
+    ])
+    dense_only = Retriever(FakeEmbedder(), index, namespace="posts", top_k=1)
+    hybrid = Retriever(FakeEmbedder(), index, namespace="posts", top_k=2,
+                       keyword_index=keyword_index)
+
+    dense = asyncio.run(dense_only.retrieve("Stuart Bradley visa"))
+    fused = asyncio.run(hybrid.retrieve("Stuart Bradley visa"))
+
+    assert [match["id"] for match in dense] == ["1-0"]
+    assert {match["id"] for match in fused} == {"1-0", "3-0"}
+
+
+def test_retrieve_hydrates_text_from_chunk_store(index, tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks.sqlite"))
+    store.put_many(["1-0"], ["Visa office opening hours"])
+    retriever = Retriever(FakeEmbedder(), index, namespace="posts", top_k=1,
+                          chunk_store=store)
+
+    matches = asyncio.run(retriever.retrieve("visa"))
+
+    assert matches[0]["metadata"] == {"doc_id": "1", "text": "Visa office opening hours"}
@@ -0,0 +1,181 @@
+import asyncio
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+# text_to_embeddings is a script that imports its sibling modules by name
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "processor"))
+import text_to_embeddings  # noqa: E402
+
+
+class WordChunker:
+    """Stand-in for DocumentChunker that makes one chunk per word"""
+
+    def __init__(self, chunk_size, chunk_overlap):
+        pass
+
+    def split(self, text, metadata, doc_id):
+        if text == "unsplittable":
+            raise ValueError("cannot split")
+        return [
+            text_to_embeddings.Chunk(
+                text=word,
+                metadata={**metadata, 'chunk_index': i, 'chunk_size': len(word),
+                          'token_count': 1},
+                chunk_index=i,
+                doc_id=doc_id
+            )
+            for i, word in enumerate(text.split())
+        ]
+
+
+class FakeEmbeddings:
+    """Stand-in for client.embeddings that echoes each input's length"""
+
+    async def create(self, model, input, **kwargs):
+        await asyncio.sleep(0)
+        return types.SimpleNamespace(data=[
+            types.SimpleNamespace(embedding=[float(len(text))])
+            for text in input
+        ])
+
+
+class FakeUploader:
+    """Stand-in for PineconeUploader that rejects the documents in `failing`.
+
+    While `hold` is set, uploads wait for it, so the upsert stage stalls.
+    """
+
+    def __init__(self, api_key, index_name, dimension, batch_size):
+        self.failing = set()
+        self.hold = None
+        self.upserted = []
+        self.cancelled = 0
+        self.closed = False
+
+    async def upload_vectors(self, vectors, namespace=None):
+        if self.hold is not None:
+            try:
+                await self.hold.wait()
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        if vectors.metadata[0]['doc_id'] in self.failing:
+            raise RuntimeError("upsert rejected")
+        self.upserted.extend(vectors.ids)
+
+    async def delete_vectors(self, ids, namespace=None):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSupabase:
+    """Records the rows BulkWriter upserts and answers the migration check"""
+
+    def __init__(self):
+        self.rows = []
+
+    def table(self, name):
+        return self
+
+    def select(self, columns):
+        return self
+
+    def is_(self, column, value):
+        return self
+
+    def limit(self, count):
+        return self
+
+    def execute(self):
+        return types.SimpleNamespace(data=[])
+
+    def upsert(self, rows, on_conflict):
+        self.rows.extend(rows)
+        return types.SimpleNamespace(execute=lambda: types.SimpleNamespace(data=rows))
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    for name in ("SUPABASE_URL", "SUPABASE_KEY", "OPENAI_API_KEY",
+                 "PINECONE_API_KEY", "PINECONE_INDEX_NAME"):
+        monkeypatch.setenv(name, "test")
+    monkeypatch.setattr(text_to_embeddings, "create_client",
+                        lambda url, key: FakeSupabase())
+    monkeypatch.setattr(text_to_embeddings, "DocumentChunker", WordChunker)
+    monkeypatch.setattr(text_to_embeddings, "PineconeUploader", FakeUploader)
+
+    instance = text_to_embeddings.TextProcessor(
+        namespace="test", use_embedding_cache=False, queue_size=2,
+        embed_flush_timeout=0.01, embed_pending_docs=2, upsert_concurrency=1)
+    # The fake client returns one-dimensional embeddings
+    instance.embedder.dimension = 1
+    instance.embedder.client = types.SimpleNamespace(embeddings=FakeEmbeddings())
+    return instance
+
+
+def make_docs(count):
+    return [{'id': i, 'reconstructed_post': f"post {i}", 'created_at': "2024-05-01"}
+            for i in range(count)]
+
+
+def test_failed_documents_are_counted_and_skipped(processor):
+    docs = make_docs(6)
+    docs[1]['reconstructed_post'] = "unsplittable"
+    processor.uploader.failing = {"4"}
+
+    chunks, errors = asyncio.run(processor.run_pipeline(docs))
+
+    assert (chunks, errors) == (8, 2)
+    assert sorted(processor.uploader.upserted) == [
+        f"{i}-{j}" for i in (0, 2, 3, 5) for j in (0, 1)]
+    # Only the uploaded documents get their chunk hashes saved
+    assert sorted(row['id'] for row in processor.supabase.rows) == [0, 2, 3, 5]
+    assert processor.uploader.closed
+
+
+def test_queues_bound_documents_read_ahead_of_a_stalled_upsert(processor):
+    pulled = []
+
+    async def stream():
+        for doc in make_docs(100):
+            pulled.append(doc['id'])
+            yield doc
+
+    async def run():
+        processor.uploader.hold = asyncio.Event()
+        pipeline = asyncio.create_task(processor.run_pipeline(stream()))
+        await asyncio.sleep(0.2)
+        stalled_at = len(pulled)
+        processor.uploader.hold.set()
+        return stalled_at, await pipeline
+
+    stalled_at, (chunks, errors) = asyncio.run(run())
+
+    # Three queues of two, plus the documents held by each stage's workers
+    assert stalled_at <= 12
+    assert (chunks, errors) == (200, 0)
+    assert len(pulled) == 100
+
+
+def test_failing_feed_cancels_the_other_stages(processor):
+    async def stream():
+        for doc in make_docs(2):
+            yield doc
+        # Give the documents time to reach the stalled upsert stage
+        await asyncio.sleep(0.1)
+        raise ConnectionError("stream lost")
+
+    async def run():
+        processor.uploader.hold = asyncio.Event()
+        with pytest.raises(ConnectionError):
+            await processor.run_pipeline(stream())
+        return processor.uploader.cancelled
+
+    # The waiting upload was cancelled before run_pipeline raised
+    assert asyncio.run(run()) == 1
+    assert processor.uploader.closed
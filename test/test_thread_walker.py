@@ -0,0 +1,50 @@
+from src.processor.thread_walker import convert_json_to_text, walk_thread
+
+
+def node(author, time, message, *children):
+    result = {"author": author, "created_time": time, "message": message}
+    if children:
+        result["comments"] = {"data": list(children)}
+    return result
+
+
+THREAD = {"data": [node(
+    "Ana", "t0", "Question?",
+    node("Sam", "t1", "Answer", node("Ana", "t2", "Thanks")),
+    node("Lee", "t3", "Me too"),
+)]}
+
+
+def test_keeps_the_reconstructed_text_format():
+    assert convert_json_to_text(THREAD) == (
+        "Post by Ana on t0:\n\nQuestion?\n\n"
+        "\nComment by Sam on t1:\n\nAnswer\n\n"
+        "\nReply by Ana on t2:\n\nThanks\n\n"
+        "\nComment by Lee on t3:\n\nMe too")
+
+
+def test_counts_authors_and_depths_in_the_same_walk():
+    summary = walk_thread(THREAD)
+
+    assert summary.author_counts == {"Ana": 2, "Sam": 1, "Lee": 1}
+    assert summary.comment_author_counts == {"Ana": 1, "Sam": 1, "Lee": 1}
+    assert summary.depth_counts == {0: 1, 1: 2, 2: 1}
+    assert summary.max_depth == 2
+
+
+def test_renders_replies_at_any_depth():
+    deepest = node("Kim", "t9", "Deep")
+    for level in range(5000):
+        deepest = node(f"Member {level}", "t", "reply", deepest)
+
+    summary = walk_thread({"data": [node("Ana", "t0", "Post", deepest)]})
+
+    assert summary.max_depth == 5001
+    assert summary.text.endswith("\nReply by Kim on t9:\n\nDeep")
+
+
+def test_counts_without_rendering():
+    summary = walk_thread(THREAD, render=False)
+
+    assert summary.text == ""
+    assert summary.author_counts["Ana"] == 2
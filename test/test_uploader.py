@@ -0,0 +1,131 @@
+import asyncio
+import types
+
+import pytest
+from tenacity import wait_none
+
+from src.processor import uploader as uploader_module
+from src.processor.uploader import (
+    PineconeUploader, UploadError, estimate_vector_bytes)
+
+
+class FakeIndex:
+    """Stand-in for a Pinecone index that rejects upserts containing `fail_ids`"""
+
+    def __init__(self, fail_ids=()):
+        self.fail_ids = set(fail_ids)
+        self.upserts = []
+
+    def upsert(self, vectors, namespace=None):
+        ids = [vector["id"] for vector in vectors]
+        if self.fail_ids & set(ids):
+            raise RuntimeError("upsert rejected")
+        self.upserts.append(ids)
+
+
+class FakePinecone:
+    """Stand-in for the Pinecone client with one existing two-dimensional index"""
+
+    def __init__(self, api_key):
+        self.index = FakeIndex()
+        self.describe_calls = 0
+
+    def Index(self, name):
+        return self.index
+
+    def list_indexes(self):
+        return types.SimpleNamespace(names=lambda: ["posts"])
+
+    def describe_index(self, name):
+        self.describe_calls += 1
+        return types.SimpleNamespace(dimension=2, status={"ready": True})
+
+
+@pytest.fixture
+def make_uploader(monkeypatch):
+    monkeypatch.setattr(uploader_module, "Pinecone", FakePinecone)
+    # Failed batches are retried without the exponential wait
+    monkeypatch.setattr(PineconeUploader.upload_batch.retry, "wait", wait_none())
+    created = []
+
+    def make(**kwargs):
+        instance = PineconeUploader(
+            api_key="test-key", index_name="posts", dimension=2, **kwargs)
+        instance.invalidate_index_cache()
+        created.append(instance)
+        return instance
+
+    yield make
+    for instance in created:
+        instance.invalidate_index_cache()
+        instance.close()
+
+
+def vectors(count, texts=None):
+    texts = texts or ["a"] * count
+    return [{"id": str(i), "values": [0.5, 0.5], "metadata": {"text": text}}
+            for i, text in enumerate(texts)]
+
+
+def test_upload_raises_after_all_batches_with_the_failed_one(make_uploader):
+    uploader = make_uploader(batch_size=2)
+    uploader.index = FakeIndex(fail_ids={"2"})
+
+    with pytest.raises(UploadError) as info:
+        asyncio.run(uploader.upload_vectors(vectors(6), namespace="test"))
+
+    assert [result.batch_num for result in info.value.failed] == [2]
+    assert info.value.failed[0].vector_ids == ["2", "3"]
+    assert "upsert rejected" in str(info.value)
+    # The other batches were still uploaded
+    assert sorted(uploader.index.upserts) == [["0", "1"], ["4", "5"]]
+
+
+def test_upload_returns_batch_results_without_raise_on_error(make_uploader):
+    uploader = make_uploader(batch_size=2)
+    uploader.index = FakeIndex(fail_ids={"4"})
+
+    results = asyncio.run(uploader.upload_vectors(vectors(5), raise_on_error=False))
+
+    assert [result.ok for result in results] == [True, True, False]
+    assert results[2].vector_ids == ["4"]
+    assert results[2].error == "upsert rejected"
+    assert sorted(uploader.index.upserts) == [["0", "1"], ["2", "3"]]
+
+
+def test_make_batches_bounds_payload_bytes(make_uploader):
+    uploader = make_uploader(batch_size=10, max_batch_bytes=200)
+    rows = vectors(7)
+    ids = [row["id"] for row in rows]
+    metadata = [row["metadata"] for row in rows]
+    size = estimate_vector_bytes("0", metadata[0], 2)
+
+    batches = uploader._make_batches(ids, metadata)
+
+    assert [stop - start for start, stop, _ in batches] == [200 // size] * 2 + [1]
+    for start, stop, payload_bytes in batches:
+        assert payload_bytes == size * (stop - start)
+        assert payload_bytes <= 200
+
+
+def test_oversized_vector_is_uploaded_in_its_own_batch(make_uploader):
+    uploader = make_uploader(batch_size=10, max_batch_bytes=200)
+    rows = vectors(5, texts=["a", "a", "x" * 500, "a", "a"])
+
+    results = asyncio.run(uploader.upload_vectors(rows))
+
+    assert [result.vector_ids for result in results] == [["0", "1"], ["2"], ["3", "4"]]
+    assert results[1].payload_bytes > 200
+    assert sorted(uploader.index.upserts) == [["0", "1"], ["2"], ["3", "4"]]
+
+
+def test_index_is_described_once_until_the_cache_is_invalidated(make_uploader):
+    uploader = make_uploader()
+
+    asyncio.run(uploader.upload_vectors(vectors(1)))
+    asyncio.run(uploader.upload_vectors(vectors(1)))
+    assert uploader.pc.describe_calls == 1
+
+    uploader.invalidate_index_cache()
+    asyncio.run(uploader.upload_vectors(vectors(1)))
+    assert uploader.pc.describe_calls == 2